@@ -16,6 +16,7 @@
 
 """Docs Agent"""
 
+import json
 import typing
 from typing import List, Optional
 from absl import logging
@@ -33,14 +34,23 @@ from docs_agent.models.llm import GenerativeLanguageModelFactory
 from docs_agent.storage.rag import RAGFactory, return_collection_name
 from docs_agent.storage.base import RAG
 
-from docs_agent.models.base import AQAModel
+from docs_agent.models.base import AQAModel, AQAResponse
 from docs_agent.models.aqa import AQAModelFactory
 
 from docs_agent.models.tools.tool_manager import ToolManager
 
+from docs_agent.memory.answer_cache import AnswerCache
+
 
 class DocsAgent:
-    """DocsAgent class"""
+    """DocsAgent class
+
+    A DocsAgent can answer questions from multiple threads at once (for
+    example, in a threaded web server): the methods that ask a question
+    return all the data of the request (such as the AQA model's response)
+    as values, and the state shared between requests (models, caches and
+    the vector database) is safe to use from multiple threads.
+    """
 
     # Temporary parameter of init_chroma
     def __init__(
@@ -104,6 +114,11 @@ class DocsAgent:
         else:
             self.rag = None
             self.collection = None
+        # The answer cache can only validate the sources of answers that are
+        # retrieved from the local Chroma database.
+        self.answer_cache = None
+        if self.collection is not None:
+            self.answer_cache = AnswerCache.from_product_config(self.config)
 
         # AQA model settings
         self.aqa_model = None
@@ -145,35 +160,43 @@ class DocsAgent:
                         self.corpus_display = item.corpus_display or (
                             self.config.product_name + " documentation"
                         )
-                self.aqa_response_buffer = ""
         else:
             self.aqa_model = None
-        # Always initialize the Gemini 1.5 pro model for other tasks.
-        gemini_pro_model_config = Models(
-            language_model="gemini-1.5-pro",
+        # The Gemini 1.5 pro model (for other tasks) and the Gemini 1.5 model
+        # (for generating main responses) are created when first used.
+        self._gemini_pro: Optional[GenerativeLanguageModel] = None
+        self._gemini_15: Optional[GenerativeLanguageModel] = None
+
+    # Create a model that uses the same embedding model and API endpoint as
+    # this agent.
+    def create_language_model(self, model_name: str) -> GenerativeLanguageModel:
+        model_config = Models(
+            language_model=model_name,
             embedding_model=self.embedding_model_name,
             api_endpoint=self.api_endpoint,
         )
-        self.gemini_pro = GenerativeLanguageModelFactory.create_model(
-            "gemini-1.5-pro",
-            models_config=gemini_pro_model_config,
-            conditions=config.conditions,
+        return GenerativeLanguageModelFactory.create_model(
+            model_name,
+            models_config=model_config,
+            conditions=self.config.conditions,
         )
 
-        if self.config.app_mode in ("full", "widget-pro"):
-            # Initialize the Gemini 1.5 model for generating main responses.
-            gemini_15_model_config = Models(
-                language_model=self.language_model_name,
-                embedding_model=self.embedding_model_name,
-                api_endpoint=self.api_endpoint,
-            )
-            self.gemini_15 = GenerativeLanguageModelFactory.create_model(
-                self.language_model_name,
-                models_config=gemini_15_model_config,
-                conditions=config.conditions,
-            )
-        else:
-            self.gemini_15 = self.gemini_pro
+    @property
+    def gemini_pro(self) -> GenerativeLanguageModel:
+        """The Gemini 1.5 pro model, used for other tasks."""
+        if self._gemini_pro is None:
+            self._gemini_pro = self.create_language_model("gemini-1.5-pro")
+        return self._gemini_pro
+
+    @property
+    def gemini_15(self) -> GenerativeLanguageModel:
+        """The model used for generating main responses in "full" and "pro"
+        modes, and the Gemini 1.5 pro model in other modes."""
+        if self.config.app_mode not in ("full", "widget-pro"):
+            return self.gemini_pro
+        if self._gemini_15 is None:
+            self._gemini_15 = self.create_language_model(self.language_model_name)
+        return self._gemini_15
 
     # Use this method for talking to a Gemini content model
     def ask_content_model_with_context(self, context, question):
@@ -210,11 +233,35 @@ class DocsAgent:
             tuple: A tuple containing the answer text and a list of SectionProbability objects.
                    Returns a model error message and an empty list if the model fails.
         """
+        (
+            answer_text,
+            search_result,
+            aqa_response,
+        ) = self.ask_aqa_model_using_local_vector_store_with_response(
+            question, results_num=results_num, answer_style=answer_style
+        )
+        return answer_text, search_result
+
+    def ask_aqa_model_using_local_vector_store_with_response(
+        self,
+        question,
+        results_num: int = 5,
+        answer_style: str = "VERBOSE",
+    ):
+        """
+        Same as `ask_aqa_model_using_local_vector_store`, but also returns the
+        AQA model's response to this question.
+
+        Returns:
+            tuple: A tuple containing the answer text, a list of SectionProbability
+                   objects and an AQAResponse (with the raw response, the
+                   answerable probability and the grounding attributions).
+        """
         verbose_prompt = "Question: " + question + "\n"
         # Retrieves from chroma, using up to 30k tokens
         if not self.rag:
             logging.error("Chroma collection not initialized.")
-            return "Chroma collection not initialized.", []
+            return "Chroma collection not initialized.", [], AQAResponse("", [])
         if not self.aqa_model:
             logging.error(
                 "AQA model is not initialized. Cannot generate answer using local vector store."
@@ -222,6 +269,7 @@ class DocsAgent:
             return (
                 "AQA model is not initialized. Cannot generate answer using local vector store.",
                 [],
+                AQAResponse("", []),
             )
         chroma_search_result, final_context = self.rag.query_vector_store_to_build(
             question=question,
@@ -237,9 +285,11 @@ class DocsAgent:
             grounding_passages_texts.append(returned_context)
             verbose_prompt += "\nID: \n" + returned_context + "\n"
 
-        answer_text, aqa_search_result_initial = self.aqa_model.generate_answer(
+        aqa_response = self.aqa_model.answer_question(
             question, grounding_passages_texts, answer_style
         )
+        answer_text = aqa_response.answer_text
+        aqa_search_result_initial = aqa_response.results
 
         # Map the AQA results back to SectionProbability objects.
         aqa_search_result = []
@@ -257,11 +307,11 @@ class DocsAgent:
         if self.config.log_level in ("VERBOSE", "DEBUG"):
             self.print_the_prompt(verbose_prompt)
             if self.config.log_level == "DEBUG":
-                print(self.aqa_model.get_saved_aqa_response_json())
+                print(aqa_response.raw_response)
 
         if not answer_text:
-            return self.config.conditions.model_error_message, []
-        return answer_text, aqa_search_result
+            return self.config.conditions.model_error_message, [], aqa_response
+        return answer_text, aqa_search_result, aqa_response
 
     # Use this method for talking to Gemini's AQA model using a corpus
     # Answer style can be "VERBOSE" or ABSTRACTIVE, EXTRACTIVE
@@ -280,6 +330,27 @@ class DocsAgent:
             tuple: A tuple containing the answer text and a list of SectionProbability objects.
                    Returns a model error message and an empty list if the model fails.
         """
+        (
+            answer_text,
+            search_result,
+            aqa_response,
+        ) = self.ask_aqa_model_using_corpora_with_response(
+            question, corpus_name=corpus_name, answer_style=answer_style
+        )
+        return answer_text, search_result
+
+    def ask_aqa_model_using_corpora_with_response(
+        self, question, corpus_name: str = "None", answer_style: str = "VERBOSE"
+    ):
+        """
+        Same as `ask_aqa_model_using_corpora`, but also returns the AQA model's
+        response to this question.
+
+        Returns:
+            tuple: A tuple containing the answer text, a list of SectionProbability
+                   objects and an AQAResponse (with the raw response, the
+                   answerable probability and the grounding attributions).
+        """
         if not self.aqa_model:
             logging.error(
                 "AQA model is not initialized. Cannot generate answer using corpora."
@@ -287,40 +358,34 @@ class DocsAgent:
             return (
                 "AQA model is not initialized. Cannot generate answer using corpora.",
                 [],
+                AQAResponse("", []),
             )
         if corpus_name == "None":
             corpus_name = self.corpus_name
-        (
-            answer_text,
-            aqa_search_result_raw,
-        ) = self.aqa_model.generate_answer_with_corpora(
+        aqa_response = self.aqa_model.answer_question_with_corpora(
             question, corpus_name, answer_style
         )
+        answer_text = aqa_response.answer_text
+        aqa_search_result_raw = aqa_response.results
 
         search_result = []
         if self.config.log_level == "VERBOSE":
             verbose_prompt = "[question]\n" + question + "\n"
             verbose_prompt += (
                 "\n[answerable_probability]\n"
-                + str(
-                    self.aqa_model.get_saved_aqa_response_json().answerable_probability
-                )
+                + str(aqa_response.answerable_probability)
                 + "\n"
             )
-            for (
-                attribution
-            ) in (
-                self.aqa_model.get_saved_aqa_response_json().answer.grounding_attributions
-            ):
+            for attribution in aqa_response.grounding_attributions:
                 verbose_prompt += "\n[grounding_attributions]\n" + str(
                     attribution.content.parts[0].text
                 )
             self.print_the_prompt(verbose_prompt)
         elif self.config.log_level == "DEBUG":
-            print(self.aqa_model.get_saved_aqa_response_json())
+            print(aqa_response.raw_response)
 
         if not answer_text:
-            return self.config.conditions.model_error_message, []
+            return self.config.conditions.model_error_message, [], aqa_response
 
         # Convert raw results to SectionProbability objects
         for raw_result in aqa_search_result_raw:
@@ -330,7 +395,7 @@ class DocsAgent:
                     section=section, probability=raw_result["probability"]
                 )
             )
-        return answer_text, search_result
+        return answer_text, search_result, aqa_response
 
     def ask_aqa_model(self, question):
         response = ""
@@ -352,6 +417,73 @@ class DocsAgent:
         else:
             return self.collection.query(question, num_returns)
 
+    # Return the scope of the answers cached by this agent. An answer is only
+    # reused by an interface with the same product, models and settings.
+    def get_answer_cache_scope(self, interface: str) -> str:
+        return json.dumps(
+            [
+                interface,
+                self.config.product_name,
+                self.language_model_name,
+                self.embedding_model_name,
+                self.config.app_mode,
+                self.config.docs_agent_config,
+                self.config.conditions.condition_text,
+                return_collection_name(product_config=self.config),
+            ]
+        )
+
+    # Return the cached answer of the same (or a very similar) question, if
+    # the answer cache is enabled and the sources of the answer have not
+    # changed since. Returns None if there is no such answer.
+    def lookup_cached_answer(self, question: str, interface: str) -> Optional[dict]:
+        if self.answer_cache is None or not hasattr(self.collection, "embedQuery"):
+            return None
+        try:
+            embedding = self.collection.embedQuery(question)[0]
+            return self.answer_cache.lookup(
+                scope=self.get_answer_cache_scope(interface),
+                embedding=embedding,
+                validate=self.collection.hasMdHashes,
+            )
+        except Exception as e:
+            logging.error(f"Cannot look up the answer cache: {e}")
+            return None
+
+    # Store the answer to a question in the answer cache. The answer is only
+    # stored if the md_hash of each source in search_result is known.
+    # Failed answers (an empty response or the model error message) are not
+    # stored, nor are answers without related questions, unless the related
+    # questions are generated later (related_questions_deferred is True).
+    def cache_answer(
+        self,
+        question: str,
+        interface: str,
+        answer: dict,
+        search_result: list,
+        related_questions_deferred: bool = False,
+    ) -> None:
+        if self.answer_cache is None or not hasattr(self.collection, "embedQuery"):
+            return
+        response = answer.get("response", "")
+        if not response or response == self.config.conditions.model_error_message:
+            return
+        if answer.get("related_questions") == "" and not related_questions_deferred:
+            return
+        md_hashes = [getattr(item.section, "md_hash", None) for item in search_result]
+        if not md_hashes or any(md_hash in (None, "", "None") for md_hash in md_hashes):
+            return
+        try:
+            self.answer_cache.store(
+                scope=self.get_answer_cache_scope(interface),
+                question=question,
+                embedding=self.collection.embedQuery(question)[0],
+                answer=answer,
+                md_hashes=md_hashes,
+            )
+        except Exception as e:
+            logging.error(f"Cannot store the answer in the answer cache: {e}")
+
     # Add specific instruction as a prefix to the context
     def add_instruction_to_context(self, context):
         new_context = ""
@@ -405,6 +537,42 @@ class DocsAgent:
             return self.config.conditions.model_error_message, new_prompt
         return response, new_prompt
 
+    # Same as `ask_content_model_with_context_prompt`, except that the text
+    # of the response is yielded as it is generated by the model. If the
+    # model fails after some text is yielded, the error is raised, so that
+    # the partial response is not taken as a complete answer.
+    def ask_content_model_with_context_prompt_stream(
+        self,
+        context: str,
+        question: str,
+        prompt: typing.Optional[str] = None,
+        model: typing.Optional[str] = None,
+    ) -> typing.Iterator[str]:
+        if prompt == None:
+            prompt = self.config.conditions.condition_text
+        new_prompt = f"{prompt}\n\nContext:\n{context}\nQuestion:\n{question}"
+        # Print the prompt for debugging if the log level is VERBOSE.
+        if self.config.log_level == "VERBOSE":
+            self.print_the_prompt(new_prompt)
+        if model == "gemini-pro":
+            language_model = self.gemini_pro
+        elif model == "gemini-1.5":
+            language_model = self.gemini_15
+        else:
+            language_model = self.language_model
+        has_text = False
+        try:
+            for text in language_model.generate_content_stream(
+                contents=new_prompt, log_level=self.config.log_level
+            ):
+                has_text = True
+                yield text
+        except Exception as e:
+            logging.error(f"Error in generate_content_stream(): {e}")
+            if has_text:
+                raise
+            yield self.config.conditions.model_error_message
+
     async def process_prompt_with_tools(
         self,
         prompt: str,
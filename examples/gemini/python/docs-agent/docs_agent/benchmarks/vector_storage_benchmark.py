@@ -0,0 +1,167 @@
+#
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Measure the memory, speed and recall of the ways to store embeddings in a flat index"""
+
+import os
+import tempfile
+import time
+import typing
+
+import numpy as np
+
+from docs_agent.storage.flat_index import (
+    EMBEDDINGS_FILE,
+    FULL_EMBEDDINGS_FILE,
+    SCALES_FILE,
+    SQUARED_NORMS_FILE,
+    VECTOR_DTYPES,
+    quantize_vectors,
+    search_vectors,
+)
+
+
+# Return embeddings truncated to their first `dimensions` values and
+# normalized to unit length, which is how embeddings with a reduced
+# `output_dimensionality` are created.
+def truncate_vectors(vectors: np.ndarray, dimensions: typing.Optional[int]):
+    if not dimensions or dimensions >= vectors.shape[1]:
+        return vectors
+    truncated = np.ascontiguousarray(vectors[:, :dimensions], dtype=np.float32)
+    norms = np.linalg.norm(truncated, axis=1, keepdims=True)
+    return truncated / np.where(norms > 0, norms, 1)
+
+
+# Return all embeddings of a Chroma collection as a float32 matrix.
+def read_collection_embeddings(collection, page_size: int = 1000) -> np.ndarray:
+    pages = []
+    for offset in range(0, collection.count(), page_size):
+        page = collection.get(include=["embeddings"], limit=page_size, offset=offset)
+        if len(page["ids"]) == 0:
+            break
+        pages.append(np.asarray(page["embeddings"], dtype=np.float32))
+    if not pages:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.vstack(pages)
+
+
+# Return the size on disk of the embedding files of a flat index that stores
+# `stored` embeddings, by writing them into a temporary directory the same
+# way as `export_flat_index()`.
+def measure_disk_bytes(
+    stored: np.ndarray,
+    scales: typing.Optional[np.ndarray],
+    rerank_embeddings: typing.Optional[np.ndarray],
+    squared_norms: np.ndarray,
+) -> int:
+    files = {EMBEDDINGS_FILE: stored, SQUARED_NORMS_FILE: squared_norms}
+    if scales is not None:
+        files[SCALES_FILE] = scales
+    if rerank_embeddings is not None:
+        files[FULL_EMBEDDINGS_FILE] = rerank_embeddings
+    disk_bytes = 0
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for name, array in files.items():
+            path = os.path.join(temp_dir, name)
+            np.save(path, array)
+            disk_bytes += os.path.getsize(path)
+    return disk_bytes
+
+
+def run_vector_storage_benchmark(
+    embeddings: np.ndarray,
+    dimensions: typing.Iterable[typing.Optional[int]] = (None,),
+    vector_dtypes: typing.Iterable[str] = VECTOR_DTYPES,
+    num_queries: int = 100,
+    top_k: int = 10,
+    space: str = "l2",
+    seed: int = 0,
+) -> typing.List[dict]:
+    """Measures each combination of dimension and vector dtype.
+
+    The embeddings of randomly selected entries are used as queries and are
+    held out of the searched embeddings, so that a query does not find
+    itself. At most half of the entries are used as queries. The results of
+    each combination are compared to an exact search of the full-size
+    float32 embeddings.
+
+    Returns:
+        A list with one dictionary per combination, with the `dimensions`,
+        the `vector_dtype`, the `memory_bytes` of the searched matrix, its
+        `compression` compared to full-size float32 embeddings, the
+        `rerank_bytes` of the float32 copy that is read to re-rank the
+        candidates of float16 and int8 searches, the `disk_bytes` of all
+        embedding files, the average `latency_ms` of a search and the
+        `recall` at `top_k`.
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if len(embeddings) < 2:
+        return []
+    rng = np.random.default_rng(seed)
+    query_rows = rng.choice(
+        len(embeddings),
+        size=max(1, min(num_queries, len(embeddings) // 2)),
+        replace=False,
+    )
+    is_searched = np.ones(len(embeddings), dtype=bool)
+    is_searched[query_rows] = False
+    queries = embeddings[query_rows]
+    embeddings = embeddings[is_searched]
+    squared_norms = np.einsum("ij,ij->i", embeddings, embeddings)
+    expected = [
+        set(search_vectors(embeddings, query, top_k, squared_norms, space)[0])
+        for query in queries
+    ]
+    results = []
+    for dimension in dimensions:
+        full_embeddings = truncate_vectors(embeddings, dimension)
+        full_queries = truncate_vectors(queries, dimension)
+        full_squared_norms = np.einsum("ij,ij->i", full_embeddings, full_embeddings)
+        for vector_dtype in vector_dtypes:
+            stored, scales = quantize_vectors(full_embeddings, vector_dtype)
+            rerank_embeddings = None if vector_dtype == "float32" else full_embeddings
+            found = 0
+            start = time.perf_counter()
+            for query, expected_rows in zip(full_queries, expected):
+                rows, _ = search_vectors(
+                    stored,
+                    query,
+                    top_k,
+                    full_squared_norms,
+                    space,
+                    scales=scales,
+                    full_embeddings=rerank_embeddings,
+                )
+                found += len(expected_rows.intersection(rows))
+            elapsed = time.perf_counter() - start
+            memory_bytes = stored.nbytes + (scales.nbytes if scales is not None else 0)
+            results.append(
+                {
+                    "dimensions": full_embeddings.shape[1],
+                    "vector_dtype": vector_dtype,
+                    "memory_bytes": memory_bytes,
+                    "compression": embeddings.nbytes / memory_bytes,
+                    "rerank_bytes": (
+                        rerank_embeddings.nbytes if rerank_embeddings is not None else 0
+                    ),
+                    "disk_bytes": measure_disk_bytes(
+                        stored, scales, rerank_embeddings, full_squared_norms
+                    ),
+                    "latency_ms": elapsed * 1000 / len(queries),
+                    "recall": found / sum(len(rows) for rows in expected),
+                }
+            )
+    return results
@@ -17,6 +17,7 @@
 """Chatbot web service for Docs Agent"""
 
 from flask import Blueprint, render_template, request, redirect, url_for, json, jsonify
+from flask import Response, copy_current_request_context, stream_with_context
 import markdown
 import markdown.extensions.fenced_code
 import urllib
@@ -35,8 +36,17 @@ from docs_agent.utilities.helpers import (
     md_to_html,
 )
 from docs_agent.utilities import config
+from docs_agent.utilities.stages import Stage, run_stages
 from docs_agent.agents.docs_agent import DocsAgent
 
+from docs_agent.memory.answer_cache import (
+    decode_search_result,
+    encode_search_result,
+)
+from docs_agent.memory.related_questions import (
+    RelatedQuestionsTasks,
+    get_source_key,
+)
 from docs_agent.memory.logging import (
     log_question,
     log_debug_info_to_file,
@@ -257,6 +267,35 @@ def construct_blueprint(
         else:
             return redirect(url_for(redirect_index))
 
+    # Stream the answer to a question as server-sent events.
+    @bp.route("/stream", methods=["GET", "POST"])
+    def stream():
+        if request.method == "POST":
+            question = request.form.get("question", "")
+        else:
+            question = request.args.get("question", "")
+        if question == "":
+            return jsonify({"error": "Must have a valid question"}), 400
+        server_url = request.url_root.replace("http", "https")
+        return Response(
+            stream_with_context(stream_answer(question, docs_agent, server_url)),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    # Return the related questions of a request whose related questions
+    # are generated in the background (see `defer_related_questions`).
+    @bp.route("/related_questions/<request_id>", methods=["GET"])
+    def related_questions(request_id):
+        tasks = RelatedQuestionsTasks.from_product_config(docs_agent.config)
+        try:
+            html = tasks.get(request_id, timeout=60)
+        except TimeoutError:
+            return jsonify({"error": "Related questions are not ready"}), 504
+        if html is None:
+            return jsonify({"error": "Unknown request"}), 404
+        return jsonify({"uuid": request_id, "html": html})
+
     # Render the log view page.
     @bp.route("/logs", methods=["GET", "POST"])
     def logs():
@@ -287,200 +326,110 @@ def extract_context_from_search_result(search_result):
     return context
 
 
+# Debugging feature: Do not log a question if it ends with `?do_not_log`.
+# Returns the question without `do_not_log` and whether it can be logged.
+def parse_do_not_log(question):
+    question_match = re.search(r"^(.*)\?do_not_log$", question)
+    if question_match:
+        return question_match[1] + "?", False
+    return question, True
+
+
 # Construct a set of prompts using the user question, send the prompts to
 # the language model, receive responses, and present them into a page.
 # Use template to specify a custom template for the classic web UI
 def ask_model(question, agent, template: str = "chatui/index.html"):
-    # Returns a built context, a total token count of the context and an array
-    # of sourceOBJ
-    full_prompt = ""
-    final_context = ""
     docs_agent = agent
-    new_question_count = 5
-    results_num = 5
-    aqa_response_in_html = ""
-
-    # Debugging feature: Do not log this question if it ends with `?do_not_log`.
-    can_be_logged = True
-    question_match = re.search(r"^(.*)\?do_not_log$", question)
-    if question_match:
-        # Update the question to remove `do_not_log`.
-        question = question_match[1] + "?"
-        can_be_logged = False
-
-    # Retrieve context and ask the question.
-    if (
-        docs_agent.config.app_mode == "full"
-        or docs_agent.config.app_mode == "widget-pro"
-        or "aqa" in docs_agent.config.models.language_model
-    ):
-        # For "full" and "pro" modes, use the AQA model for the first request.
-        # For the AQA model, check the DB type.
-        if docs_agent.config.db_type == "chroma":
-            (
-                response,
-                search_result,
-            ) = docs_agent.ask_aqa_model_using_local_vector_store(
-                question=question, results_num=results_num
-            )
-        else:
-            (response, search_result) = docs_agent.ask_aqa_model_using_corpora(
-                question=question
-            )
-        # Extract context from this AQA model's response.
-        final_context = extract_context_from_search_result(search_result)
-        # Save this AQA model's response.
-        aqa_response_json = docs_agent.aqa_model.get_saved_aqa_response_json()
-        # Convert this AQA model's response to HTML for better rendering.
-        if aqa_response_json:
-            aqa_response_in_html = json.dumps(
-                type(aqa_response_json).to_dict(aqa_response_json), indent=2
-            )
+    question, can_be_logged = parse_do_not_log(question)
+
+    # Reuse the answer to the same (or a very similar) question if the answer
+    # cache is enabled and the sources of the answer have not changed since.
+    answer = docs_agent.lookup_cached_answer(question, interface="chatui")
+    defer_related = is_related_questions_deferred(docs_agent)
+    if answer is not None:
+        search_result = decode_search_result(answer["sources"])
     else:
-        # For the `gemini-*` model, always use the Chroma database.
-        if docs_agent.config.docs_agent_config == "experimental":
-            results_num = 10
-            new_question_count = 5
-        else:
-            results_num = 5
-            new_question_count = 5
-        # Note: Error if max_sources > results_num, so leave the same for now.
-        if docs_agent.config.db_type == "none":
-            search_result = []
-            final_context = ""
-            # response = ask_content_model_with_context(context="", question=question)
-            # Issue if max_sources > results_num, so leave the same for now
-        else:
-            this_token_limit = 30000
-            if docs_agent.config.models.language_model.startswith("gemini-1.5"):
-                this_token_limit = 50000
-            if not docs_agent.rag:
-                logging.error("No initialized Chroma collection.")
-                search_result = []
-                final_context = "Error: Could not retrieve context."
-            else:
-                try:
-                    search_result, final_context = docs_agent.rag.query_vector_store_to_build(
-                        question=question,
-                        token_limit=this_token_limit,
-                        results_num=results_num,
-                        max_sources=results_num,
-                    )
-                except Exception as e:
-                    logging.error(f"Error retrieving content from Chroma: {e}")
-                    search_result = []
-                    final_context = "Error: Could not retrieve context."
-        try:
-            response, full_prompt = docs_agent.ask_content_model_with_context_prompt(
-                context=final_context, question=question
-            )
-            aqa_response_in_html = ""
-        except:
-            logging.error("Failed to ask content model with context prompt.")
-
-    ### Check the AQA model's answerable_probability field
-    probability = "None"
-    if docs_agent.aqa_model:
-        aqa_response = docs_agent.aqa_model.get_saved_aqa_response_json()
-        try:
-            probability = aqa_response.answerable_probability
-        except:
-            probability = 0.0
-
-    # For "full" and "pro" modes, retrieve additional context from
-    # the secondary knowledge database.
-    additional_context = ""
-    if (
-        docs_agent.config.app_mode == "full"
-        or docs_agent.config.app_mode == "widget-pro"
-    ):
-        if docs_agent.config.secondary_db_type == "chroma":
-            (
-                additional_search_result,
-                additional_context,
-            ) = docs_agent.query_vector_store_to_build(
-                question=question,
-                token_limit=30000,
-                results_num=5,
-                max_sources=5,
-            )
-            # Extract context from this search result.
-            additional_context = extract_context_from_search_result(
-                additional_search_result
-            )
-        elif docs_agent.config.secondary_db_type == "google_semantic_retriever":
-            (
-                additional_response,
-                additional_search_result,
-            ) = docs_agent.ask_aqa_model_using_corpora(
-                question=question,
-                corpus_name=str(docs_agent.config.secondary_corpus_name),
-            )
-            # Extract context from this search result.
-            additional_context = extract_context_from_search_result(
-                additional_search_result
-            )
-
-    ### PROMPT: GET RELATED QUESTIONS.
-    # 1. Use the response from Prompt 1 as context and add a custom condition.
-    # 2. Prepare a new question asking the model to come up with 5 related questions.
-    # 3. Ask the language model with the new question.
-    # 4. Parse the model's response into a list in HTML format.
-    new_condition = f"Read the context below and answer the question at the end:"
-    new_question = f"Can you think of {new_question_count} questions whose answers can be found in the context above?"
-    try:
-        (
-            related_questions_response,
-            new_prompt_questions,
-        ) = docs_agent.ask_content_model_with_context_prompt(
-            context=final_context,
-            question=new_question,
-            prompt=new_condition,
-            model="gemini-1.5",
+        answer, search_result = generate_answer(
+            question, docs_agent, include_related_questions=not defer_related
         )
-        # Clean up the response to a proper html list
-        related_questions = parse_related_questions_response_to_html_list(
-            markdown.markdown(related_questions_response)
+        docs_agent.cache_answer(
+            question,
+            "chatui",
+            answer,
+            search_result,
+            related_questions_deferred=defer_related,
         )
-    except:
-        related_questions = ""
-        logging.error("Failed to ask content model with context prompt.")
+    response = answer["response"]
+    related_questions = answer["related_questions"]
+    final_context = answer["final_context"]
+    summary_response = answer["summary_response"]
+    aqa_response_in_html = answer["aqa_response_in_html"]
 
     ### PREPARE OTHER ELEMENTS NEEDED BY UI.
-    # - Create a uuid for this request.
     # - A workaround to get the server's URL to work with the rewrite and like features.
-    new_uuid = uuid.uuid1()
     server_url = request.url_root.replace("http", "https")
 
-    ### The code below is added for "full" and "pro" modes.
-    # Ask the model to generate the main response.
-    if (
-        docs_agent.config.app_mode == "full"
-        or docs_agent.config.app_mode == "widget-pro"
-    ) and docs_agent.config.db_type != "none":
-        if additional_context != "":
-            extended_context = f"RELEVANT CONTEXT FOUND IN SECONDARY KNOWLEDGE SOURCE:\n\n{additional_context}\n\nRELEVANT CONTEXT FOUND IN PRIMARY KNOWLEDGE SOURCE:\n\n{final_context}\n"
-        else:
-            extended_context = f"{final_context}\n"
-        additional_condition = (
-            "DO NOT INCLUDE THE NAMES OF PEOPLE FOUND IN CONVERSATIONS"
-        )
-        new_condition = f"Read the context below and provide a detailed overview to address the question at the end ({additional_condition}):"
-        (
-            summary_response,
-            summary_prompt,
-        ) = docs_agent.ask_content_model_with_context_prompt(
-            context=extended_context,
-            question=question,
-            prompt=new_condition,
-            model="gemini-1.5",
+    ### LOG THIS REQUEST.
+    new_uuid = log_request(
+        docs_agent, question, answer, search_result, server_url, can_be_logged
+    )
+
+    ### GENERATE RELATED QUESTIONS IN THE BACKGROUND.
+    # The page loads them from the `related_questions` endpoint.
+    defer_related = defer_related and related_questions == ""
+    if defer_related:
+        # The links of the related questions are built with this request.
+        # Failures are raised, so that they are not kept for the sources.
+        @copy_current_request_context
+        def generate():
+            return generate_related_questions(docs_agent, final_context)
+
+        RelatedQuestionsTasks.from_product_config(docs_agent.config).submit(
+            str(new_uuid),
+            get_source_key(search_result, final_context),
+            generate,
         )
-        log_lines = f"{response}\n\n{summary_response}"
-    else:
-        summary_response = ""
-        log_lines = f"{response}"
 
-    ### LOG THIS REQUEST.
+    ### Check the feedback mode in the `config.yaml` file.
+    feedback_mode = "feedback"
+    if hasattr(docs_agent.config, "feedback_mode"):
+        feedback_mode = str(docs_agent.config.feedback_mode)
+
+    return render_template(
+        template,
+        question=question,
+        response=response,
+        related_questions=related_questions,
+        product=docs_agent.config.product_name,
+        server_url=server_url,
+        uuid=new_uuid,
+        aqa_response_in_html=aqa_response_in_html,
+        named_link_html=named_link_html,
+        trim_section_for_page_link=trim_section_for_page_link,
+        md_to_html=md_to_html,
+        final_context=final_context,
+        search_result=search_result,
+        summary_response=summary_response,
+        feedback_mode=feedback_mode,
+        defer_related_questions=defer_related,
+    )
+
+
+# Return True if the related questions are generated after the answer is
+# returned, instead of before.
+def is_related_questions_deferred(docs_agent):
+    return str(getattr(docs_agent.config, "defer_related_questions", "False")) == "True"
+
+
+# Log a question and its answer (unless `can_be_logged` is False) and return
+# the uuid created for this request.
+def log_request(
+    docs_agent, question, answer, search_result, server_url, can_be_logged=True
+):
+    new_uuid = uuid.uuid1()
+    log_lines = answer["log_lines"]
+    probability = answer["probability"]
+    final_context = answer["final_context"]
     if can_be_logged:
         if docs_agent.config.enable_logs_to_markdown == "True":
             log_question(
@@ -514,29 +463,383 @@ def ask_model(question, agent, template: str = "chatui/index.html"):
                 probability=probability,
                 server_url=server_url,
             )
+    return new_uuid
 
-    ### Check the feedback mode in the `config.yaml` file.
-    feedback_mode = "feedback"
-    if hasattr(docs_agent.config, "feedback_mode"):
-        feedback_mode = str(docs_agent.config.feedback_mode)
 
-    return render_template(
-        template,
+# Retrieve the context of a question from the Chroma database for the
+# `gemini-*` models. Returns the search result and the context.
+def retrieve_context(question, docs_agent):
+    if docs_agent.config.docs_agent_config == "experimental":
+        results_num = 10
+    else:
+        results_num = 5
+    # Note: Error if max_sources > results_num, so leave the same for now.
+    if docs_agent.config.db_type == "none":
+        search_result = []
+        final_context = ""
+        # response = ask_content_model_with_context(context="", question=question)
+        # Issue if max_sources > results_num, so leave the same for now
+    else:
+        this_token_limit = 30000
+        if docs_agent.config.models.language_model.startswith("gemini-1.5"):
+            this_token_limit = 50000
+        if not docs_agent.rag:
+            logging.error("No initialized Chroma collection.")
+            search_result = []
+            final_context = "Error: Could not retrieve context."
+        else:
+            try:
+                search_result, final_context = docs_agent.rag.query_vector_store_to_build(
+                    question=question,
+                    token_limit=this_token_limit,
+                    results_num=results_num,
+                    max_sources=results_num,
+                )
+            except Exception as e:
+                logging.error(f"Error retrieving content from Chroma: {e}")
+                search_result = []
+                final_context = "Error: Could not retrieve context."
+    return search_result, final_context
+
+
+# Ask the language model for questions whose answers can be found in the
+# context, and return them as an HTML list.
+# 1. Use the response from Prompt 1 as context and add a custom condition.
+# 2. Prepare a new question asking the model to come up with 5 related questions.
+# 3. Ask the language model with the new question.
+# 4. Parse the model's response into a list in HTML format.
+def ask_related_questions(docs_agent, final_context, new_question_count=5):
+    try:
+        related_questions = generate_related_questions(
+            docs_agent, final_context, new_question_count
+        )
+    except:
+        related_questions = ""
+        logging.error("Failed to ask content model with context prompt.")
+    return related_questions
+
+
+# Same as `ask_related_questions`, except that an error is raised if the
+# language model fails, so that the failure is not kept as the result.
+def generate_related_questions(docs_agent, final_context, new_question_count=5):
+    new_condition = f"Read the context below and answer the question at the end:"
+    new_question = f"Can you think of {new_question_count} questions whose answers can be found in the context above?"
+    (
+        related_questions_response,
+        new_prompt_questions,
+    ) = docs_agent.ask_content_model_with_context_prompt(
+        context=final_context,
+        question=new_question,
+        prompt=new_condition,
+        model="gemini-1.5",
+    )
+    if related_questions_response == docs_agent.config.conditions.model_error_message:
+        raise RuntimeError("The language model failed to generate related questions.")
+    # Clean up the response to a proper html list (as a string, so that
+    # it can be stored in the answer cache and sent as JSON).
+    return str(
+        parse_related_questions_response_to_html_list(
+            markdown.markdown(related_questions_response)
+        )
+    )
+
+
+# Ask the AQA model to answer a question (for "full" and "pro" modes and
+# the AQA model). Returns the values of the answer that come from the AQA model.
+def ask_aqa_model(question, docs_agent, results_num=5):
+    # For the AQA model, check the DB type.
+    if docs_agent.config.db_type == "chroma":
+        (
+            response,
+            search_result,
+            aqa_response,
+        ) = docs_agent.ask_aqa_model_using_local_vector_store_with_response(
+            question=question, results_num=results_num
+        )
+    else:
+        (
+            response,
+            search_result,
+            aqa_response,
+        ) = docs_agent.ask_aqa_model_using_corpora_with_response(question=question)
+    # Extract context from this AQA model's response.
+    final_context = extract_context_from_search_result(search_result)
+    # Convert this AQA model's response to HTML for better rendering.
+    aqa_response_json = aqa_response.raw_response
+    aqa_response_in_html = ""
+    if aqa_response_json:
+        aqa_response_in_html = json.dumps(
+            type(aqa_response_json).to_dict(aqa_response_json), indent=2
+        )
+    ### Check the AQA model's answerable_probability field
+    probability = aqa_response.answerable_probability
+    return {
+        "response": response,
+        "search_result": search_result,
+        "final_context": final_context,
+        "aqa_response_in_html": aqa_response_in_html,
+        "probability": probability,
+    }
+
+
+# Ask the `gemini-*` model to answer a question using the retrieved context.
+def ask_content_model(question, final_context, docs_agent):
+    response = ""
+    try:
+        response, full_prompt = docs_agent.ask_content_model_with_context_prompt(
+            context=final_context, question=question
+        )
+    except:
+        logging.error("Failed to ask content model with context prompt.")
+    return response
+
+
+# For "full" and "pro" modes, retrieve additional context from
+# the secondary knowledge database.
+def retrieve_additional_context(question, docs_agent):
+    additional_context = ""
+    if docs_agent.config.secondary_db_type == "chroma":
+        (
+            additional_search_result,
+            additional_context,
+        ) = docs_agent.query_vector_store_to_build(
+            question=question,
+            token_limit=30000,
+            results_num=5,
+            max_sources=5,
+        )
+        # Extract context from this search result.
+        additional_context = extract_context_from_search_result(
+            additional_search_result
+        )
+    elif docs_agent.config.secondary_db_type == "google_semantic_retriever":
+        (
+            additional_response,
+            additional_search_result,
+        ) = docs_agent.ask_aqa_model_using_corpora(
+            question=question,
+            corpus_name=str(docs_agent.config.secondary_corpus_name),
+        )
+        # Extract context from this search result.
+        additional_context = extract_context_from_search_result(
+            additional_search_result
+        )
+    return additional_context
+
+
+# For "full" and "pro" modes, ask the model to generate the main response
+# using the context from both knowledge databases.
+def ask_summary(question, final_context, additional_context, docs_agent):
+    if additional_context != "":
+        extended_context = f"RELEVANT CONTEXT FOUND IN SECONDARY KNOWLEDGE SOURCE:\n\n{additional_context}\n\nRELEVANT CONTEXT FOUND IN PRIMARY KNOWLEDGE SOURCE:\n\n{final_context}\n"
+    else:
+        extended_context = f"{final_context}\n"
+    additional_condition = "DO NOT INCLUDE THE NAMES OF PEOPLE FOUND IN CONVERSATIONS"
+    new_condition = f"Read the context below and provide a detailed overview to address the question at the end ({additional_condition}):"
+    (
+        summary_response,
+        summary_prompt,
+    ) = docs_agent.ask_content_model_with_context_prompt(
+        context=extended_context,
         question=question,
-        response=response,
-        related_questions=related_questions,
-        product=docs_agent.config.product_name,
-        server_url=server_url,
-        uuid=new_uuid,
-        aqa_response_in_html=aqa_response_in_html,
-        named_link_html=named_link_html,
-        trim_section_for_page_link=trim_section_for_page_link,
-        md_to_html=md_to_html,
-        final_context=final_context,
-        search_result=search_result,
-        summary_response=summary_response,
-        feedback_mode=feedback_mode,
+        prompt=new_condition,
+        model="gemini-1.5",
+    )
+    return summary_response
+
+
+# Build the stages that answer a question. A stage starts as soon as the
+# stages it depends on are complete, for instance, the related questions
+# only need the retrieved context, so they are generated while the main
+# answer is generated.
+def build_answer_stages(
+    question, docs_agent, new_question_count=5, include_related_questions=True
+):
+    full_mode = (
+        docs_agent.config.app_mode == "full"
+        or docs_agent.config.app_mode == "widget-pro"
+    )
+    stages = {}
+    if full_mode or "aqa" in docs_agent.config.models.language_model:
+        # For "full" and "pro" modes, use the AQA model for the first request.
+        # The AQA model retrieves the context and answers the question at once.
+        stages["context"] = Stage(lambda _: ask_aqa_model(question, docs_agent))
+        stages["response"] = Stage(
+            lambda results: results["context"]["response"], depends_on=("context",)
+        )
+    else:
+        # For the `gemini-*` model, always use the Chroma database.
+        def retrieve(_):
+            search_result, final_context = retrieve_context(question, docs_agent)
+            return {
+                "search_result": search_result,
+                "final_context": final_context,
+                "aqa_response_in_html": "",
+                "probability": "None",
+            }
+
+        stages["context"] = Stage(retrieve)
+        stages["response"] = Stage(
+            lambda results: ask_content_model(
+                question, results["context"]["final_context"], docs_agent
+            ),
+            depends_on=("context",),
+        )
+    ### PROMPT: GET RELATED QUESTIONS.
+    if include_related_questions:
+        stages["related_questions"] = Stage(
+            lambda results: ask_related_questions(
+                docs_agent, results["context"]["final_context"], new_question_count
+            ),
+            depends_on=("context",),
+        )
+    ### The stages below are added for "full" and "pro" modes.
+    if full_mode:
+        # The secondary knowledge database only needs the question.
+        stages["additional_context"] = Stage(
+            lambda _: retrieve_additional_context(question, docs_agent)
+        )
+        if docs_agent.config.db_type != "none":
+            stages["summary"] = Stage(
+                lambda results: ask_summary(
+                    question,
+                    results["context"]["final_context"],
+                    results["additional_context"],
+                    docs_agent,
+                ),
+                depends_on=("context", "additional_context"),
+            )
+    return stages
+
+
+# Retrieve context and send the prompts to the language model to answer
+# a question. Returns a dictionary of the values needed to present the answer
+# (which can be stored in the answer cache) and the search result.
+# Independent prompts are sent concurrently (see `build_answer_stages`).
+# If `include_related_questions` is False, the related questions are empty.
+def generate_answer(question, docs_agent, include_related_questions=True):
+    results = run_stages(
+        build_answer_stages(
+            question,
+            docs_agent,
+            include_related_questions=include_related_questions,
+        ),
+        label="chatui answer",
+    )
+    context = results["context"]
+    response = results["response"]
+    search_result = context["search_result"]
+    summary_response = results.get("summary", "")
+    if "summary" in results:
+        log_lines = f"{response}\n\n{summary_response}"
+    else:
+        log_lines = f"{response}"
+
+    answer = {
+        "response": response,
+        "related_questions": results.get("related_questions", ""),
+        "final_context": context["final_context"],
+        "summary_response": summary_response,
+        "aqa_response_in_html": context["aqa_response_in_html"],
+        "probability": context["probability"],
+        "log_lines": log_lines,
+        "sources": encode_search_result(search_result),
+    }
+    return answer, search_result
+
+
+# Return True if the main answer can be streamed: the "full" and "pro" modes
+# and the AQA model generate the main answer in a single request.
+def can_stream_answer(docs_agent):
+    return not (
+        docs_agent.config.app_mode == "full"
+        or docs_agent.config.app_mode == "widget-pro"
+        or "aqa" in docs_agent.config.models.language_model
+    )
+
+
+# Format a server-sent event with a JSON payload.
+def format_sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+# Return the title, URL and distance (or probability) of each source in
+# a search result.
+def summarize_sources(search_result):
+    sources = []
+    for source in encode_search_result(search_result):
+        summary = {
+            "section_title": source["section"]["section_title"],
+            "page_title": source["section"]["page_title"],
+            "url": source["section"]["url"],
+        }
+        if "probability" in source:
+            summary["probability"] = source["probability"]
+        else:
+            summary["distance"] = source["distance"]
+        sources.append(summary)
+    return sources
+
+
+# Answer a question and yield the answer as server-sent events:
+# - `token`: a piece of the main answer (in Markdown), as soon as the
+#   language model generates it.
+# - `sources`: the sources of the answer.
+# - `related_questions`: the related questions, as an HTML list.
+# - `done`: the uuid of this request, once the answer is complete.
+# - `error`: the model error message, if the language model fails after
+#   part of the answer is sent. No other events follow, and the partial
+#   answer is neither cached nor logged.
+# A cached answer (or an answer that cannot be streamed) is sent as a
+# single `token` event.
+def stream_answer(question, docs_agent, server_url):
+    question, can_be_logged = parse_do_not_log(question)
+    answer = docs_agent.lookup_cached_answer(question, interface="chatui")
+    if answer is not None:
+        search_result = decode_search_result(answer["sources"])
+    elif not can_stream_answer(docs_agent):
+        answer, search_result = generate_answer(question, docs_agent)
+        docs_agent.cache_answer(question, "chatui", answer, search_result)
+    if answer is not None:
+        yield format_sse_event("token", {"text": answer["response"]})
+        yield format_sse_event("sources", summarize_sources(search_result))
+        yield format_sse_event(
+            "related_questions", {"html": answer["related_questions"]}
+        )
+    else:
+        search_result, final_context = retrieve_context(question, docs_agent)
+        response_parts = []
+        try:
+            for text in docs_agent.ask_content_model_with_context_prompt_stream(
+                context=final_context, question=question
+            ):
+                response_parts.append(text)
+                yield format_sse_event("token", {"text": text})
+        except Exception as e:
+            logging.error(f"Failed to stream the answer: {e}")
+            yield format_sse_event(
+                "error", {"message": docs_agent.config.conditions.model_error_message}
+            )
+            return
+        yield format_sse_event("sources", summarize_sources(search_result))
+        related_questions = ask_related_questions(docs_agent, final_context)
+        yield format_sse_event("related_questions", {"html": related_questions})
+        response = "".join(response_parts)
+        answer = {
+            "response": response,
+            "related_questions": related_questions,
+            "final_context": final_context,
+            "summary_response": "",
+            "aqa_response_in_html": "",
+            "probability": "None",
+            "log_lines": response,
+            "sources": encode_search_result(search_result),
+        }
+        docs_agent.cache_answer(question, "chatui", answer, search_result)
+    new_uuid = log_request(
+        docs_agent, question, answer, search_result, server_url, can_be_logged
     )
+    yield format_sse_event("done", {"uuid": str(new_uuid)})
 
 
 # Not fully implemented
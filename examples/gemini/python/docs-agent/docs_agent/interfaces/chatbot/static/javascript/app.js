@@ -29,7 +29,7 @@ if (askButton != null){
 // Display the "loading" message when a related question is clicked.
 let relatedQuestions = document.getElementById('suggested-questions');
 
-if (relatedQuestions != null){
+function addRelatedQuestionsListeners(){
   questions = relatedQuestions.getElementsByTagName('a');
   for(i=0; i<questions.length; i++){
     questions[i].addEventListener('click',function (){
@@ -40,6 +40,30 @@ if (relatedQuestions != null){
   }
 }
 
+if (relatedQuestions != null){
+  addRelatedQuestionsListeners();
+}
+
+// Load the related questions if they are generated after the answer.
+// The values of `urlRelatedQuestions` and `deferRelatedQuestions` are
+// specified in the html template, which is set by the Flask server.
+// See chatbot/templates/chatui/base.html
+if (relatedQuestions != null && typeof deferRelatedQuestions !== "undefined" && deferRelatedQuestions){
+  let uuidBox = document.getElementById('uuid-box');
+  if (uuidBox != null){
+    let xhr = new XMLHttpRequest();
+    xhr.open("GET", urlRelatedQuestions + "/" + encodeURIComponent(uuidBox.textContent.trim()), true);
+    xhr.setRequestHeader("Accept", "application/json");
+    xhr.onload = function (){
+      if (xhr.status == 200){
+        relatedQuestions.innerHTML = JSON.parse(xhr.responseText).html;
+        addRelatedQuestionsListeners();
+      }
+    };
+    xhr.send();
+  }
+}
+
 // Display the "aqa-box" div only if the aqa json response is included.
 let aqaContent = document.getElementById('aqa-content');
 let aqaBox = document.getElementById('aqa-box');
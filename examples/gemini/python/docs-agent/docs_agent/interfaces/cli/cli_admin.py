@@ -23,10 +23,14 @@ from docs_agent.utilities.helpers import resolve_path
 from docs_agent.preprocess import files_to_plain_text as chunker
 from docs_agent.preprocess import populate_vector_database as populate_script
 from docs_agent.benchmarks import run_benchmark_tests as benchmarks
+from docs_agent.benchmarks import vector_storage_benchmark
 from docs_agent.interfaces import chatbot as chatbot_flask
 from docs_agent.storage.google_semantic_retriever import SemanticRetriever
 from docs_agent.storage.rag import RAGFactory
 from docs_agent.storage.base import RAG
+from docs_agent.storage.embedding_cache import EmbeddingCache
+from docs_agent.storage.chroma import get_shared_client
+from docs_agent.storage.flat_index import VECTOR_DTYPES
 from docs_agent.memory.logging import write_logs_to_csv_file
 from docs_agent.interfaces.cli.cli_common import common_options
 from docs_agent.interfaces.cli.cli_common import show_config
@@ -49,13 +53,32 @@ def cli_admin(ctx, config_file, product):
 
 
 @cli_admin.command()
+@click.option(
+    "--jobs",
+    default=1,
+    show_default=True,
+    type=int,
+    help="Number of processes used to convert files in parallel.",
+)
+@click.option(
+    "--incremental",
+    is_flag=True,
+    help="Process only the files that have changed since the last run.",
+)
 @common_options
-def chunk(config_file: typing.Optional[str], product: list[str] = [""]):
+def chunk(
+    config_file: typing.Optional[str],
+    jobs: int = 1,
+    incremental: bool = False,
+    product: list[str] = [""],
+):
     """Convert files to plain text chunks."""
     loaded_config, product_config = return_config_and_product(
         config_file=config_file, product=product
     )
-    chunker.process_all_products(config_file=product_config)
+    chunker.process_all_products(
+        config_file=product_config, jobs=max(1, jobs), incremental=incremental
+    )
     click.echo("\nFiles are successfully converted into text chunks.")
 
 
@@ -65,10 +88,17 @@ def chunk(config_file: typing.Optional[str], product: list[str] = [""]):
     is_flag=True,
     help="Delete stale chunks in the existing databases.",
 )
+@click.option(
+    "--batch_size",
+    default=None,
+    type=int,
+    help="Number of text chunks to embed and add to the database in a single request.",
+)
 @common_options
 def populate(
     config_file: typing.Optional[str],
     enable_delete_chunks: bool = False,
+    batch_size: typing.Optional[int] = None,
     product: list[str] = [""],
 ):
     """Populate a vector database using text chunks."""
@@ -80,6 +110,10 @@ def populate(
     if enable_delete_chunks:
         for product in product_config.products:
             product.enable_delete_chunks = "True"
+    # If `--batch_size` is set, update the config object.
+    if batch_size is not None:
+        for product in product_config.products:
+            product.populate_batch_size = batch_size
 
     populate_script.process_all_products(config_file=product_config)
     for item in product_config.products:
@@ -172,6 +206,79 @@ def benchmark(
     benchmarks.run_benchmarks()
 
 
+@cli_admin.command()
+@click.option(
+    "--dimensions",
+    default=None,
+    type=int,
+    multiple=True,
+    help="Also measure embeddings truncated to this number of dimensions.",
+)
+@click.option(
+    "--queries",
+    default=100,
+    type=int,
+    help="The number of text chunks whose embeddings are used as questions.",
+)
+@click.option(
+    "--top_k",
+    default=10,
+    type=int,
+    help="The number of results of each search.",
+)
+@common_options
+def benchmark_vectors(
+    dimensions: tuple[int, ...],
+    queries: int,
+    top_k: int,
+    config_file: typing.Optional[str],
+    product: list[str] = [""],
+):
+    """Compare the memory, speed and recall of the ways to store embeddings."""
+    # Loads configurations from common options
+    loaded_config, product_config = return_config_and_product(
+        config_file=config_file, product=product
+    )
+    input_product = product_config.return_first()
+    chroma_db_conf = None
+    for db_conf in input_product.db_configs:
+        if db_conf.db_type == "chroma":
+            chroma_db_conf = db_conf
+    if chroma_db_conf is None:
+        click.echo("No Chroma database is specified in the config.yaml file.")
+        return
+    collection = get_shared_client(
+        resolve_path(chroma_db_conf.vector_db_dir)
+    ).get_collection(name=chroma_db_conf.collection_name)
+    embeddings = vector_storage_benchmark.read_collection_embeddings(collection)
+    click.echo(
+        f"Collection {collection.name}: {embeddings.shape[0]} embeddings "
+        f"of {embeddings.shape[1] if embeddings.size else 0} dimensions"
+    )
+    results = vector_storage_benchmark.run_vector_storage_benchmark(
+        embeddings,
+        dimensions=(None,) + tuple(dimensions),
+        vector_dtypes=VECTOR_DTYPES,
+        num_queries=queries,
+        top_k=top_k,
+        space=(collection.metadata or {}).get("hnsw:space", "l2"),
+    )
+    click.echo(
+        f"{'Dimensions':>10}  {'Type':>7}  {'Memory (MB)':>11}  "
+        f"{'Compression':>11}  {'Re-rank (MB)':>12}  {'Disk (MB)':>9}  "
+        f"{'Search (ms)':>11}  {'Recall@' + str(top_k):>9}"
+    )
+    for result in results:
+        click.echo(
+            f"{result['dimensions']:>10}  {result['vector_dtype']:>7}  "
+            f"{result['memory_bytes'] / 1e6:>11.2f}  "
+            f"{result['compression']:>10.1f}x  "
+            f"{result['rerank_bytes'] / 1e6:>12.2f}  "
+            f"{result['disk_bytes'] / 1e6:>9.2f}  {result['latency_ms']:>11.2f}  "
+            f"{result['recall']:>9.3f}"
+        )
+
+
 @cli_admin.command()
 @common_options
 def list_corpora(config_file: typing.Optional[str], product: list[str] = [""]):
@@ -373,6 +480,51 @@ def backup_chroma(
         click.echo(f"Can't backup chroma database specified: {input_chroma}")
 
 
+@cli_admin.command()
+@click.option(
+    "--max_entries",
+    default=None,
+    type=int,
+    help="Evict the least recently used embeddings beyond this number of entries.",
+)
+@click.option(
+    "--clear",
+    is_flag=True,
+    help="Delete all embeddings in the cache.",
+)
+@common_options
+def embedding_cache(
+    max_entries: typing.Optional[int],
+    clear: bool,
+    config_file: typing.Optional[str],
+    product: list[str] = [""],
+):
+    """Inspect and prune the embedding cache."""
+    # Loads configurations from common options
+    loaded_config, product_config = return_config_and_product(
+        config_file=config_file, product=product
+    )
+    input_product = product_config.return_first()
+    cache = EmbeddingCache.from_product_config(input_product)
+    if cache is None:
+        click.echo(
+            "The embedding cache is not enabled. Set `embedding_cache_path` in the config.yaml file."
+        )
+        return
+    click.echo(f"Embedding cache: {cache.path}")
+    if clear:
+        if click.confirm("Deleting all cached embeddings.\nDo you want to continue?", abort=True):
+            deleted_count = cache.clear()
+            click.echo(f"Deleted {deleted_count} embeddings.")
+    elif max_entries is not None:
+        evicted_count = cache.prune(max_entries=max_entries)
+        click.echo(f"Evicted {evicted_count} embeddings.")
+    for model, task_type, count in cache.stats():
+        click.echo(f"{model} ({task_type}): {count} embeddings")
+    click.echo(f"Total: {cache.count()} embeddings (max entries: {cache.max_entries})")
+    cache.close()
+
+
 @cli_admin.command()
 @click.option("--date", default="None")
 @common_options
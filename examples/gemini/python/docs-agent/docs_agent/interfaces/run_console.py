@@ -25,6 +25,7 @@ from rich.text import Text
 from rich.progress import Progress
 
 from docs_agent.agents.docs_agent import DocsAgent
+from docs_agent.memory.answer_cache import decode_search_result, encode_search_result
 from docs_agent.utilities.config import ConfigFile
 from docs_agent.storage.rag import return_collection_name
 from docs_agent.utilities.helpers import identify_file_type, open_file, open_image
@@ -57,6 +58,42 @@ def ask_model_for_help(question: str, context: str, product_configs: ConfigFile)
     ai_console.print(good_response)
 
 
+# Retrieve context from the local Chroma database and ask a Gemini model to
+# answer a question, reusing the answer to the same (or a very similar)
+# question if the answer cache is enabled and its sources have not changed.
+# Returns a tuple of (response, search_result).
+def ask_gemini_model_using_local_vector_store(
+    docs_agent: DocsAgent, question: str, results_num: int = 5
+):
+    answer = docs_agent.lookup_cached_answer(question, interface="tellme")
+    if answer is not None:
+        return answer["response"], decode_search_result(answer["sources"])
+    try:
+        search_result, final_context = docs_agent.rag.query_vector_store_to_build(
+            question=question,
+            token_limit=30000,
+            results_num=results_num,
+            max_sources=results_num,
+        )
+    except Exception as e:
+        logging.error(f"Error retrieving content from Chroma: {e}")
+        search_result = []
+        final_context = "Error: Could not retrieve context."
+    (
+        response,
+        full_prompt,
+    ) = docs_agent.ask_content_model_with_context_prompt(
+        context=final_context, question=question
+    )
+    docs_agent.cache_answer(
+        question,
+        "tellme",
+        {"response": response, "sources": encode_search_result(search_result)},
+        search_result,
+    )
+    return response, search_result
+
+
 # This function is used by the `tellme` command to ask the Gemini AQA model
 # a question from an online corpus.
 def ask_model(question: str, product_configs: ConfigFile, return_output: bool = False):
@@ -90,22 +127,8 @@ def ask_model(question: str, product_configs: ConfigFile, return_output: bool =
                 if not docs_agent.rag:
                     logging.error("No initialized Chroma collection.")
                 else:
-                    try:
-                        search_result, final_context = docs_agent.rag.query_vector_store_to_build(
-                            question=question,
-                            token_limit=30000,
-                            results_num=results_num,
-                            max_sources=results_num,
-                        )
-                    except Exception as e:
-                        logging.error(f"Error retrieving content from Chroma: {e}")
-                        search_result = []
-                        final_context = "Error: Could not retrieve context."
-                    (
-                        response,
-                        full_prompt,
-                    ) = docs_agent.ask_content_model_with_context_prompt(
-                        context=final_context, question=question
+                    (response, search_result) = ask_gemini_model_using_local_vector_store(
+                        docs_agent, question=question, results_num=results_num
                     )
                     if len(search_result) >= 1:
                         if search_result[0].section.url == "":
@@ -146,12 +169,25 @@ def ask_model(question: str, product_configs: ConfigFile, return_output: bool =
                         description=f"[turquoise4 bold]Asking Gemini (model: {product.models.language_model}, source: {return_collection_name(product_config=product)}) ",
                         total=None,
                     )
-                    (
-                        response,
-                        search_result,
-                    ) = docs_agent.ask_aqa_model_using_local_vector_store(
-                        question=question, results_num=results_num
-                    )
+                    # Reuse the answer to the same (or a very similar) question
+                    # if its sources have not changed since.
+                    answer = docs_agent.lookup_cached_answer(question, interface="tellme")
+                    if answer is not None:
+                        response = answer["response"]
+                        search_result = decode_search_result(answer["sources"])
+                    else:
+                        (
+                            response,
+                            search_result,
+                        ) = docs_agent.ask_aqa_model_using_local_vector_store(
+                            question=question, results_num=results_num
+                        )
+                        docs_agent.cache_answer(
+                            question,
+                            "tellme",
+                            {"response": response, "sources": encode_search_result(search_result)},
+                            search_result,
+                        )
                     if len(search_result) >= 1:
                         if search_result[0].section.url == "":
                             link = str(search_result[0].section)
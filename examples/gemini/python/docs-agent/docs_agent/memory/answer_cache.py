@@ -0,0 +1,355 @@
+#
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Semantic cache of answers keyed by question embeddings"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import typing
+
+from absl import logging
+import numpy as np
+
+from docs_agent.postprocess.docs_retriever import SectionDistance, SectionProbability
+from docs_agent.preprocess.splitters.markdown_splitter import Section
+from docs_agent.utilities.config import ProductConfig
+from docs_agent.utilities.helpers import resolve_path
+
+
+# The default minimum cosine similarity between a new question and a cached
+# question for the cached answer to be reused.
+DEFAULT_SIMILARITY_THRESHOLD = 0.97
+
+# The default maximum number of answers kept in the cache.
+DEFAULT_MAX_ENTRIES = 10000
+
+
+class AnswerCache:
+    """An on-disk cache of answers stored in a SQLite database.
+
+    Each entry stores a question, its embedding, the answer (a JSON object,
+    such as the response, the related questions and the sources) and the
+    `md_hash` of each source section. Entries are grouped by a `scope` (for
+    example, the product, the language model and the app mode), since an
+    answer is only valid for the settings that generated it.
+
+    A new question reuses the answer of the most similar cached question in
+    the same scope if their cosine similarity is at least
+    `similarity_threshold`. The embeddings of a scope are loaded into memory
+    on the first lookup, and entries added by other processes are loaded on
+    later lookups. When the cache holds more than `max_entries` answers, the
+    least recently used answers are evicted.
+
+    Attributes:
+        path (str): The path to the SQLite database.
+        similarity_threshold (float): The minimum cosine similarity.
+        max_entries (int): The maximum number of answers kept in the cache.
+        hits (int): The number of lookups that returned a cached answer.
+        misses (int): The number of lookups that did not.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        similarity_threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        self.path = resolve_path(path)
+        self.similarity_threshold = float(similarity_threshold)
+        self.max_entries = int(max_entries)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # For each scope: the last loaded rowid, the rowids and the matrix of
+        # normalized embeddings.
+        self.scopes = {}
+        parent_dir = os.path.dirname(self.path)
+        if parent_dir:
+            os.makedirs(parent_dir, exist_ok=True)
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self.connection:
+            self.connection.execute(
+                """CREATE TABLE IF NOT EXISTS answers (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    scope TEXT NOT NULL,
+                    question TEXT NOT NULL,
+                    embedding BLOB NOT NULL,
+                    answer TEXT NOT NULL,
+                    md_hashes TEXT NOT NULL,
+                    last_used REAL NOT NULL
+                )"""
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS answers_scope ON answers (scope, id)"
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS answers_last_used ON answers (last_used)"
+            )
+        logging.info(f"Opened the answer cache: {self.path}")
+
+    @staticmethod
+    def from_product_config(
+        product_config: ProductConfig,
+    ) -> typing.Optional["AnswerCache"]:
+        """Returns the answer cache configured for a product, if any."""
+        cache_path = getattr(product_config, "answer_cache_path", None)
+        if cache_path is None or cache_path == "":
+            return None
+        try:
+            return AnswerCache(
+                path=cache_path,
+                similarity_threshold=getattr(
+                    product_config,
+                    "answer_cache_similarity_threshold",
+                    DEFAULT_SIMILARITY_THRESHOLD,
+                ),
+                max_entries=getattr(
+                    product_config, "answer_cache_max_entries", DEFAULT_MAX_ENTRIES
+                ),
+            )
+        except sqlite3.Error as e:
+            logging.error(f"Cannot open the answer cache {cache_path}: {e}")
+            return None
+
+    def lookup(
+        self,
+        scope: str,
+        embedding: typing.List[float],
+        validate: typing.Optional[typing.Callable[[typing.List[str]], bool]] = None,
+    ) -> typing.Optional[dict]:
+        """Returns the cached answer of the most similar question, or None.
+
+        Args:
+            scope: The scope of the question.
+            embedding: The embedding of the question.
+            validate: An optional function that receives the `md_hash` of each
+              source section of a cached answer and returns False if any of
+              them changed. An answer that is not valid is deleted.
+        """
+        query = _normalize(embedding)
+        with self.lock:
+            self._load_scope(scope)
+            ids, matrix = self.scopes[scope][1], self.scopes[scope][2]
+            best_id = None
+            if len(ids) > 0 and matrix.shape[1] == query.shape[0]:
+                similarities = matrix @ query
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.similarity_threshold:
+                    best_id = ids[best]
+            row = None
+            if best_id is not None:
+                row = self.connection.execute(
+                    "SELECT answer, md_hashes FROM answers WHERE id = ?", (best_id,)
+                ).fetchone()
+                if row is None:
+                    # The answer was evicted or deleted by another process.
+                    self._drop_ids(scope, [best_id])
+        if row is not None:
+            answer = json.loads(row[0])
+            md_hashes = json.loads(row[1])
+            if validate is None or validate(md_hashes):
+                with self.lock:
+                    self.hits += 1
+                    with self.connection:
+                        self.connection.execute(
+                            "UPDATE answers SET last_used = ? WHERE id = ?",
+                            (time.time(), best_id),
+                        )
+                return answer
+            logging.info("Deleting a cached answer whose sources have changed.")
+            self.delete(scope, best_id)
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def store(
+        self,
+        scope: str,
+        question: str,
+        embedding: typing.List[float],
+        answer: dict,
+        md_hashes: typing.List[str],
+    ) -> None:
+        """Stores the answer to a question."""
+        vector = _normalize(embedding)
+        with self.lock:
+            with self.connection:
+                self.connection.execute(
+                    "INSERT INTO answers "
+                    "(scope, question, embedding, answer, md_hashes, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        scope,
+                        question,
+                        vector.astype(np.float32).tobytes(),
+                        json.dumps(answer),
+                        json.dumps(list(md_hashes)),
+                        time.time(),
+                    ),
+                )
+            self._evict(self.max_entries)
+
+    def delete(self, scope: str, entry_id: int) -> None:
+        with self.lock:
+            with self.connection:
+                self.connection.execute("DELETE FROM answers WHERE id = ?", (entry_id,))
+            self._drop_ids(scope, [entry_id])
+
+    def clear(self) -> int:
+        """Deletes all answers in the cache and returns their number."""
+        with self.lock:
+            with self.connection:
+                cursor = self.connection.execute("DELETE FROM answers")
+            self.scopes = {}
+            return cursor.rowcount
+
+    def count(self) -> int:
+        """Returns the total number of answers in the cache."""
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+
+    def stats(self) -> dict:
+        """Returns the counters of the cache for monitoring."""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def close(self) -> None:
+        with self.lock:
+            self.connection.close()
+
+    # Loads the embeddings of a scope that were added since the last load.
+    # The caller must hold `self.lock`.
+    def _load_scope(self, scope: str) -> None:
+        last_id, ids, matrix = self.scopes.get(scope, (0, [], np.zeros((0, 0))))
+        rows = self.connection.execute(
+            "SELECT id, embedding FROM answers WHERE scope = ? AND id > ? ORDER BY id",
+            (scope, last_id),
+        ).fetchall()
+        if rows:
+            new_matrix = np.stack(
+                [np.frombuffer(embedding, dtype=np.float32) for _, embedding in rows]
+            )
+            if len(ids) > 0 and matrix.shape[1] == new_matrix.shape[1]:
+                new_matrix = np.vstack([matrix, new_matrix])
+            else:
+                # The embedding model (and dimension) changed: keep new rows only.
+                ids = []
+            ids = ids + [entry_id for entry_id, _ in rows]
+            last_id = rows[-1][0]
+            matrix = new_matrix
+        self.scopes[scope] = (last_id, ids, matrix)
+
+    # Removes entries from the in-memory embeddings of a scope.
+    # The caller must hold `self.lock`.
+    def _drop_ids(self, scope: str, entry_ids: typing.List[int]) -> None:
+        if scope not in self.scopes:
+            return
+        last_id, ids, matrix = self.scopes[scope]
+        entry_ids = set(entry_ids)
+        keep = [index for index, entry_id in enumerate(ids) if entry_id not in entry_ids]
+        self.scopes[scope] = (last_id, [ids[index] for index in keep], matrix[keep])
+
+    # Deletes the least recently used answers so that at most `max_entries`
+    # remain. The caller must hold `self.lock`.
+    def _evict(self, max_entries: int) -> int:
+        total = self.connection.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        excess = total - max(0, max_entries)
+        if excess <= 0:
+            return 0
+        evicted_ids = [
+            row[0]
+            for row in self.connection.execute(
+                "SELECT id FROM answers ORDER BY last_used ASC LIMIT ?", (excess,)
+            ).fetchall()
+        ]
+        with self.connection:
+            self.connection.executemany(
+                "DELETE FROM answers WHERE id = ?", [(entry_id,) for entry_id in evicted_ids]
+            )
+        for scope in list(self.scopes):
+            self._drop_ids(scope, evicted_ids)
+        return len(evicted_ids)
+
+
+# Return a vector scaled to unit length, so that a dot product between two
+# vectors is their cosine similarity.
+def _normalize(embedding: typing.List[float]) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector = vector / norm
+    return vector
+
+
+# The attributes of a Section that are stored with a cached answer.
+section_attributes = (
+    "id",
+    "name_id",
+    "page_title",
+    "section_title",
+    "level",
+    "previous_id",
+    "parent_tree",
+    "token_count",
+    "content",
+    "url",
+    "origin_uuid",
+    "md_hash",
+    "uuid",
+)
+
+
+# Convert a list of SectionDistance or SectionProbability objects into a list
+# of JSON objects that can be stored with a cached answer.
+def encode_search_result(search_result: list) -> typing.List[dict]:
+    sources = []
+    for item in search_result:
+        source = {
+            "section": {
+                name: getattr(item.section, name, None) for name in section_attributes
+            }
+        }
+        if hasattr(item, "probability"):
+            source["probability"] = item.probability
+        else:
+            source["distance"] = getattr(item, "distance", None)
+        sources.append(source)
+    return sources
+
+
+# Convert the sources stored with a cached answer back into a list of
+# SectionDistance or SectionProbability objects.
+def decode_search_result(sources: typing.List[dict]) -> list:
+    search_result = []
+    for source in sources:
+        section = Section(**source["section"])
+        if "probability" in source:
+            search_result.append(
+                SectionProbability(section=section, probability=source["probability"])
+            )
+        else:
+            search_result.append(
+                SectionDistance(section=section, distance=source.get("distance"))
+            )
+    return search_result
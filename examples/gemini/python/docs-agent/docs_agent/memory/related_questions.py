@@ -0,0 +1,180 @@
+#
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Related questions generated in the background after an answer"""
+
+from collections import OrderedDict
+import concurrent.futures
+import hashlib
+import threading
+import typing
+
+from absl import logging
+
+from docs_agent.utilities.config import ProductConfig
+
+
+# The default maximum number of source sets whose related questions are kept.
+DEFAULT_MAX_ENTRIES = 1000
+
+# The number of threads that generate related questions.
+DEFAULT_MAX_WORKERS = 4
+
+
+# Return the key of the source set of an answer. Related questions are
+# generated from the context of the sources only, so answers with the same
+# sources share their related questions.
+def get_source_key(search_result, final_context: str = "") -> str:
+    md_hashes = sorted(
+        str(item.section.md_hash)
+        for item in search_result
+        if getattr(item.section, "md_hash", "")
+    )
+    if md_hashes:
+        source = "\n".join(md_hashes)
+    else:
+        source = final_context
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+# Return True if a generation failed or generated no related questions, in
+# which case the related questions are generated again.
+def is_failed(future: concurrent.futures.Future) -> bool:
+    if not future.done():
+        return False
+    return future.exception() is not None or not future.result()
+
+
+class RelatedQuestionsTasks:
+    """Generates related questions on a thread pool, keyed by request uuid.
+
+    The related questions of a source set are generated at most once at a
+    time and the results of the most recently used source sets are kept, so
+    the related questions of answers with the same sources are returned
+    immediately. Failed (or empty) results are not reused: the next request
+    with the same sources generates the related questions again.
+
+    Attributes:
+        max_entries (int): The maximum number of source sets (and requests)
+            whose related questions are kept.
+        hits (int): The number of requests that reused related questions.
+        misses (int): The number of requests that generated related questions.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+    ) -> None:
+        self.max_entries = int(max_entries)
+        self.lock = threading.Lock()
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="related-questions"
+        )
+        # Futures of the related questions, keyed by source key.
+        self.results = OrderedDict()
+        # Source keys, keyed by request uuid.
+        self.requests = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def from_product_config(
+        product_config: ProductConfig,
+    ) -> "RelatedQuestionsTasks":
+        """Returns the tasks shared by all products that use the same
+        maximum number of entries."""
+        max_entries = int(
+            getattr(
+                product_config,
+                "related_questions_cache_max_entries",
+                DEFAULT_MAX_ENTRIES,
+            )
+        )
+        with shared_tasks_lock:
+            if max_entries not in shared_tasks:
+                shared_tasks[max_entries] = RelatedQuestionsTasks(
+                    max_entries=max(1, max_entries)
+                )
+            return shared_tasks[max_entries]
+
+    def submit(
+        self,
+        request_id: str,
+        source_key: str,
+        generate: typing.Callable[[], str],
+    ) -> None:
+        """Starts generating the related questions of a request, unless the
+        related questions of its source set are cached or being generated."""
+        with self.lock:
+            future = self.results.get(source_key)
+            if future is not None and not is_failed(future):
+                self.hits += 1
+                self.results.move_to_end(source_key)
+            else:
+                self.misses += 1
+                self.results[source_key] = self.executor.submit(generate)
+            self.requests[str(request_id)] = source_key
+            self.requests.move_to_end(str(request_id))
+            while len(self.results) > self.max_entries:
+                self.results.popitem(last=False)
+            while len(self.requests) > self.max_entries:
+                self.requests.popitem(last=False)
+
+    def get(
+        self, request_id: str, timeout: typing.Optional[float] = None
+    ) -> typing.Optional[str]:
+        """Returns the related questions of a request.
+
+        Waits up to `timeout` seconds for the related questions to be
+        generated.
+
+        Returns:
+            The related questions, or None if the request is unknown (or was
+            evicted).
+
+        Raises:
+            TimeoutError: If the related questions are not ready in time.
+        """
+        with self.lock:
+            source_key = self.requests.get(str(request_id))
+            future = self.results.get(source_key) if source_key else None
+        if future is None:
+            return None
+        try:
+            return future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            raise TimeoutError(f"Related questions of {request_id} are not ready.")
+        except Exception as e:
+            logging.error(f"Failed to generate related questions: {e}")
+            return ""
+
+    def stats(self) -> dict:
+        """Returns the counters of the tasks for monitoring."""
+        with self.lock:
+            return {
+                "entries": len(self.results),
+                "requests": len(self.requests),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# Related questions tasks shared by all callers in this process, keyed by
+# max entries.
+shared_tasks = {}
+shared_tasks_lock = threading.Lock()
@@ -14,31 +14,52 @@
 # limitations under the License.
 #
 
+import threading
 import typing
 from absl import logging
-from docs_agent.models.base import AQAModel
+from docs_agent.models.base import AQAModel, AQAResponse
 import google.ai.generativelanguage as glm
 
 
+# Service clients shared by all AQA objects in this process, keyed by client
+# class. The clients are thread-safe and share their gRPC channels.
+shared_service_clients = {}
+shared_service_clients_lock = threading.Lock()
+
+
+def get_shared_service_client(client_class):
+    """Returns the service client of a class, creating it on first use."""
+    with shared_service_clients_lock:
+        if client_class not in shared_service_clients:
+            shared_service_clients[client_class] = client_class()
+        return shared_service_clients[client_class]
+
+
 class AQA(AQAModel):
     """
     An implementation of AQAModel using Google's Generative AI API.
     """
 
-    def __init__(self):
-        self.generative_service_client = glm.GenerativeServiceClient()
-        self.retriever_service_client = glm.RetrieverServiceClient()
-        self.permission_service_client = glm.PermissionServiceClient()
-        self.aqa_response_buffer: typing.Any = None
+    @property
+    def generative_service_client(self) -> glm.GenerativeServiceClient:
+        return get_shared_service_client(glm.GenerativeServiceClient)
+
+    @property
+    def retriever_service_client(self) -> glm.RetrieverServiceClient:
+        return get_shared_service_client(glm.RetrieverServiceClient)
+
+    @property
+    def permission_service_client(self) -> glm.PermissionServiceClient:
+        return get_shared_service_client(glm.PermissionServiceClient)
 
-    def generate_answer(
+    def answer_question(
         self,
         question: str,
         grounding_passages_texts: typing.List[str],
         answer_style: str,
-    ) -> typing.Tuple[str, typing.List[typing.Dict[str, typing.Any]]]:
+    ) -> AQAResponse:
         """
-        Generates an answer to a question using the provided grounding passages.
+        Answers a question using the provided grounding passages.
 
         Args:
             question (str): The question to answer.
@@ -46,7 +67,7 @@ class AQA(AQAModel):
             answer_style (str): The style of the answer (e.g., "ABSTRACTIVE", "EXTRACTIVE").
 
         Returns:
-            typing.Tuple[str, typing.List[typing.Dict[str, typing.Any]]]: A tuple containing the answer and a list of citations.
+            AQAResponse: The answer, a list of citations and the raw AQA response.
         """
         user_query_content = glm.Content(parts=[glm.Part(text=question)])
 
@@ -67,7 +88,6 @@ class AQA(AQAModel):
 
         try:
             aqa_response = self.generative_service_client.generate_answer(req)
-            self.aqa_response_buffer = aqa_response
 
             # Create the structured result
             result_list: typing.List[typing.Dict[str, typing.Any]] = []
@@ -85,18 +105,17 @@ class AQA(AQAModel):
                             "metadata": {},
                         }
                     )
-            return answer_text, result_list
+            return AQAResponse(answer_text, result_list, aqa_response)
 
         except Exception as e:
             logging.error(f"Error generating answer: {e}")
-            self.aqa_response_buffer = None
-            return "", []
+            return AQAResponse("", [])
 
-    def generate_answer_with_corpora(
+    def answer_question_with_corpora(
         self, question: str, corpus_name: str, answer_style: str
-    ) -> typing.Tuple[str, typing.List[typing.Dict[str, typing.Any]]]:
+    ) -> AQAResponse:
         """
-        Generates an answer to a question using the provided corpus.
+        Answers a question using the provided corpus.
 
         Args:
             question (str): The question to answer.
@@ -104,7 +123,7 @@ class AQA(AQAModel):
             answer_style (str): The style of the answer (e.g., "ABSTRACTIVE", "EXTRACTIVE").
 
         Returns:
-            typing.Tuple[str, typing.List[typing.Dict[str, typing.Any]]]: A tuple containing the answer and a list of citations.
+            AQAResponse: The answer, a list of citations and the raw AQA response.
         """
 
         user_question_content = glm.Content(
@@ -122,7 +141,6 @@ class AQA(AQAModel):
 
         try:
             aqa_response = self.generative_service_client.generate_answer(req)
-            self.aqa_response_buffer = aqa_response
 
             result_list: typing.List[typing.Dict[str, typing.Any]] = []
             try:
@@ -142,21 +160,11 @@ class AQA(AQAModel):
                         }
                     )
 
-            return answer_text, result_list
+            return AQAResponse(answer_text, result_list, aqa_response)
 
         except Exception as e:
-            logging.error(f"Error in generate_answer_with_corpora: {e}")
-            self.aqa_response_buffer = None
-            return "", []
-
-    def get_saved_aqa_response_json(self) -> typing.Any:
-        """
-        Returns the raw AQA response from the last call to generate_answer or generate_answer_with_corpora.
-
-        Returns:
-            typing.Any: The raw AQA response, or None if no response has been saved.
-        """
-        return self.aqa_response_buffer
+            logging.error(f"Error in answer_question_with_corpora: {e}")
+            return AQAResponse("", [])
 
     def query_corpus(self, user_query: str, corpus_name: str, results_count: int) -> typing.Any:
         """
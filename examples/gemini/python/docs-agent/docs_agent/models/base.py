@@ -26,6 +26,15 @@ class GenerativeLanguageModel(abc.ABC):
         """Generates content."""
         pass
 
+    def generate_content_stream(
+        self, contents, log_level="NORMAL"
+    ) -> typing.Iterator[str]:
+        """Generates content and yields its text as it is generated.
+
+        Models that cannot stream yield the full response at once.
+        """
+        yield self.generate_content(contents, log_level=log_level)
+
     @abc.abstractmethod
     async def generate_content_async(
         self,
@@ -45,7 +54,13 @@ class GenerativeLanguageModel(abc.ABC):
         pass
 
     @abc.abstractmethod
-    def embed(self, content, task_type="RETRIEVAL_QUERY", title=None):
+    def embed(
+        self,
+        content,
+        task_type="RETRIEVAL_QUERY",
+        title=None,
+        output_dimensionality=None,
+    ):
         """Embeds content."""
         pass
 
@@ -64,10 +79,77 @@ class GenerativeLanguageModel(abc.ABC):
         pass
 
 
+class AQAResponse(typing.NamedTuple):
+    """The answer of an AQA model to a single request.
+
+    Attributes:
+        answer_text: The answer text ("" if the model failed to answer).
+        results: A list of dictionaries, where each dictionary represents a
+          relevant section and contains its metadata and a probability score.
+        raw_response: The raw response of the model (the AQA model's JSON
+          response), or None if the request failed.
+    """
+
+    answer_text: str
+    results: typing.List[typing.Dict[str, typing.Any]]
+    raw_response: typing.Any = None
+
+    @property
+    def answerable_probability(self) -> float:
+        """The probability that the question is answerable (0.0 if unknown)."""
+        try:
+            return self.raw_response.answerable_probability
+        except AttributeError:
+            return 0.0
+
+    @property
+    def grounding_attributions(self) -> typing.List[typing.Any]:
+        """The grounding attributions of the answer."""
+        try:
+            return list(self.raw_response.answer.grounding_attributions)
+        except AttributeError:
+            return []
+
+
 class AQAModel(abc.ABC):
-    """Abstract base class for AQA models."""
+    """Abstract base class for AQA models.
+
+    AQA models return all the data of a request as values and keep no state
+    between requests, so a model can be used by multiple threads at once.
+    """
+
+    @abc.abstractmethod
+    def answer_question(
+        self, question: str, grounding_passages: typing.List[str], answer_style: str
+    ) -> AQAResponse:
+        """Answers a question given grounding passages.
+
+        Args:
+            question: The user's question.
+            grounding_passages: A list of strings, each representing a passage.
+            answer_style:  The desired answer style (e.g., "VERBOSE").
+
+        Returns:
+            The answer text, the relevant sections and the raw response.
+        """
+        pass
 
     @abc.abstractmethod
+    def answer_question_with_corpora(
+        self, question: str, corpus_name: str, answer_style: str
+    ) -> AQAResponse:
+        """Answers a question using a specified corpus.
+
+        Args:
+            question: The user's question.
+            corpus_name: The name of the corpus to use.
+            answer_style: The desired answer style.
+
+        Returns:
+            The answer text, the relevant sections and the raw response.
+        """
+        pass
+
     def generate_answer(
         self, question: str, grounding_passages: typing.List[str], answer_style: str
     ) -> typing.Tuple[str, typing.List[typing.Dict[str, typing.Any]]]:
@@ -84,9 +166,9 @@ class AQAModel(abc.ABC):
             - A list of dictionaries, where each dictionary represents a relevant
               section and contains its metadata and a probability score.
         """
-        pass
+        response = self.answer_question(question, grounding_passages, answer_style)
+        return response.answer_text, response.results
 
-    @abc.abstractmethod
     def generate_answer_with_corpora(
         self, question: str, corpus_name: str, answer_style: str
     ) -> typing.Tuple[str, typing.List[typing.Dict[str, typing.Any]]]:
@@ -102,11 +184,10 @@ class AQAModel(abc.ABC):
             - The answer text (string)
             - A list of dictionaries, where each dictionary contains section data and probability.
         """
-
-    @abc.abstractmethod
-    def get_saved_aqa_response_json(self) -> typing.Any:
-        """Retrieves and returns any buffered AQA response."""
-        pass
+        response = self.answer_question_with_corpora(
+            question, corpus_name, answer_style
+        )
+        return response.answer_text, response.results
 
     @abc.abstractmethod
     def query_corpus(
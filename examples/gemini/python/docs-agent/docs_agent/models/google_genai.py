@@ -15,17 +15,21 @@
 #
 
 """Rate limited Gemini wrapper"""
+import asyncio
+import concurrent.futures
 import typing
 from typing import Any, Dict, List, cast
 import time
 import os
 import mimetypes
+import threading
 from PIL import Image
 from io import BytesIO
 
 from absl import logging
 
 from google import genai
+from google.genai import errors as genai_errors
 from google.genai import types
 
 from ratelimit import limits
@@ -36,6 +40,7 @@ from docs_agent.utilities.config import Conditions
 from docs_agent.utilities.helpers import open_image
 
 from docs_agent.models.base import GenerativeLanguageModel
+from docs_agent.models.rate_limiter import estimate_tokens, get_shared_limiter
 
 
 class Error(Exception):
@@ -64,16 +69,43 @@ class GoogleUnsupportedModelError(Error, RuntimeError):
         )
 
 
+# Clients shared by all Gemini objects in this process, keyed by API key and
+# API endpoint, so that they share their HTTP connection pools.
+shared_clients = {}
+shared_clients_lock = threading.Lock()
+
+
+def get_shared_client(
+    api_key: typing.Optional[str], api_endpoint: typing.Optional[str] = None
+) -> genai.Client:
+    """Returns the client shared by all callers that use the same API key and
+    API endpoint, creating it on first use."""
+    key = (api_key, api_endpoint)
+    with shared_clients_lock:
+        if key not in shared_clients:
+            shared_clients[key] = genai.Client(api_key=api_key)
+            logging.info(f"Created Gemini client for API endpoint: {api_endpoint}")
+        return shared_clients[key]
+
+
 class Gemini(GenerativeLanguageModel):
     """
     A wrapper for the Google Gemini model.
     """
 
     minute = 60
-    # 1400 calls per minute for embedding text-embedding-004 and embedding-001
-    # Use half to avoid hitting the limit
-    max_embed_per_minute = 130
     max_text_per_minute = 30
+    # The maximum number of inputs accepted by a single embedding request.
+    max_embed_batch_size = 100
+    # Embedding requests rejected with a 429 error are retried with an
+    # exponential backoff, starting at `embed_retry_delay` seconds.
+    max_embed_retries = 5
+    embed_retry_delay = 2
+    supported_embed_models = (
+        "embedding-001",
+        "text-embedding-004",
+        "gemini-embedding-exp-03-07",
+    )
 
     def __init__(
         self,
@@ -98,6 +130,16 @@ class Gemini(GenerativeLanguageModel):
         self.language_model = models_config.language_model
         self.embedding_api_call_limit = models_config.embedding_api_call_limit
         self.embedding_api_call_period = models_config.embedding_api_call_period
+        self.embedding_max_concurrency = models_config.embedding_max_concurrency
+        self.embedding_tokens_per_minute = models_config.embedding_tokens_per_minute
+        # The embedding rate limits are shared by all Gemini objects (and
+        # threads) in this process that use the same embedding model.
+        self.embed_limiter = get_shared_limiter(
+            name=f"{self.api_endpoint}/{self.embed_model}",
+            requests_per_period=self.embedding_api_call_limit,
+            period=self.embedding_api_call_period,
+            tokens_per_minute=self.embedding_tokens_per_minute,
+        )
         self.response_type = models_config.response_type
         self.response_schema = models_config.response_schema
         self.safety_settings = [
@@ -113,34 +155,215 @@ class Gemini(GenerativeLanguageModel):
                 response_modalities=["Text", "Image"],
                 safety_settings=self.safety_settings,
             )
-        # Configure the model
-        self.client = genai.Client(api_key=self.api_key)
-        logging.info(f"Created Gemini client for model: {self.language_model}")
+        # The client is created (or shared) when the model is first used.
+        self._client = None
+
+    @property
+    def client(self) -> genai.Client:
+        """The client of the API endpoint, shared with the other Gemini
+        objects that use the same API key."""
+        if self._client is None:
+            self._client = get_shared_client(self.api_key, self.api_endpoint)
+        return self._client
+
+    @client.setter
+    def client(self, client: genai.Client) -> None:
+        self._client = client
 
-    @sleep_and_retry
-    @limits(calls=max_embed_per_minute, period=minute)
     def embed(
         self,
         content,
         task_type: str = "RETRIEVAL_QUERY",
         title: typing.Optional[str] = None,
-    ) -> List[float]:
-        if (
-            self.embed_model == "embedding-001"
-            or self.embed_model == "text-embedding-004"
-            or self.embed_model == "gemini-embedding-exp-03-07"
-        ):
-            return [
-                self.client.models.embed_content(
-                    model=self.embed_model,
-                    contents=content,
-                    config=types.EmbedContentConfig(task_type=task_type, title=title),
+        max_concurrency: typing.Optional[int] = None,
+        output_dimensionality: typing.Optional[int] = None,
+    ) -> List[List[float]]:
+        """Embeds a single input or a list of inputs.
+
+        Inputs longer than `max_embed_batch_size` are split into sub-batches,
+        which are sent sequentially or, when `max_concurrency` is greater
+        than 1, concurrently using `embed_async`.
+
+        Args:
+            content: A string or a list of strings to embed.
+            task_type: The task type of the embeddings.
+            title: An optional title for the content.
+            max_concurrency: The maximum number of sub-batches to send at the
+              same time. Defaults to `embedding_max_concurrency` in the config.
+            output_dimensionality: An optional reduced dimension of the
+              embeddings.
+
+        Returns:
+            A list containing exactly one embedding per input, in the same
+            order as the inputs.
+        """
+        batches = self._split_embed_batches(content)
+        if max_concurrency is None:
+            max_concurrency = self.embedding_max_concurrency
+        if max(1, int(max_concurrency)) == 1 or len(batches) <= 1:
+            results = [
+                self._embed_batch(
+                    batch,
+                    task_type=task_type,
+                    title=title,
+                    output_dimensionality=output_dimensionality,
                 )
-                .embeddings[0]
-                .values
+                for batch in batches
             ]
-        else:
+            return [embedding for result in results for embedding in result]
+        coroutine = self.embed_async(
+            [text for batch in batches for text in batch],
+            task_type=task_type,
+            title=title,
+            max_concurrency=max_concurrency,
+            output_dimensionality=output_dimensionality,
+        )
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coroutine)
+        # An event loop is already running in this thread, so run the
+        # embedding requests in their own event loop in another thread.
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coroutine).result()
+
+    async def embed_async(
+        self,
+        content,
+        task_type: str = "RETRIEVAL_QUERY",
+        title: typing.Optional[str] = None,
+        max_concurrency: typing.Optional[int] = None,
+        output_dimensionality: typing.Optional[int] = None,
+    ) -> List[List[float]]:
+        """Embeds a single input or a list of inputs asynchronously.
+
+        The inputs are split into sub-batches of up to `max_embed_batch_size`
+        inputs, and at most `max_concurrency` sub-batches are in flight at the
+        same time. Each request waits for the shared rate limiter.
+
+        Args:
+            content: A string or a list of strings to embed.
+            task_type: The task type of the embeddings.
+            title: An optional title for the content.
+            max_concurrency: The maximum number of requests in flight.
+              Defaults to `embedding_max_concurrency` in the config.
+            output_dimensionality: An optional reduced dimension of the
+              embeddings.
+
+        Returns:
+            A list containing exactly one embedding per input, in the same
+            order as the inputs.
+        """
+        batches = self._split_embed_batches(content)
+        if max_concurrency is None:
+            max_concurrency = self.embedding_max_concurrency
+        semaphore = asyncio.Semaphore(max(1, int(max_concurrency)))
+
+        async def embed_a_batch(batch):
+            async with semaphore:
+                return await self._embed_batch_async(
+                    batch,
+                    task_type=task_type,
+                    title=title,
+                    output_dimensionality=output_dimensionality,
+                )
+
+        # `asyncio.gather` returns results in the order of the batches.
+        results = await asyncio.gather(*(embed_a_batch(batch) for batch in batches))
+        return [embedding for result in results for embedding in result]
+
+    def _split_embed_batches(self, content) -> List[List[str]]:
+        """Splits the inputs of `embed` into sub-batches for single requests."""
+        if self.embed_model not in self.supported_embed_models:
             raise GoogleUnsupportedModelError(self.embed_model, self.api_endpoint)
+        if isinstance(content, str):
+            content = [content]
+        else:
+            content = list(content)
+        return [
+            content[i : i + self.max_embed_batch_size]
+            for i in range(0, len(content), self.max_embed_batch_size)
+        ]
+
+    def _get_embed_retry_delay(self, error: Exception, attempt: int) -> float:
+        """Returns the delay before retrying a request rejected with a 429
+        error, or raises the error if it cannot be retried."""
+        is_rate_limited = isinstance(error, genai_errors.APIError) and (
+            error.code == 429 or error.status == "RESOURCE_EXHAUSTED"
+        )
+        if not is_rate_limited or attempt >= self.max_embed_retries:
+            raise error
+        delay = self.embed_retry_delay * (2**attempt)
+        logging.warning(
+            f"Embedding request is rate limited, retrying in {delay} seconds: {error}"
+        )
+        # Pause all users of the limiter, not only this request.
+        self.embed_limiter.pause(delay)
+        return delay
+
+    def _get_embeddings(self, response, batch: List[str]) -> List[List[float]]:
+        """Returns the embeddings in a response to a request for `batch`."""
+        if response.embeddings is None or len(response.embeddings) != len(batch):
+            raise Error(
+                f"Expected {len(batch)} embeddings from {self.embed_model}, "
+                f"but received {len(response.embeddings or [])}"
+            )
+        return [embedding.values for embedding in response.embeddings]
+
+    def _embed_batch(
+        self,
+        batch: List[str],
+        task_type: str = "RETRIEVAL_QUERY",
+        title: typing.Optional[str] = None,
+        output_dimensionality: typing.Optional[int] = None,
+    ) -> List[List[float]]:
+        """Embeds a list of at most `max_embed_batch_size` inputs in one request."""
+        tokens = estimate_tokens(batch)
+        attempt = 0
+        while True:
+            self.embed_limiter.acquire(tokens)
+            try:
+                response = self.client.models.embed_content(
+                    model=self.embed_model,
+                    contents=batch,
+                    config=types.EmbedContentConfig(
+                        task_type=task_type,
+                        title=title,
+                        output_dimensionality=output_dimensionality,
+                    ),
+                )
+                return self._get_embeddings(response, batch)
+            except genai_errors.APIError as error:
+                time.sleep(self._get_embed_retry_delay(error, attempt))
+                attempt += 1
+
+    async def _embed_batch_async(
+        self,
+        batch: List[str],
+        task_type: str = "RETRIEVAL_QUERY",
+        title: typing.Optional[str] = None,
+        output_dimensionality: typing.Optional[int] = None,
+    ) -> List[List[float]]:
+        """Embeds a list of at most `max_embed_batch_size` inputs in one
+        asynchronous request."""
+        tokens = estimate_tokens(batch)
+        attempt = 0
+        while True:
+            await self.embed_limiter.acquire_async(tokens)
+            try:
+                response = await self.client.aio.models.embed_content(
+                    model=self.embed_model,
+                    contents=batch,
+                    config=types.EmbedContentConfig(
+                        task_type=task_type,
+                        title=title,
+                        output_dimensionality=output_dimensionality,
+                    ),
+                )
+                return self._get_embeddings(response, batch)
+            except genai_errors.APIError as error:
+                await asyncio.sleep(self._get_embed_retry_delay(error, attempt))
+                attempt += 1
 
     @sleep_and_retry
     @limits(calls=max_text_per_minute, period=minute)
@@ -189,6 +412,65 @@ class Gemini(GenerativeLanguageModel):
         except:
             return self.model_error_message
 
+    @sleep_and_retry
+    @limits(calls=max_text_per_minute, period=minute)
+    def generate_content_stream(
+        self,
+        contents,
+        log_level: typing.Optional[str] = "NORMAL",
+    ) -> typing.Iterator[str]:
+        """
+        Generates content using the Gemini model and yields the text of each
+        chunk of the response as soon as it is received.
+
+        Args:
+            contents: The content to generate from.
+            log_level: The level of logging.
+
+        Returns:
+            An iterator over the text of the response. If the request fails
+            before any text is received, the error message is yielded.
+
+        Raises:
+            Exception: The error of a request that fails after some text is
+              received, so that a partial response is not taken as complete.
+        """
+        if self.language_model is None:
+            raise GoogleUnsupportedModelError(self.language_model, self.api_endpoint)
+        if self.language_model.startswith("gemini-2.0-flash-exp-image-generation"):
+            # Images are not streamed.
+            return iter([self.generate_content(contents, log_level=log_level)])
+        return self._stream_text(contents, log_level)
+
+    # Yield the text parts of a streamed response. The request is sent when
+    # the first chunk is requested. An error after some text is re-raised.
+    def _stream_text(self, contents, log_level) -> typing.Iterator[str]:
+        has_text = False
+        try:
+            for chunk in self.client.models.generate_content_stream(
+                model=self.language_model,
+                contents=contents,
+                config=self.config,
+            ):
+                if log_level == "VERBOSE" or log_level == "DEBUG":
+                    print("[Response chunk JSON]")
+                    print(chunk)
+                    print()
+                if not chunk.candidates or chunk.candidates[0].content is None:
+                    continue
+                for part in chunk.candidates[0].content.parts or []:
+                    if part.text:
+                        has_text = True
+                        yield part.text
+        except Exception as e:
+            logging.error(f"Gemini: generate_content_stream failed: {e}")
+            if has_text:
+                raise
+            yield self.model_error_message
+            return
+        if not has_text:
+            yield self.model_error_message
+
     async def generate_content_async(
         self,
         contents: typing.List[typing.Dict[str, typing.Any]],
@@ -0,0 +1,155 @@
+#
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Token bucket rate limiter shared across threads and event loops"""
+
+import asyncio
+import threading
+import time
+import typing
+
+
+# Per the docs 4 characters ~= 1 token
+chars_per_token = 4
+
+
+# Estimate the number of tokens in a list of texts.
+def estimate_tokens(texts: typing.Iterable[str]) -> int:
+    return sum(len(text) for text in texts) // chars_per_token + 1
+
+
+class TokenBucketLimiter:
+    """Limits the rate of requests and tokens sent to an API.
+
+    Requests and tokens are drawn from two buckets that refill continuously:
+    `requests_per_period` requests every `period` seconds and
+    `tokens_per_minute` tokens every 60 seconds (if set). A limiter can be
+    shared by any number of threads and event loops, since its state is only
+    held under a lock while the buckets are updated, never while waiting.
+
+    Attributes:
+        requests_per_period (int): The maximum number of requests per period.
+        period (float): The length of the period in seconds.
+        tokens_per_minute (int): The maximum number of tokens per minute,
+          or None for no limit on tokens.
+    """
+
+    def __init__(
+        self,
+        requests_per_period: int,
+        period: float = 60,
+        tokens_per_minute: typing.Optional[int] = None,
+    ):
+        self.requests_per_period = max(1, int(requests_per_period))
+        self.period = float(period)
+        self.tokens_per_minute = (
+            None if tokens_per_minute is None else max(1, int(tokens_per_minute))
+        )
+        self.lock = threading.Lock()
+        self.available_requests = float(self.requests_per_period)
+        self.available_tokens = float(self.tokens_per_minute or 0)
+        self.paused_until = 0.0
+        self.last_refill = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.last_refill
+        self.last_refill = now
+        self.available_requests = min(
+            float(self.requests_per_period),
+            self.available_requests
+            + elapsed * self.requests_per_period / self.period,
+        )
+        if self.tokens_per_minute is not None:
+            self.available_tokens = min(
+                float(self.tokens_per_minute),
+                self.available_tokens + elapsed * self.tokens_per_minute / 60,
+            )
+
+    def try_acquire(self, tokens: int = 0) -> float:
+        """Takes one request and `tokens` tokens from the buckets if available.
+
+        Returns:
+            0 if the request can be sent now, or the number of seconds to wait
+            before trying again.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now < self.paused_until:
+                return self.paused_until - now
+            wait = 0.0
+            if self.available_requests < 1:
+                wait = (1 - self.available_requests) * self.period / self.requests_per_period
+            if self.tokens_per_minute is not None:
+                # A request larger than the bucket waits for a full bucket.
+                tokens = min(tokens, self.tokens_per_minute)
+                if self.available_tokens < tokens:
+                    wait = max(
+                        wait,
+                        (tokens - self.available_tokens) * 60 / self.tokens_per_minute,
+                    )
+            if wait > 0:
+                return wait
+            self.available_requests -= 1
+            if self.tokens_per_minute is not None:
+                self.available_tokens -= tokens
+            return 0.0
+
+    def acquire(self, tokens: int = 0) -> None:
+        """Blocks the current thread until a request can be sent."""
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: int = 0) -> None:
+        """Waits, without blocking the event loop, until a request can be sent."""
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Stops all users of the limiter from sending requests for `seconds`
+        (for example, after the API responds with a 429 error)."""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+# Limiters shared by all callers in this process, keyed by name and limits.
+shared_limiters = {}
+shared_limiters_lock = threading.Lock()
+
+
+def get_shared_limiter(
+    name: str,
+    requests_per_period: int,
+    period: float = 60,
+    tokens_per_minute: typing.Optional[int] = None,
+) -> TokenBucketLimiter:
+    """Returns the limiter shared by all callers that use the same name
+    (for example, an embedding model) and limits."""
+    key = (name, int(requests_per_period), float(period), tokens_per_minute)
+    with shared_limiters_lock:
+        if key not in shared_limiters:
+            shared_limiters[key] = TokenBucketLimiter(
+                requests_per_period=requests_per_period,
+                period=period,
+                tokens_per_minute=tokens_per_minute,
+            )
+        return shared_limiters[key]
@@ -16,6 +16,7 @@
 # from markdown import markdown
 # from bs4 import BeautifulSoup
 # import re, os
+import copy
 import typing
 from docs_agent.models import tokenCount
 from docs_agent.preprocess.splitters.markdown_splitter import Section as Section
@@ -48,6 +49,8 @@ class SectionProbability:
 class FullPage:
     def __init__(self, section_list: list[Section]):
         self.section_list = section_list
+        # Lookup tables built on the first lookup (see buildIndex)
+        self._index = None
 
     def __str__(self):
         return f"This is a page with the following content:\n"
@@ -62,51 +65,76 @@ class FullPage:
             total_token_count += item.token_count
         return final_page, total_token_count
 
+    # Builds the lookup tables of the page in a single pass: the sections by
+    # id, the children of each section (by the id of their direct parent) and
+    # the sections that share a parent_tree (siblings). The tables are built
+    # again only if section_list is replaced or changes size.
+    def buildIndex(self):
+        index_key = (id(self.section_list), len(self.section_list))
+        if self._index is not None and self._index[0] == index_key:
+            return self._index[1]
+        sections_by_id = {}
+        children_by_parent = {}
+        sections_by_parent_tree = {}
+        for item in self.section_list:
+            if item is None:
+                continue
+            sections_by_id.setdefault(item.id, item)
+            try:
+                parent_tree = item.returnParentTree()
+            except (TypeError, ValueError):
+                print(f"Could not parse the parent tree of the section with the ID {item.id}")
+                continue
+            direct_parent = parent_tree[-1] if parent_tree else 0
+            children_by_parent.setdefault(direct_parent, []).append(item)
+            sections_by_parent_tree.setdefault(parent_tree, []).append(item)
+        index = (sections_by_id, children_by_parent, sections_by_parent_tree)
+        self._index = (index_key, index)
+        return index
+
+    # Returns the Section that matches a section_id, or None
+    def findSection(self, section_id):
+        sections_by_id, _, _ = self.buildIndex()
+        try:
+            return sections_by_id.get(section_id, None)
+        except TypeError:
+            return None
+
     # Given a page, returns only the section that matches the provided id
     # Also adds a preamble (which can be customized)
     def returnSelfSection(self, section_id):
         # Adds initial section from match
-        for item in self.section_list:
-            try:
-                if section_id == item.id:
-                    # Updates the content of a section on the fly with a template
-                    item.updateContentTemplate()
-                    return item
-            except:
-                print(f"Could not find a section with the provided ID {section_id}")
+        item = self.findSection(section_id)
+        if item is not None:
+            # Updates the content of a section on the fly with a template
+            item.updateContentTemplate()
+        return item
 
     # Returns all of the children for a given section_id. Any section that
     # are under the given header. For example, if the provided section_id is
     # a ##, provide all ### directly under it
     # Specify a token_limit to limit amount of sections returned
     def returnChildrenSections(self, section_id, token_limit: float = float("inf")):
-        # Finds the Section given a section_id
-        match = False
         updated_list = []
-        for item in self.section_list:
-            if section_id == item.id:
-                given_section = item
-                match = True
-                break
+        # Finds the Section given a section_id
+        given_section = self.findSection(section_id)
         # If Section doesn't match, just return a FullPage with a blank list
-        if not match:
+        if given_section is None:
             print(f"Could not find a section with the provided ID {section_id}")
             return FullPage(section_list=updated_list)
+        _, children_by_parent, _ = self.buildIndex()
         # Start token count at 0
         curr_token = 0
-        # updated_list = []
-        for item in self.section_list:
-            direct_parent = item.returnDirectParentId()
-            if int(direct_parent) == int(given_section.id):
-                if (curr_token + item.token_count) < token_limit:
-                    curr_token += item.token_count
-                    # Updates the content of a section on the fly with a template
-                    item.updateContentTemplate()
-                    # Estimate token count for preamble and add it to curr_token
-                    item.token_count = tokenCount.returnHighestTokens(item.content)
-                    curr_token += item.token_count
-                    # Append each Section to a new list to return
-                    updated_list.append(item)
+        for item in children_by_parent.get(int(given_section.id), []):
+            if (curr_token + item.token_count) < token_limit:
+                curr_token += item.token_count
+                # Updates the content of a section on the fly with a template
+                item.updateContentTemplate()
+                # Estimate token count for preamble and add it to curr_token
+                item.token_count = tokenCount.returnHighestTokens(item.content)
+                curr_token += item.token_count
+                # Append each Section to a new list to return
+                updated_list.append(item)
         updated_page = FullPage(section_list=updated_list)
         # You can view token count by doing sum of all Section.token_count
         return updated_page
@@ -114,39 +142,30 @@ class FullPage:
     # Returns all of the siblings for a given section_id. Any section that
     # has the same parent_tree
     def returnSiblingSections(self, section_id, token_limit: float = float("inf")):
-        # Finds the Section given a section_id
-        match = False
         updated_list = []
-        for item in self.section_list:
-            if section_id == item.id:
-                given_section = item
-                match = True
-                # Break out of loop once a match is found
-                break
+        # Finds the Section given a section_id
+        given_section = self.findSection(section_id)
         # If Section doesn't match, just return a FullPage with a blank list
-        if not match:
+        if given_section is None:
             print(f"Could not find a section with the provided ID {section_id}")
             return FullPage(section_list=updated_list)
+        _, _, sections_by_parent_tree = self.buildIndex()
         # Start token count at 0
         curr_token = 0
-        # updated_list = []
-        given_parent_tree = eval(given_section.parent_tree)
-        for item in self.section_list:
-            direct_parent = item.returnDirectParentId()
-            # Matches parent_tree and skips the same section
-            if (
-                given_parent_tree == eval(item.parent_tree)
-                and given_section.id != item.id
-            ):
-                if (curr_token + item.token_count) < token_limit:
-                    curr_token += item.token_count
-                    # Updates the content of a section on the fly with a template
-                    item.updateContentTemplate()
-                    # Estimate token count for preamble and add it to curr_token
-                    item.token_count = tokenCount.returnHighestTokens(item.content)
-                    curr_token += item.token_count
-                    # Append each Section to a new list to return
-                    updated_list.append(item)
+        given_parent_tree = given_section.returnParentTree()
+        for item in sections_by_parent_tree.get(given_parent_tree, []):
+            # Skips the same section
+            if given_section.id == item.id:
+                continue
+            if (curr_token + item.token_count) < token_limit:
+                curr_token += item.token_count
+                # Updates the content of a section on the fly with a template
+                item.updateContentTemplate()
+                # Estimate token count for preamble and add it to curr_token
+                item.token_count = tokenCount.returnHighestTokens(item.content)
+                curr_token += item.token_count
+                # Append each Section to a new list to return
+                updated_list.append(item)
         updated_page = FullPage(section_list=updated_list)
         # You can view token count by doing sum of all Section.token_count
         return updated_page
@@ -155,34 +174,22 @@ class FullPage:
     # If updated_page contains no parents, return []
     def returnParentSection(self, section_id, token_limit: float = float("inf")):
         # Finds the Section given a section_id
-        match = False
-        updated_list = []
-        for item in self.section_list:
-            if section_id == item.id:
-                given_section = item
-                match = True
-                # Break out of loop once a match is found
-                given_parent = given_section.returnDirectParentId()
-                break
+        given_section = self.findSection(section_id)
         # If Section doesn't match, just return a FullPage with a blank list
-        if not match:
+        if given_section is None:
             print(f"Could not find a section with the provided ID {section_id}")
             return None
-        # Start token count at 0
-        curr_token = 0
-        # updated_list = []
-        for item in self.section_list:
-            direct_parent = item.returnDirectParentId()
-            if int(given_parent) == int(item.id) and given_parent != 0:
-                if (curr_token + item.token_count) < token_limit:
-                    curr_token += item.token_count
-                    # Updates the content of a section on the fly with a template
-                    item.updateContentTemplate()
-                    # Estimate token count for preamble and add it to curr_token
-                    item.token_count = tokenCount.returnHighestTokens(item.content)
-                    curr_token += item.token_count
-                    # A section only can only have a single item
-                    return item
+        given_parent = given_section.returnDirectParentId()
+        if given_parent == 0:
+            return None
+        item = self.findSection(int(given_parent))
+        if item is not None and item.token_count < token_limit:
+            # Updates the content of a section on the fly with a template
+            item.updateContentTemplate()
+            # Estimate token count for preamble
+            item.token_count = tokenCount.returnHighestTokens(item.content)
+            # A section only can only have a single item
+            return item
 
     # Sorts Section by a clause, defaults to id (only supported at the moment)
     # Include a reverse flag to also do a reverse order
@@ -311,6 +318,22 @@ def query_vector_store_to_build(
     final_pages = []
     this_range = min(len(search_result), max_sources)
 
+    if this_range > 0 and not hasattr(collection, 'getPageOriginUUIDLists'):
+        raise AttributeError("Passed collection object does not have a 'getPageOriginUUIDLists' method.")
+
+    # Fetch the pages of all top results in a single query. Results from the
+    # same page share a single fetch.
+    origin_uuids = []
+    for i in range(this_range):
+        if search_result[i] and search_result[i].section and search_result[i].section.origin_uuid:
+            origin_uuids.append(search_result[i].section.origin_uuid)
+    pages = {}
+    if origin_uuids:
+        try:
+            pages = collection.getPageOriginUUIDLists(origin_uuids)
+        except Exception as e:
+            print(f"Error fetching the pages of {len(set(origin_uuids))} origin_uuids: {e}")
+
     for i in range(this_range):
         if not (search_result[i] and hasattr(search_result[i], 'section') and search_result[i].section):
              print(f"Warning: Skipping index {i} in build loop due to invalid search result item.")
@@ -320,19 +343,13 @@ def query_vector_store_to_build(
 
         page_token_limit = token_limit_per_source[i] if i < len(token_limit_per_source) else 0
 
-        if not hasattr(collection, 'getPageOriginUUIDList'):
-            raise AttributeError("Passed collection object does not have a 'getPageOriginUUIDList' method.")
-
-        try:
-            same_page = collection.getPageOriginUUIDList(
-                origin_uuid=current_section.origin_uuid
-            )
-            if not hasattr(same_page, 'buildSections'):
-                 raise AttributeError("Object returned by getPageOriginUUIDList does not have a 'buildSections' method.")
-
-        except Exception as e:
-            print(f"Error processing item {i} with origin_uuid {current_section.origin_uuid}: {e}")
+        same_page = pages.get(current_section.origin_uuid, None)
+        if same_page is None:
+            print(f"Error processing item {i} with origin_uuid {current_section.origin_uuid}: page not found")
             continue
+        # Copy the sections of the page, since building the sections updates
+        # their content and a page can be shared by several results.
+        same_page = FullPage([copy.copy(section) for section in same_page.section_list])
 
         if docs_agent_config == "experimental":
             test_page = same_page.buildSections(
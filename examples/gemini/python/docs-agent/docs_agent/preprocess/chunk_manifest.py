@@ -0,0 +1,248 @@
+#
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Manifest of source files used for incremental chunking"""
+
+import hashlib
+import json
+import os
+import re
+import typing
+
+from absl import logging
+
+from docs_agent.preprocess.splitters import markdown_splitter
+from docs_agent.utilities.config import ProductConfig
+from docs_agent.utilities.helpers import end_path_backslash, resolve_path
+
+
+MANIFEST_FILENAME = "chunk_manifest.json"
+MANIFEST_VERSION = 1
+
+
+# Return the path to the chunk manifest of a product.
+def get_manifest_path(product_config: ProductConfig) -> str:
+    return resolve_path(
+        end_path_backslash(product_config.output_path) + MANIFEST_FILENAME
+    )
+
+
+# Return the settings that affect the output of `agent chunk`. A manifest
+# written with different settings cannot be used for incremental chunking.
+def get_chunk_settings(product_config: ProductConfig) -> dict:
+    inputs = []
+    for input_item in product_config.inputs:
+        inputs.append(
+            {
+                "path": resolve_path(input_item.path),
+                "url_prefix": input_item.url_prefix,
+                "include_path_html": input_item.include_path_html,
+                "exclude_path": input_item.exclude_path,
+            }
+        )
+    return {
+        "product_name": product_config.product_name,
+        "markdown_splitter": product_config.markdown_splitter,
+        "chunk_format": getattr(product_config, "chunk_format", "files"),
+        "output_path": resolve_path(product_config.output_path),
+        "inputs": inputs,
+    }
+
+
+# Return the SHA-256 hash of a file's content.
+def get_file_hash(path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as input_file:
+        for block in iter(lambda: input_file.read(1024 * 1024), b""):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+# Return the (mtime, size, hash) state of a file, or None if it does not exist.
+# If a previous state is provided and the mtime and size are unchanged,
+# the previous hash is reused without reading the file.
+def get_file_state(
+    path: str, previous_state: typing.Optional[dict] = None
+) -> typing.Optional[dict]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    if (
+        previous_state is not None
+        and previous_state.get("mtime") == stat.st_mtime
+        and previous_state.get("size") == stat.st_size
+    ):
+        return previous_state
+    return {"mtime": stat.st_mtime, "size": stat.st_size, "hash": get_file_hash(path)}
+
+
+# Return True if the content of a file differs from a previously recorded state.
+def has_file_changed(
+    current_state: typing.Optional[dict], previous_state: typing.Optional[dict]
+) -> bool:
+    if current_state is None or previous_state is None:
+        return current_state is not previous_state
+    return current_state["hash"] != previous_state["hash"]
+
+
+# Return the files included by a source file using `<<include>>` lines
+# (Markdown) or `{% include "..." %}` lines (HTML), resolved the same way as
+# `process_markdown_includes()` and `process_html_includes()`. HTML includes
+# are processed after Markdown includes are inlined, so the HTML includes of
+# the included Markdown files are returned too.
+def find_include_dependencies(
+    content: str, root: str, include_path_html: typing.Optional[str] = None
+) -> list[str]:
+    dependencies = []
+    for line in content.split("\n"):
+        if line.startswith("<<"):
+            include_match = re.search("^<<(.*?)>>", line)
+            if include_match:
+                dependencies.append(os.path.abspath(root + "/" + include_match[1]))
+    content_with_include = markdown_splitter.process_markdown_includes(content, root)
+    for line in content_with_include.split("\n"):
+        include_match = re.search('{% include "(.*?)" %}', line)
+        if include_match:
+            dependencies.append(
+                os.path.abspath(str(include_path_html) + "/" + include_match[1])
+            )
+    return list(dict.fromkeys(dependencies))
+
+
+# Load the chunk manifest of a product. Returns None if the manifest does not
+# exist or was written with different settings.
+def load_manifest(product_config: ProductConfig) -> typing.Optional[dict]:
+    manifest_path = get_manifest_path(product_config)
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as manifest_file:
+            manifest = json.load(manifest_file)
+    except (OSError, ValueError):
+        logging.info(f"Cannot read the chunk manifest: {manifest_path}")
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    if manifest.get("settings") != get_chunk_settings(product_config):
+        logging.info("The chunk settings have changed since the last run.")
+        return None
+    return manifest
+
+
+# Create a new, empty chunk manifest for a product.
+def new_manifest(product_config: ProductConfig) -> dict:
+    return {
+        "version": MANIFEST_VERSION,
+        "settings": get_chunk_settings(product_config),
+        "files": {},
+        "dependencies": {},
+    }
+
+
+# Write the chunk manifest of a product.
+def save_manifest(product_config: ProductConfig, manifest: dict) -> None:
+    manifest_path = get_manifest_path(product_config)
+    temp_path = manifest_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file)
+    os.replace(temp_path, manifest_path)
+
+
+# Record a processed source file and its include dependencies in the manifest.
+# The states of the included files are computed once per run and shared
+# through `current_dependencies`.
+def record_source_file(
+    manifest: dict,
+    source_path: str,
+    input_path_count: int,
+    relative_path: str,
+    chunks: list[str],
+    current_dependencies: dict,
+    include_path_html: typing.Optional[str] = None,
+    previous_manifest: typing.Optional[dict] = None,
+) -> None:
+    previous_entry = None
+    previous_dependencies = {}
+    if previous_manifest is not None:
+        previous_entry = previous_manifest["files"].get(source_path)
+        previous_dependencies = previous_manifest["dependencies"]
+    state = get_file_state(source_path, previous_entry)
+    if state is None:
+        return
+    with open(source_path, "r", encoding="utf-8", errors="replace") as source_file:
+        content = source_file.read()
+    includes = find_include_dependencies(
+        content, os.path.dirname(source_path), include_path_html
+    )
+    for include in includes:
+        if include not in current_dependencies:
+            current_dependencies[include] = get_file_state(
+                include, previous_dependencies.get(include)
+            )
+        manifest["dependencies"][include] = current_dependencies[include]
+    manifest["files"][source_path] = {
+        "input": input_path_count,
+        "relative_path": relative_path,
+        "mtime": state["mtime"],
+        "size": state["size"],
+        "hash": state["hash"],
+        "includes": includes,
+        "chunks": chunks,
+    }
+
+
+# Copy the entry of an unchanged source file from the previous manifest.
+def keep_source_file(
+    manifest: dict,
+    previous_manifest: dict,
+    source_path: str,
+    current_dependencies: dict,
+) -> None:
+    entry = previous_manifest["files"][source_path]
+    for include in entry["includes"]:
+        manifest["dependencies"][include] = current_dependencies.get(
+            include, previous_manifest["dependencies"].get(include)
+        )
+    manifest["files"][source_path] = entry
+
+
+# Return True if a source file (or one of the files it includes) has changed
+# since it was recorded in the manifest, or if any of its chunks is missing.
+# If check_chunk_files is False (for the packed chunk format), only the file
+# index is checked for the chunks.
+def needs_processing(
+    manifest: dict,
+    source_path: str,
+    current_dependencies: dict,
+    file_index: dict,
+    check_chunk_files: bool = True,
+) -> bool:
+    entry = manifest["files"].get(source_path)
+    if entry is None:
+        return True
+    if has_file_changed(get_file_state(source_path, entry), entry):
+        return True
+    for include in entry["includes"]:
+        previous_state = manifest["dependencies"].get(include)
+        if include not in current_dependencies:
+            current_dependencies[include] = get_file_state(include, previous_state)
+        if has_file_changed(current_dependencies[include], previous_state):
+            return True
+    for chunk in entry["chunks"]:
+        if chunk not in file_index:
+            return True
+        if check_chunk_files and not os.path.exists(chunk):
+            return True
+    return False
@@ -0,0 +1,106 @@
+#
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Packed storage of text chunks in a single JSONL file"""
+
+import json
+import os
+import typing
+
+from absl import logging
+
+from docs_agent.utilities.config import ProductConfig
+from docs_agent.utilities.helpers import end_path_backslash, resolve_path
+
+
+CHUNKS_FILENAME = "chunks.jsonl"
+
+
+# Return True if a product stores its text chunks in a packed JSONL file.
+def is_packed(product_config: ProductConfig) -> bool:
+    return getattr(product_config, "chunk_format", "files") == "jsonl"
+
+
+# Return the path to the packed chunk file in an output directory.
+def get_chunks_path(output_path: str) -> str:
+    return resolve_path(end_path_backslash(output_path) + CHUNKS_FILENAME)
+
+
+# Encode a text chunk as a single JSONL line. The chunk ID is the same
+# filename that is used as the key in the `file_index.json` file.
+def encode_chunk(chunk_id: str, content: str, metadata: dict) -> str:
+    return (
+        json.dumps({"id": chunk_id, "content": content, "metadata": metadata}) + "\n"
+    )
+
+
+# Write text chunks into the packed chunk file, one line at a time.
+# The lines are written to a temporary file, which replaces the packed chunk
+# file when the writer is closed.
+class ChunkWriter:
+    def __init__(self, output_path: str):
+        self.chunks_path = get_chunks_path(output_path)
+        self.temp_path = self.chunks_path + ".tmp"
+        self.count = 0
+        self.outfile = open(self.temp_path, "w", encoding="utf-8")
+
+    def write(self, chunk_id: str, content: str, metadata: dict) -> None:
+        self.write_line(encode_chunk(chunk_id, content, metadata))
+
+    def write_line(self, line: str) -> None:
+        self.outfile.write(line)
+        self.count += 1
+
+    def close(self) -> None:
+        self.outfile.close()
+        os.replace(self.temp_path, self.chunks_path)
+
+
+# Yield (chunk_id, content, metadata) for each chunk in the packed chunk file,
+# reading one line at a time.
+def iterate_chunks(output_path: str):
+    chunks_path = get_chunks_path(output_path)
+    with open(chunks_path, "r", encoding="utf-8") as infile:
+        for line in infile:
+            if line.strip() == "":
+                continue
+            chunk = json.loads(line)
+            yield chunk["id"], chunk["content"], chunk["metadata"]
+
+
+# Read the packed chunk file into a dictionary of chunk ID to (metadata,
+# encoded line). Returns None if the file cannot be read.
+def read_chunk_lines(output_path: str) -> typing.Optional[dict]:
+    chunks_path = get_chunks_path(output_path)
+    chunk_lines = {}
+    try:
+        with open(chunks_path, "r", encoding="utf-8") as infile:
+            for line in infile:
+                if line.strip() == "":
+                    continue
+                chunk = json.loads(line)
+                chunk_lines[chunk["id"]] = (chunk["metadata"], line)
+    except (OSError, ValueError):
+        logging.info(f"Cannot read the packed chunk file: {chunks_path}")
+        return None
+    return chunk_lines
+
+
+# Return the number of chunks in the packed chunk file.
+def count_chunks(output_path: str) -> int:
+    chunks_path = get_chunks_path(output_path)
+    with open(chunks_path, "r", encoding="utf-8") as infile:
+        return sum(1 for line in infile if line.strip() != "")
@@ -0,0 +1,179 @@
+#
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Indexed, on-disk access to the entries of the `file_index.json` file"""
+
+import json
+import os
+import sqlite3
+import typing
+
+from absl import logging
+
+from docs_agent.utilities.helpers import end_path_backslash, resolve_path
+
+
+INDEX_FILENAME = "file_index.json"
+SIDECAR_FILENAME = "file_index.sqlite"
+SIDECAR_VERSION = 1
+
+
+# Return the paths to the `file_index.json` file and its SQLite sidecar file
+# in an output directory.
+def get_index_paths(output_path: str) -> tuple[str, str]:
+    base_path = end_path_backslash(resolve_path(output_path))
+    return base_path + INDEX_FILENAME, base_path + SIDECAR_FILENAME
+
+
+# Return a string that identifies the current version of a file.
+def get_file_signature(path: str) -> str:
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+# Write the entries of the (last) product in an index object (the content of
+# the `file_index.json` file) into a SQLite sidecar file. The sidecar records
+# the signature of the JSON file, so that a stale sidecar can be detected.
+def write_sidecar(output_path: str, index_object: dict) -> None:
+    json_path, sqlite_path = get_index_paths(output_path)
+    product_name = ""
+    entries = {}
+    for product in index_object:
+        product_name = product
+        entries = index_object[product]
+    temp_path = sqlite_path + ".tmp"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    connection = sqlite3.connect(temp_path)
+    try:
+        connection.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        connection.execute(
+            "CREATE TABLE entries (chunk TEXT PRIMARY KEY, data TEXT NOT NULL)"
+        )
+        connection.executemany(
+            "INSERT INTO meta (key, value) VALUES (?, ?)",
+            [
+                ("version", str(SIDECAR_VERSION)),
+                ("product_name", product_name),
+                ("json_signature", get_file_signature(json_path)),
+            ],
+        )
+        connection.executemany(
+            "INSERT OR REPLACE INTO entries (chunk, data) VALUES (?, ?)",
+            ((chunk, json.dumps(data)) for chunk, data in entries.items()),
+        )
+        connection.commit()
+    finally:
+        connection.close()
+    os.replace(temp_path, sqlite_path)
+
+
+# Return True if the SQLite sidecar file exists and matches the current
+# `file_index.json` file.
+def is_sidecar_current(output_path: str) -> bool:
+    json_path, sqlite_path = get_index_paths(output_path)
+    if not os.path.exists(sqlite_path):
+        return False
+    try:
+        connection = sqlite3.connect(sqlite_path)
+        try:
+            meta = dict(connection.execute("SELECT key, value FROM meta").fetchall())
+        finally:
+            connection.close()
+    except sqlite3.Error:
+        return False
+    return (
+        meta.get("version") == str(SIDECAR_VERSION)
+        and meta.get("json_signature") == get_file_signature(json_path)
+    )
+
+
+class FileIndex:
+    """Provides read access to the text chunk entries of a `file_index.json`
+    file through its SQLite sidecar file.
+
+    Lookups by chunk filename use the primary key of the sidecar, and the
+    entries are streamed in the order of the JSON file, so the index is never
+    fully loaded into memory. If the sidecar is missing or stale (for example,
+    the JSON file was written by an older version), it is rebuilt once from
+    the JSON file.
+
+    Attributes:
+        json_path (str): The path to the `file_index.json` file.
+        sqlite_path (str): The path to the SQLite sidecar file.
+        product_name (str): The product whose entries are in the index.
+    """
+
+    def __init__(self, output_path: str):
+        self.json_path, self.sqlite_path = get_index_paths(output_path)
+        if not os.path.exists(self.json_path):
+            raise FileNotFoundError(f"The file {self.json_path} does not exist.")
+        if not is_sidecar_current(output_path):
+            logging.info(f"Building the file index sidecar: {self.sqlite_path}")
+            with open(self.json_path, "r", encoding="utf-8") as index_file:
+                index_object = json.load(index_file)
+            write_sidecar(output_path, index_object)
+            del index_object
+        self.connection = sqlite3.connect(self.sqlite_path)
+        row = self.connection.execute(
+            "SELECT value FROM meta WHERE key = 'product_name'"
+        ).fetchone()
+        self.product_name = row[0] if row else ""
+
+    def get(self, chunk: str, default=None) -> typing.Optional[dict]:
+        row = self.connection.execute(
+            "SELECT data FROM entries WHERE chunk = ?", (chunk,)
+        ).fetchone()
+        if row is None:
+            return default
+        return json.loads(row[0])
+
+    def __contains__(self, chunk: str) -> bool:
+        row = self.connection.execute(
+            "SELECT 1 FROM entries WHERE chunk = ?", (chunk,)
+        ).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    # Yield (chunk, entry) for each entry, fetching batch_size rows at a time.
+    def items(self, batch_size: int = 1000):
+        cursor = self.connection.execute(
+            "SELECT chunk, data FROM entries ORDER BY rowid"
+        )
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for chunk, data in rows:
+                yield chunk, json.loads(data)
+
+    def keys(self, batch_size: int = 1000):
+        cursor = self.connection.execute("SELECT chunk FROM entries ORDER BY rowid")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for (chunk,) in rows:
+                yield chunk
+
+    def values(self, batch_size: int = 1000):
+        for _, entry in self.items(batch_size=batch_size):
+            yield entry
+
+    def close(self) -> None:
+        self.connection.close()
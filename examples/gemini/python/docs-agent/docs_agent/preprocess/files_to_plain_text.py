@@ -16,6 +16,7 @@
 
 """Process Markdown files into plain text"""
 
+import concurrent.futures
 import shutil
 import os
 import re
@@ -34,6 +35,9 @@ from docs_agent.utilities.helpers import (
     end_path_backslash,
     start_path_no_backslash,
 )
+from docs_agent.preprocess import chunk_manifest
+from docs_agent.preprocess import chunk_store
+from docs_agent.preprocess.file_index import write_sidecar
 from docs_agent.preprocess.splitters import (
     markdown_splitter,
     html_splitter,
@@ -134,6 +138,19 @@ def pre_process_doc_files(
     return temp_output
 
 
+# Save the content of a text chunk into its own file or, if chunk_contents
+# is provided (for the packed chunk format), into the chunk_contents dictionary.
+def save_chunk(
+    filename_to_save: str, content: str, chunk_contents: typing.Optional[dict] = None
+):
+    if chunk_contents is not None:
+        chunk_contents[filename_to_save] = content
+    else:
+        with open(filename_to_save, "w", encoding="utf-8") as new_file:
+            new_file.write(content)
+            new_file.close()
+
+
 # This function processes a Markdown file and
 # splits it into smaller text chunks.
 def process_markdown_file(
@@ -146,6 +163,7 @@ def process_markdown_file(
     namespace_uuid: uuid.UUID,
     relative_path: str,
     url_prefix: str,
+    chunk_contents: typing.Optional[dict] = None,
 ):
     file_metadata = {}
     # Read the input Markdown content
@@ -223,9 +241,7 @@ def process_markdown_file(
                 "parent_tree": list(section.parent_tree),
                 "metadata": dict(page.metadata),
             }
-            with open(filename_to_save, "w", encoding="utf-8") as new_file:
-                new_file.write(section.content)
-                new_file.close()
+            save_chunk(filename_to_save, section.content, chunk_contents)
             chunk_number += 1
     elif splitter == "process_sections":
         # Use a custom Markdown splitter to split a Markdown file
@@ -280,9 +296,7 @@ def process_markdown_file(
                 "full_token_estimate": float(page_token_estimate),
                 "metadata": dict(metadata),
             }
-            with open(filename_to_save, "w", encoding="utf-8") as new_file:
-                new_file.write(content)
-                new_file.close()
+            save_chunk(filename_to_save, content, chunk_contents)
             chunk_number += 1
     else:
         # Exits if no valid markdown splitter
@@ -304,6 +318,7 @@ def process_fidl_file(
     namespace_uuid: uuid.UUID,
     relative_path: str,
     url_prefix: str,
+    chunk_contents: typing.Optional[dict] = None,
 ):
     # Local variables
     file_metadata = {}
@@ -357,9 +372,7 @@ def process_fidl_file(
             "full_token_estimate": float(1.0),
         }
         # Save the FIDL protocol content as a text chunk.
-        with open(filename_to_save, "w", encoding="utf-8") as new_file:
-            new_file.write(fidl_protocol)
-            new_file.close()
+        save_chunk(filename_to_save, fidl_protocol, chunk_contents)
         chunk_number += 1
     return file_metadata
 
@@ -375,6 +388,7 @@ def process_html_file(
     namespace_uuid: uuid.UUID,
     relative_path: str,
     url_prefix: str,
+    chunk_contents: typing.Optional[dict] = None,
 ):
     # Local variables
     file_metadata = {}
@@ -390,38 +404,34 @@ def process_html_file(
     return file_metadata
 
 
-# This function processes files specified in the `inputs` field
-# in the config.yaml file into small plain text files.
-# Includes are processed again since preprocess resolves the includes in
-# files prefixed with _, which indicates they are not standalone.
-# inputpath is optional to walk a temporary directory that has been pre-processed.
-# If not, it defaults to path of inputpathitem.
-def process_files_from_input(
+# Process a single input file using the function selected for its type.
+# Each task is a tuple of (process_function, args, packed). This is a
+# module-level function so that tasks can be sent to worker processes.
+# Returns a tuple of (file_metadata, chunk_contents), where chunk_contents
+# is None unless packed is True.
+def process_a_file_task(task: tuple) -> tuple:
+    process_function, args, packed = task
+    if packed:
+        chunk_contents = {}
+        file_metadata = process_function(*args, chunk_contents=chunk_contents)
+        return file_metadata, chunk_contents
+    return process_function(*args), None
+
+
+# Walk an input path and list the files to be processed, in the order of
+# the walk. Each item is a tuple of (file, relative_path, process_function,
+# process_args). The output sub-directories for these files are created,
+# unless the product uses the packed chunk format.
+def collect_file_tasks(
     product_config: ProductConfig,
     inputpathitem: Input,
     splitter: str,
-    inputpath: typing.Optional[str] = None,
+    inputpath: str,
     input_path_count: int = 0,
 ):
-    # If inputpath isn't specified assign path from item
-    if inputpath is None:
-        inputpath = inputpathitem.path
-    file_count = 0
-    md_count = 0
-    html_count = 0
-    fidl_count = 0
-    file_index = []
-    full_file_metadata = {}
+    file_tasks = []
     resolved_output_path = resolve_path(product_config.output_path)
     chunk_group_name = "text_chunks_" + "{:03d}".format(input_path_count)
-    # Get the total file count.
-    file_count = sum(len(files) for _, _, files in os.walk(resolve_path(inputpath)))
-    # Set up a status bar for the terminal display.
-    progress_bar = tqdm.tqdm(
-        total=file_count,
-        position=0,
-        bar_format="{percentage:3.0f}% | {n_fmt}/{total_fmt} | {elapsed}/{remaining}| {desc}",
-    )
     # Process each input path provided in config.yaml.
     for root, dirs, files in os.walk(resolve_path(inputpath)):
         if inputpathitem.exclude_path is not None:
@@ -432,9 +442,6 @@ def process_files_from_input(
             namespace_uuid = uuid.uuid3(uuid.NAMESPACE_DNS, url_prefix)
         # Process the files found in this input path provided in config.yaml.
         for file in files:
-            # Displays status bar
-            progress_bar.set_description_str(f"Processing file {file}", refresh=True)
-            progress_bar.update(1)
             # Skip this file if it starts with `_`.
             if file.startswith("_"):
                 continue
@@ -448,73 +455,137 @@ def process_files_from_input(
                 + re.sub(resolve_path(inputpath), "", os.path.join(root, ""))
             )
             is_exist = os.path.exists(new_path)
-            if not is_exist:
+            if not is_exist and not chunk_store.is_packed(product_config):
                 os.makedirs(new_path)
             # Get the relative path to this input file.
             relative_path = make_relative_path(
                 file=file, root=root, inputpath=inputpath
             )
             # Select Splitter mode: Markdown, FIDL, or HTML.
+            process_function = None
             if splitter == "token_splitter" or splitter == "process_sections":
                 if file.endswith(".md"):
-                    # Add filename to a list
-                    file_index.append(relative_path)
-                    # Increment the Markdown file count.
-                    md_count += 1
                     # Process a Markdown file.
-                    this_file_metadata = process_markdown_file(
-                        filename_to_open,
-                        root,
-                        inputpathitem,
-                        splitter,
-                        new_path,
-                        file,
-                        namespace_uuid,
-                        relative_path,
-                        url_prefix,
-                    )
-                    # Merge this file's metadata to the global metadata.
-                    full_file_metadata.update(this_file_metadata)
+                    process_function = process_markdown_file
             elif splitter == "fidl_splitter":
                 if file.endswith(".fidl"):
-                    # Add filename to a list
-                    file_index.append(relative_path)
-                    # Increment the FIDL file count.
-                    fidl_count += 1
                     # Process a FIDL protocol file.
-                    this_file_metadata = process_fidl_file(
-                        filename_to_open,
-                        root,
-                        inputpathitem,
-                        splitter,
-                        new_path,
-                        file,
-                        namespace_uuid,
-                        relative_path,
-                        url_prefix,
-                    )
-                    # Merge this file's metadata to the global metadata.
-                    full_file_metadata.update(this_file_metadata)
+                    process_function = process_fidl_file
             else:
                 if file.endswith(".htm") or file.endswith(".html"):
-                    # Add filename to a list
-                    file_index.append(relative_path)
-                    # Increment the HTML file count.
-                    html_count += 1
                     # Process a HTML file.
-                    this_file_metadata = process_html_file(
-                        filename_to_open,
-                        root,
-                        inputpathitem,
-                        splitter,
-                        new_path,
-                        file,
-                        namespace_uuid,
-                        relative_path,
-                        url_prefix,
-                    )
-                    # Merge this file's metadata to the global metadata.
-                    full_file_metadata.update(this_file_metadata)
+                    process_function = process_html_file
+            if process_function is None:
+                continue
+            process_args = (
+                filename_to_open,
+                root,
+                inputpathitem,
+                splitter,
+                new_path,
+                file,
+                namespace_uuid,
+                relative_path,
+                url_prefix,
+            )
+            file_tasks.append((file, relative_path, process_function, process_args))
+    return file_tasks
+
+
+# Process a list of file tasks (from `collect_file_tasks`), either here or,
+# when jobs is greater than 1, in a pool of processes. Yields a tuple of
+# (file_metadata, chunk_contents) for each file in the order of the tasks.
+# If packed is True, the chunks are returned in chunk_contents instead of
+# being written into their own files.
+def run_file_tasks(
+    file_tasks: list, jobs: int = 1, progress_bar=None, packed: bool = False
+):
+    tasks = [
+        (process_function, process_args, packed)
+        for _, _, process_function, process_args in file_tasks
+    ]
+    if jobs > 1 and len(tasks) > 1:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=jobs)
+        results = executor.map(
+            process_a_file_task,
+            tasks,
+            chunksize=max(1, len(tasks) // (jobs * 4)),
+        )
+    else:
+        executor = None
+        results = map(process_a_file_task, tasks)
+    try:
+        for (file, _, _, _), result in zip(file_tasks, results):
+            if progress_bar is not None:
+                # Displays status bar
+                progress_bar.set_description_str(
+                    f"Processing file {file}", refresh=True
+                )
+                progress_bar.update(1)
+            yield result
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+# This function processes files specified in the `inputs` field
+# in the config.yaml file into small plain text files.
+# Includes are processed again since preprocess resolves the includes in
+# files prefixed with _, which indicates they are not standalone.
+# inputpath is optional to walk a temporary directory that has been pre-processed.
+# If not, it defaults to path of inputpathitem.
+# When jobs is greater than 1, files are processed in a pool of jobs processes.
+# Files are still listed and their metadata merged in the same order as the
+# serial path, so the output is identical.
+# If a chunk_writer is provided, the text chunks are written into the packed
+# chunk file instead of their own files.
+def process_files_from_input(
+    product_config: ProductConfig,
+    inputpathitem: Input,
+    splitter: str,
+    inputpath: typing.Optional[str] = None,
+    input_path_count: int = 0,
+    jobs: int = 1,
+    chunk_writer: typing.Optional[chunk_store.ChunkWriter] = None,
+):
+    # If inputpath isn't specified assign path from item
+    if inputpath is None:
+        inputpath = inputpathitem.path
+    file_index = []
+    full_file_metadata = {}
+    file_tasks = collect_file_tasks(
+        product_config=product_config,
+        inputpathitem=inputpathitem,
+        splitter=splitter,
+        inputpath=inputpath,
+        input_path_count=input_path_count,
+    )
+    # Count the files of each type.
+    md_count = sum(1 for task in file_tasks if task[2] == process_markdown_file)
+    html_count = sum(1 for task in file_tasks if task[2] == process_html_file)
+    fidl_count = sum(1 for task in file_tasks if task[2] == process_fidl_file)
+    # Set up a status bar for the terminal display.
+    progress_bar = tqdm.tqdm(
+        total=len(file_tasks),
+        position=0,
+        bar_format="{percentage:3.0f}% | {n_fmt}/{total_fmt} | {elapsed}/{remaining}| {desc}",
+    )
+    for (_, relative_path, _, _), (this_file_metadata, chunk_contents) in zip(
+        file_tasks,
+        run_file_tasks(
+            file_tasks,
+            jobs=jobs,
+            progress_bar=progress_bar,
+            packed=chunk_writer is not None,
+        ),
+    ):
+        # Add filename to a list
+        file_index.append(relative_path)
+        # Merge this file's metadata to the global metadata.
+        full_file_metadata.update(this_file_metadata)
+        if chunk_writer is not None:
+            for chunk, chunk_metadata in this_file_metadata.items():
+                chunk_writer.write(chunk, chunk_contents[chunk], chunk_metadata)
 
     # The processing of input files is finished.
     progress_bar.set_description_str(f"Finished processing files.", refresh=False)
@@ -531,14 +602,177 @@ def process_files_from_input(
     return file_count, md_count, html_count, file_index, full_file_metadata
 
 
+# This function processes only the files in an input path that have changed
+# (or whose included files have changed) since the previous run recorded in
+# the chunk manifest. The source files are read in place, without
+# pre-processing. The metadata of unchanged files is copied from the previous
+# `file_index.json` file, so the returned metadata is in the same order as
+# a full run.
+# If a chunk_writer is provided, all text chunks are written into the packed
+# chunk file, copying the lines of unchanged chunks from previous_chunk_lines.
+def process_files_from_input_incrementally(
+    product_config: ProductConfig,
+    inputpathitem: Input,
+    splitter: str,
+    input_path_count: int,
+    previous_manifest: dict,
+    previous_file_metadata: dict,
+    manifest: dict,
+    current_dependencies: dict,
+    jobs: int = 1,
+    chunk_writer: typing.Optional[chunk_store.ChunkWriter] = None,
+    previous_chunk_lines: typing.Optional[dict] = None,
+):
+    packed = chunk_writer is not None
+    resolved_input_path = resolve_path(inputpathitem.path)
+    file_index = []
+    full_file_metadata = {}
+    file_tasks = collect_file_tasks(
+        product_config=product_config,
+        inputpathitem=inputpathitem,
+        splitter=splitter,
+        inputpath=resolved_input_path,
+        input_path_count=input_path_count,
+    )
+    # Identify the files that need to be processed again.
+    changed_tasks = []
+    for file_task in file_tasks:
+        source_path = os.path.join(resolved_input_path, file_task[1])
+        if chunk_manifest.needs_processing(
+            previous_manifest,
+            source_path,
+            current_dependencies,
+            previous_file_metadata,
+            check_chunk_files=not packed,
+        ):
+            changed_tasks.append(file_task)
+            # Remove the previous chunks of this file.
+            previous_entry = previous_manifest["files"].get(source_path)
+            if previous_entry is not None and not packed:
+                for chunk in previous_entry["chunks"]:
+                    if os.path.exists(chunk):
+                        os.remove(chunk)
+    # Process the changed files.
+    changed_file_metadata = {}
+    changed_chunk_contents = {}
+    progress_bar = tqdm.tqdm(
+        total=len(changed_tasks),
+        position=0,
+        bar_format="{percentage:3.0f}% | {n_fmt}/{total_fmt} | {elapsed}/{remaining}| {desc}",
+    )
+    for (_, relative_path, _, _), (this_file_metadata, chunk_contents) in zip(
+        changed_tasks,
+        run_file_tasks(
+            changed_tasks, jobs=jobs, progress_bar=progress_bar, packed=packed
+        ),
+    ):
+        changed_file_metadata[relative_path] = this_file_metadata
+        changed_chunk_contents[relative_path] = chunk_contents
+    progress_bar.set_description_str(f"Finished processing files.", refresh=False)
+    # Merge the metadata of all files in the order of the walk.
+    for file, relative_path, _, _ in file_tasks:
+        file_index.append(relative_path)
+        source_path = os.path.join(resolved_input_path, relative_path)
+        if relative_path in changed_file_metadata:
+            this_file_metadata = changed_file_metadata[relative_path]
+            chunk_manifest.record_source_file(
+                manifest=manifest,
+                source_path=source_path,
+                input_path_count=input_path_count,
+                relative_path=relative_path,
+                chunks=list(this_file_metadata.keys()),
+                current_dependencies=current_dependencies,
+                include_path_html=inputpathitem.include_path_html,
+                previous_manifest=previous_manifest,
+            )
+            if packed:
+                chunk_contents = changed_chunk_contents[relative_path]
+                for chunk, chunk_metadata in this_file_metadata.items():
+                    chunk_writer.write(chunk, chunk_contents[chunk], chunk_metadata)
+        else:
+            chunks = previous_manifest["files"][source_path]["chunks"]
+            this_file_metadata = {
+                chunk: previous_file_metadata[chunk] for chunk in chunks
+            }
+            chunk_manifest.keep_source_file(
+                manifest=manifest,
+                previous_manifest=previous_manifest,
+                source_path=source_path,
+                current_dependencies=current_dependencies,
+            )
+            if packed:
+                for chunk in chunks:
+                    chunk_writer.write_line(previous_chunk_lines[chunk])
+        full_file_metadata.update(this_file_metadata)
+    md_count = sum(1 for task in file_tasks if task[2] == process_markdown_file)
+    html_count = sum(1 for task in file_tasks if task[2] == process_html_file)
+    fidl_count = sum(1 for task in file_tasks if task[2] == process_fidl_file)
+    file_count = md_count + html_count + fidl_count
+    print()
+    print(
+        f"Processed {len(changed_tasks)} new or updated files out of {file_count} "
+        + f"files from the source: {inputpathitem.path}"
+    )
+    print()
+    return (
+        file_count,
+        md_count,
+        html_count,
+        file_index,
+        full_file_metadata,
+        len(changed_tasks),
+    )
+
+
+# Record the source files processed in a full run in the chunk manifest.
+def record_source_files_in_manifest(
+    manifest: dict,
+    inputpathitem: Input,
+    input_path_count: int,
+    file_index: list,
+    full_file_metadata: dict,
+    current_dependencies: dict,
+):
+    resolved_input_path = resolve_path(inputpathitem.path)
+    chunks_by_source_file = {}
+    for chunk, chunk_metadata in full_file_metadata.items():
+        source_file = chunk_metadata.get("source_file", "")
+        chunks_by_source_file.setdefault(source_file, []).append(chunk)
+    for relative_path in file_index:
+        chunk_manifest.record_source_file(
+            manifest=manifest,
+            source_path=os.path.join(resolved_input_path, relative_path),
+            input_path_count=input_path_count,
+            relative_path=relative_path,
+            chunks=chunks_by_source_file.get(relative_path, []),
+            current_dependencies=current_dependencies,
+            include_path_html=inputpathitem.include_path_html,
+        )
+
+
 # Write the recorded input variables into a file: `file_index.json`
+# A SQLite sidecar file (`file_index.sqlite`) is also written for indexed
+# access to the entries by `agent populate`.
 def save_file_index_json(output_path, output_content):
     json_out_file = resolve_path(output_path) + "/file_index.json"
     with open(json_out_file, "w", encoding="utf-8") as outfile:
         json.dump(output_content, outfile)
+    write_sidecar(output_path, output_content)
     # print("Created " + json_out_file + " to store the complete list of processed files.")
 
 
+# Read the entries of a product from the `file_index.json` file.
+# Returns None if the file cannot be read.
+def read_file_index_json(output_path, product_name) -> typing.Optional[dict]:
+    json_in_file = resolve_path(output_path) + "/file_index.json"
+    try:
+        with open(json_in_file, "r", encoding="utf-8") as infile:
+            return json.load(infile).get(product_name)
+    except (OSError, ValueError):
+        logging.info(f"Cannot read the file index: {json_in_file}")
+        return None
+
+
 # Given a file, root, and inputpath, make a relative path
 def make_relative_path(
     file: str, inputpath: str, root: typing.Optional[str] = None
@@ -597,37 +831,119 @@ def resolve_and_clear_path(path: str) -> str:
 
 
 # Processes all inputs from a given ProductConfig object
-def process_inputs_from_product(input_product: ProductConfig, temp_process_path: str):
+# If incremental is True and a chunk manifest from a previous run exists,
+# only new or updated source files are processed. Otherwise, the output
+# directory is cleared and all source files are processed.
+# If the product uses the packed chunk format, the text chunks and their
+# metadata are written into a single `chunks.jsonl` file instead of their own
+# files and `file_index.json`.
+def process_inputs_from_product(
+    input_product: ProductConfig,
+    temp_process_path: str,
+    jobs: int = 1,
+    incremental: bool = False,
+):
     source_file_index = {}
     total_file_count = 0
     total_md_count = 0
     total_html_count = 0
+    total_changed_count = 0
     final_file_metadata = {}
     input_path_count = 0
+    packed = chunk_store.is_packed(input_product)
+    # Load the chunk manifest and the file index from the previous run.
+    previous_manifest = None
+    previous_file_metadata = {}
+    previous_chunk_lines = None
+    if incremental:
+        previous_manifest = chunk_manifest.load_manifest(input_product)
+        if previous_manifest is not None:
+            if packed:
+                chunk_lines = chunk_store.read_chunk_lines(input_product.output_path)
+                if chunk_lines is None:
+                    previous_file_metadata = None
+                else:
+                    previous_file_metadata = {
+                        chunk: chunk_metadata
+                        for chunk, (chunk_metadata, _) in chunk_lines.items()
+                    }
+                    previous_chunk_lines = {
+                        chunk: line for chunk, (_, line) in chunk_lines.items()
+                    }
+            else:
+                previous_file_metadata = read_file_index_json(
+                    output_path=input_product.output_path,
+                    product_name=input_product.product_name,
+                )
+            if previous_file_metadata is None:
+                previous_manifest = None
+        if previous_manifest is None:
+            print("No usable chunk manifest is found. Processing all files.")
+            resolve_and_clear_path(input_product.output_path)
+    chunk_writer = None
+    if packed:
+        chunk_writer = chunk_store.ChunkWriter(input_product.output_path)
+    manifest = chunk_manifest.new_manifest(input_product)
+    current_dependencies = {}
     for input_path_item in input_product.inputs:
         print(f"\nInput path {input_path_count}: {input_path_item.path}")
-        temp_output = pre_process_doc_files(
-            product_config=input_product,
-            inputpathitem=input_path_item,
-            temp_path=temp_process_path,
-        )
-        # Process Markdown files in the `input` path, when using pre_proces_doc_files
-        # temp_output should be used as inputpath parameter
-        (
-            file_count,
-            md_count,
-            html_count,
-            file_index,
-            full_file_metadata,
-        ) = process_files_from_input(
-            product_config=input_product,
-            inputpathitem=input_path_item,
-            inputpath=temp_output,
-            splitter=input_product.markdown_splitter,
-            input_path_count=input_path_count,
-        )
-        # Clear the temp_output
-        shutil.rmtree(temp_output)
+        if previous_manifest is not None:
+            (
+                file_count,
+                md_count,
+                html_count,
+                file_index,
+                full_file_metadata,
+                changed_count,
+            ) = process_files_from_input_incrementally(
+                product_config=input_product,
+                inputpathitem=input_path_item,
+                splitter=input_product.markdown_splitter,
+                input_path_count=input_path_count,
+                previous_manifest=previous_manifest,
+                previous_file_metadata=previous_file_metadata,
+                manifest=manifest,
+                current_dependencies=current_dependencies,
+                jobs=jobs,
+                chunk_writer=chunk_writer,
+                previous_chunk_lines=previous_chunk_lines,
+            )
+            total_changed_count += changed_count
+        else:
+            temp_output = pre_process_doc_files(
+                product_config=input_product,
+                inputpathitem=input_path_item,
+                temp_path=temp_process_path,
+            )
+            # Process Markdown files in the `input` path, when using pre_proces_doc_files
+            # temp_output should be used as inputpath parameter
+            (
+                file_count,
+                md_count,
+                html_count,
+                file_index,
+                full_file_metadata,
+            ) = process_files_from_input(
+                product_config=input_product,
+                inputpathitem=input_path_item,
+                inputpath=temp_output,
+                splitter=input_product.markdown_splitter,
+                input_path_count=input_path_count,
+                jobs=jobs,
+                chunk_writer=chunk_writer,
+            )
+            # Clear the temp_output
+            shutil.rmtree(temp_output)
+            # Record the processed source files for the next incremental run.
+            record_source_files_in_manifest(
+                manifest=manifest,
+                inputpathitem=input_path_item,
+                input_path_count=input_path_count,
+                file_index=file_index,
+                full_file_metadata=full_file_metadata,
+                current_dependencies=current_dependencies,
+            )
+            total_changed_count += file_count
         input_path = input_path_item.path
         if not input_path.endswith("/"):
             input_path = input_path + "/"
@@ -644,12 +960,27 @@ def process_inputs_from_product(input_product: ProductConfig, temp_process_path:
         total_md_count += md_count
         total_html_count += html_count
         input_path_count += 1
-    source_file_index[input_product.product_name] = final_file_metadata
-    # Write the recorded input variables into `file_index.json`.
-    save_file_index_json(
-        output_path=input_product.output_path, output_content=source_file_index
-    )
-    print(
+    # Remove the chunks of source files that no longer exist.
+    removed_count = 0
+    if previous_manifest is not None:
+        for source_path, entry in previous_manifest["files"].items():
+            if source_path in manifest["files"]:
+                continue
+            removed_count += 1
+            for chunk in entry["chunks"]:
+                if chunk not in final_file_metadata and os.path.exists(chunk):
+                    os.remove(chunk)
+    if chunk_writer is not None:
+        # Write the text chunks into `chunks.jsonl`.
+        chunk_writer.close()
+    else:
+        source_file_index[input_product.product_name] = final_file_metadata
+        # Write the recorded input variables into `file_index.json`.
+        save_file_index_json(
+            output_path=input_product.output_path, output_content=source_file_index
+        )
+    chunk_manifest.save_manifest(input_product, manifest)
+    summary = (
         "\n[Summary]"
         + f"\nProduct: {input_product.product_name}"
         + "\nSources: "
@@ -661,6 +992,26 @@ def process_inputs_from_product(input_product: ProductConfig, temp_process_path:
         + "\nHTML files: "
         + str(total_html_count)
     )
+    if previous_manifest is not None:
+        summary += (
+            f"\nNew or updated source files: {total_changed_count}"
+            + f"\nRemoved source files: {removed_count}"
+        )
+    print(summary)
+
+
+# Yield the size (in bytes) of each created text chunk.
+def get_chunk_sizes(input_product: ProductConfig):
+    if chunk_store.is_packed(input_product):
+        for _, content, _ in chunk_store.iterate_chunks(input_product.output_path):
+            yield len(content.encode("utf-8"))
+        return
+    for root, dirs, files in os.walk(resolve_path(input_product.output_path)):
+        for file in files:
+            this_filename = os.path.join(root, file)
+            if this_filename.endswith(".md"):
+                file_stats = os.stat(this_filename)
+                yield int(file_stats.st_size)
 
 
 # Print the size distribution map of created text chunks.
@@ -678,44 +1029,38 @@ def get_chunk_size_distribution_from_product(input_product: ProductConfig):
         "6000": 0,
     }
     total_file_count = 0
-    chunk_dir = input_product.output_path
-    for root, dirs, files in os.walk(resolve_path(chunk_dir)):
-        for file in files:
-            this_filename = os.path.join(root, file)
-            if this_filename.endswith(".md"):
-                file_stats = os.stat(this_filename)
-                chunk_size = int(file_stats.st_size)
-                if chunk_size <= 50:
-                    count = chunk_size_map["50"]
-                    chunk_size_map["50"] = count + 1
-                elif chunk_size > 50 and chunk_size <= 500:
-                    count = chunk_size_map["500"]
-                    chunk_size_map["500"] = count + 1
-                elif chunk_size > 500 and chunk_size <= 1000:
-                    count = chunk_size_map["1000"]
-                    chunk_size_map["1000"] = count + 1
-                elif chunk_size > 1000 and chunk_size <= 1500:
-                    count = chunk_size_map["1500"]
-                    chunk_size_map["1500"] = count + 1
-                elif chunk_size > 1500 and chunk_size <= 2000:
-                    count = chunk_size_map["2000"]
-                    chunk_size_map["2000"] = count + 1
-                elif chunk_size > 2000 and chunk_size <= 2500:
-                    count = chunk_size_map["2500"]
-                    chunk_size_map["2500"] = count + 1
-                elif chunk_size > 2000 and chunk_size <= 3000:
-                    count = chunk_size_map["3000"]
-                    chunk_size_map["3000"] = count + 1
-                elif chunk_size > 3000 and chunk_size <= 4000:
-                    count = chunk_size_map["4000"]
-                    chunk_size_map["4000"] = count + 1
-                elif chunk_size > 4000 and chunk_size <= 5000:
-                    count = chunk_size_map["5000"]
-                    chunk_size_map["5000"] = count + 1
-                else:
-                    count = chunk_size_map["6000"]
-                    chunk_size_map["6000"] = count + 1
-                total_file_count += 1
+    for chunk_size in get_chunk_sizes(input_product):
+        if chunk_size <= 50:
+            count = chunk_size_map["50"]
+            chunk_size_map["50"] = count + 1
+        elif chunk_size > 50 and chunk_size <= 500:
+            count = chunk_size_map["500"]
+            chunk_size_map["500"] = count + 1
+        elif chunk_size > 500 and chunk_size <= 1000:
+            count = chunk_size_map["1000"]
+            chunk_size_map["1000"] = count + 1
+        elif chunk_size > 1000 and chunk_size <= 1500:
+            count = chunk_size_map["1500"]
+            chunk_size_map["1500"] = count + 1
+        elif chunk_size > 1500 and chunk_size <= 2000:
+            count = chunk_size_map["2000"]
+            chunk_size_map["2000"] = count + 1
+        elif chunk_size > 2000 and chunk_size <= 2500:
+            count = chunk_size_map["2500"]
+            chunk_size_map["2500"] = count + 1
+        elif chunk_size > 2000 and chunk_size <= 3000:
+            count = chunk_size_map["3000"]
+            chunk_size_map["3000"] = count + 1
+        elif chunk_size > 3000 and chunk_size <= 4000:
+            count = chunk_size_map["4000"]
+            chunk_size_map["4000"] = count + 1
+        elif chunk_size > 4000 and chunk_size <= 5000:
+            count = chunk_size_map["5000"]
+            chunk_size_map["5000"] = count + 1
+        else:
+            count = chunk_size_map["6000"]
+            chunk_size_map["6000"] = count + 1
+        total_file_count += 1
 
     # Print the distribution result.
     print("\nSpread of text chunk sizes and counts:")
@@ -739,6 +1084,8 @@ def get_chunk_size_distribution_from_product(input_product: ProductConfig):
 def process_all_products(
     config_file: ConfigFile = config.ReadConfig().returnProducts(),
     temp_process_path: str = "/tmp",
+    jobs: int = 1,
+    incremental: bool = False,
 ):
     print(f"Starting chunker for {str(len(config_file.products))} products.\n")
     for index, product in enumerate(config_file.products):
@@ -750,10 +1097,17 @@ def process_all_products(
         #     logging.error(old_entries)
         # else:
         #     old_entries = None
-        print("Output directory: " + resolve_and_clear_path(product.output_path))
+        if incremental:
+            # Existing chunks are kept and updated in place.
+            print("Output directory: " + resolve_path(product.output_path))
+        else:
+            print("Output directory: " + resolve_and_clear_path(product.output_path))
         print("Processing files from " + str(len(product.inputs)) + " sources.")
         process_inputs_from_product(
-            input_product=product, temp_process_path=temp_process_path
+            input_product=product,
+            temp_process_path=temp_process_path,
+            jobs=jobs,
+            incremental=incremental,
         )
 
         # Print the distribution map of text chunk sizes.
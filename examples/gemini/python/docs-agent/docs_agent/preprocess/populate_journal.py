@@ -0,0 +1,176 @@
+#
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Checkpoint journal for resuming an interrupted `agent populate` run"""
+
+import json
+import os
+
+from absl import logging
+
+from docs_agent.utilities.config import ProductConfig
+from docs_agent.utilities.helpers import resolve_path
+
+
+JOURNAL_FILENAME = "populate_journal.jsonl"
+
+
+# Return the path to the populate journal of a product. The journal is stored
+# in the directory of the (first) Chroma database, so that it is removed
+# together with the database. Without a Chroma database, the journal is stored
+# in the output directory.
+def get_journal_path(product_config: ProductConfig) -> str:
+    for db_conf in product_config.db_configs:
+        if "chroma" in db_conf.db_type:
+            return os.path.join(
+                resolve_path(db_conf.vector_db_dir),
+                f"{db_conf.collection_name}_{JOURNAL_FILENAME}",
+            )
+    return os.path.join(resolve_path(product_config.output_path), JOURNAL_FILENAME)
+
+
+class PopulateJournal:
+    """Records the progress of an `agent populate` run in an append-only
+    JSONL file.
+
+    Each record is written (and flushed to disk) after the change it
+    describes is committed: a batch of entries upserted into Chroma, a chunk
+    created in a Semantic Retriever corpus, or a document created in the
+    corpus. A run that finishes writes a `complete` record. If the last run
+    did not finish, the records since the last `complete` record are loaded
+    so that the next run can resume.
+
+    Attributes:
+        path (str): The path to the journal file.
+        resumed (bool): True if an interrupted run is being resumed.
+        committed_batches (int): The number of batches committed to Chroma.
+        committed_chroma (dict): The md_hash of each entry committed to Chroma.
+        committed_corpus (dict): For each corpus, the md_hash of each chunk
+          committed to the corpus.
+        document_names (dict): For each corpus, the name of the document
+          created for each page (identified by its file prefix).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.resumed = False
+        self.committed_batches = 0
+        self.committed_chroma = {}
+        self.committed_corpus = {}
+        self.document_names = {}
+        self.journal_file = None
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as journal_file:
+                for line in journal_file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # The last record may be incomplete after a crash.
+                        logging.info(f"Ignoring an incomplete journal record in {self.path}")
+                        continue
+                    self._apply(record)
+        except OSError:
+            return
+
+    def _apply(self, record: dict) -> None:
+        record_type = record.get("type")
+        if record_type == "start":
+            self.resumed = True
+        elif record_type == "complete":
+            self.resumed = False
+            self.committed_batches = 0
+            self.committed_chroma = {}
+            self.committed_corpus = {}
+            self.document_names = {}
+        elif record_type == "chroma":
+            self.committed_batches += 1
+            self.committed_chroma.update(zip(record["ids"], record["md_hashes"]))
+        elif record_type == "corpus":
+            self.committed_corpus.setdefault(record["corpus"], {})[
+                record["id"]
+            ] = record["md_hash"]
+        elif record_type == "document":
+            self.document_names.setdefault(record["corpus"], {})[
+                record["prefix"]
+            ] = record["name"]
+
+    def _append(self, record: dict) -> None:
+        self.journal_file.write(json.dumps(record) + "\n")
+        self.journal_file.flush()
+        os.fsync(self.journal_file.fileno())
+
+    def start(self, total: int) -> None:
+        """Starts a new run, or continues the interrupted run."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        mode = "a" if self.resumed else "w"
+        self.journal_file = open(self.path, mode, encoding="utf-8")
+        if self.resumed and self.journal_file.tell() > 0:
+            # Start on a new line in case the last record is incomplete.
+            with open(self.path, "rb") as journal_file:
+                journal_file.seek(-1, os.SEEK_END)
+                if journal_file.read(1) != b"\n":
+                    self.journal_file.write("\n")
+        self._append({"type": "start", "total": total})
+
+    def record_chroma_batch(self, ids: list[str], md_hashes: list[str]) -> None:
+        self.committed_batches += 1
+        self.committed_chroma.update(zip(ids, md_hashes))
+        self._append({"type": "chroma", "ids": ids, "md_hashes": md_hashes})
+
+    def record_corpus_chunk(self, corpus_name: str, uuid: str, md_hash: str) -> None:
+        self.committed_corpus.setdefault(corpus_name, {})[uuid] = md_hash
+        self._append(
+            {"type": "corpus", "corpus": corpus_name, "id": uuid, "md_hash": md_hash}
+        )
+
+    def record_document(self, corpus_name: str, prefix: str, name: str) -> None:
+        self.document_names.setdefault(corpus_name, {})[prefix] = name
+        self._append(
+            {"type": "document", "corpus": corpus_name, "prefix": prefix, "name": name}
+        )
+
+    def is_committed_to_corpus(self, corpus_name: str, uuid: str, md_hash: str) -> bool:
+        return self.committed_corpus.get(corpus_name, {}).get(uuid) == md_hash
+
+    def needs_corpus_upload(self, corpus_name: str, uuid: str, md_hash: str) -> bool:
+        """Returns True if a chunk was committed to Chroma in this run, but not
+        yet to the corpus (because the run was interrupted in between)."""
+        return self.committed_chroma.get(
+            uuid
+        ) == md_hash and not self.is_committed_to_corpus(corpus_name, uuid, md_hash)
+
+    def pending_corpus_count(self, corpus_name: str) -> int:
+        return sum(
+            1
+            for uuid, md_hash in self.committed_chroma.items()
+            if not self.is_committed_to_corpus(corpus_name, uuid, md_hash)
+        )
+
+    def complete(self) -> None:
+        """Marks the run as finished, so that the next run starts from scratch."""
+        if self.journal_file is not None:
+            self._append({"type": "complete"})
+            self.journal_file.close()
+            self.journal_file = None
+        self._apply({"type": "complete"})
+
+    def close(self) -> None:
+        if self.journal_file is not None:
+            self.journal_file.close()
+            self.journal_file = None
@@ -20,12 +20,16 @@ import json
 import os
 import re
 import sys
+import typing
 
 from absl import logging
 
 import flatdict
 import tqdm
 
+from docs_agent.preprocess import chunk_store
+from docs_agent.preprocess.file_index import FileIndex
+from docs_agent.preprocess.populate_journal import PopulateJournal, get_journal_path
 from docs_agent.preprocess.splitters import markdown_splitter
 from docs_agent.storage.google_semantic_retriever import SemanticRetriever
 from docs_agent.utilities import config
@@ -33,7 +37,12 @@ from docs_agent.utilities.config import ConfigFile
 from docs_agent.utilities.config import ProductConfig
 from docs_agent.utilities.helpers import end_path_backslash
 from docs_agent.utilities.helpers import resolve_path
-from docs_agent.storage.chroma import  ChromaEnhanced
+from docs_agent.storage.chroma import ChromaEnhanced
+from docs_agent.storage.chroma import GeminiEmbeddingFunction
+from docs_agent.storage.embedding_cache import EmbeddingCache
+from docs_agent.storage.flat_index import export_flat_index, get_flat_index_dir
+from docs_agent.storage.lexical_index import build_lexical_index, get_lexical_index_dir
+from docs_agent.storage.page_cache import bump_generation
 
 
 class chromaAddSection:
@@ -85,8 +94,16 @@ def get_file_content(full_path):
     return content_file
 
 # Upload a text chunk to an online stroage using the Semantic Retrieval API.
+# If a journal is provided, the created document (identified by
+# file_page_prefix) and chunk are recorded in it.
 def upload_an_entry_to_a_corpus(
-    semantic, corpus_name, document_name_in_corpus, this_item, is_this_first_chunk
+    semantic,
+    corpus_name,
+    document_name_in_corpus,
+    this_item,
+    is_this_first_chunk,
+    journal: typing.Optional[PopulateJournal] = None,
+    file_page_prefix: str = "",
 ):
     document_name = document_name_in_corpus
     # Check if a document for this chunk exists.
@@ -101,6 +118,8 @@ def upload_an_entry_to_a_corpus(
                 page_title=this_item.section.page_title,
                 uuid=origin_uuid,
             )
+            if journal is not None:
+                journal.record_document(corpus_name, file_page_prefix, document_name)
         except:
             logging.error(
                 f"Cannot create a new document using the Semantic Retrieval API: {str(this_item.section.page_title)}"
@@ -115,6 +134,10 @@ def upload_an_entry_to_a_corpus(
             metadata=dict_with_uuid,
         )
         logging.info("Added the text chunk using the Semantic Retrieval API.")
+        if journal is not None:
+            journal.record_corpus_chunk(
+                corpus_name, this_item.section.uuid, this_item.section.md_hash
+            )
     except:
         logging.error(dict_with_uuid)
         logging.error(this_item.section)
@@ -122,79 +145,248 @@ def upload_an_entry_to_a_corpus(
     return document_name
 
 
-# Delete entries in the Chroma database if we cannot find matches in the current dataset.
-def delete_unmatched_entries_in_chroma(
-    product_config: ProductConfig, chroma_client, collection
+# Process a batch of text chunks: identify which chunks are new or updated
+# using the populate plan (or, without a plan, a single lookup), then embed
+# and upsert them using a single Chroma call.
+# Each item in the batch is a tuple of (full_file_name, chromaAddSection).
+# If an embedding function is provided, the embeddings are generated with it
+# using each chunk's md_hash as the key for the embedding cache.
+# An error in one batch is logged and does not stop the other batches.
+# If a journal is provided, the committed entries are recorded in it, and
+# chunks that an interrupted run committed to Chroma but not to the corpus
+# are uploaded to the corpus.
+# Returns a tuple of (new_count, unchanged_count, skipped_count).
+def process_a_batch_of_chunks(
+    batch: list,
+    chroma_collection,
+    semantic=None,
+    corpus_name: str = "",
+    dict_document_names_in_corpus: typing.Optional[dict] = None,
+    embedding_function: typing.Optional[GeminiEmbeddingFunction] = None,
+    plan: typing.Optional["PopulatePlan"] = None,
+    journal: typing.Optional[PopulateJournal] = None,
 ):
-    print()
-    print(f"Scanning the Chroma database to identify entries to be deleted.")
-    # Arrays to store IDs, text chunk filename, and md hashes of
-    # the existing entries in the local Chroma vector database.
-    existing_online_entry_ids = []
-    existing_online_entry_text_chunk_filenames = []
-    existing_online_entry_md_hashes = []
-    # Get all entries in the vector database.
-    all_entries = collection.get()
-    for entry in all_entries["ids"]:
-        # logging.error(f"ID: {entry}")
-        existing_online_entry_ids.append(str(entry))
-    for entry in all_entries["metadatas"]:
-        # logging.error(f"Metadata: {entry}")
-        text_chunk_filename = ""
-        md_hash = ""
-        if "text_chunk_filename" in entry:
-            text_chunk_filename = entry["text_chunk_filename"]
-        if "md_hash" in entry:
-            md_hash = entry["md_hash"]
-        # logging.error(f"Text chunk filename: {text_chunk_filename}")
-        # logging.error(f"MD HASH: {md_hash}")
-        existing_online_entry_text_chunk_filenames.append(str(text_chunk_filename))
-        existing_online_entry_md_hashes.append(str(md_hash))
+    if dict_document_names_in_corpus is None:
+        dict_document_names_in_corpus = {}
+    new_count = 0
+    unchanged_count = 0
+    skipped_count = 0
+    changed_items = batch
+    if chroma_collection:
+        if plan is not None:
+            # The plan already identified the unchanged entries.
+            changed_items = []
+            for full_file_name, item in batch:
+                if item.section.uuid in plan.unchanged:
+                    unchanged_count += 1
+                else:
+                    changed_items.append((full_file_name, item))
+        else:
+            # Check which entries already exist in Chroma with the same hash.
+            ids_to_check = [item.section.uuid for _, item in batch]
+            try:
+                get_result = chroma_collection.get(
+                    ids=ids_to_check,
+                    include=["metadatas"],
+                )
+                existing_md_hashes = {}
+                for index, existing_id in enumerate(get_result["ids"]):
+                    metadata = get_result["metadatas"][index] or {}
+                    existing_md_hashes[existing_id] = metadata.get("md_hash", "")
+            except Exception as e:
+                if "does not exist" not in str(e).lower():
+                    logging.warning(f"Error in Chroma to get a batch of {len(ids_to_check)} IDs: {e}")
+                existing_md_hashes = {}
+            changed_items = []
+            for full_file_name, item in batch:
+                if existing_md_hashes.get(item.section.uuid) == item.section.md_hash:
+                    unchanged_count += 1
+                else:
+                    changed_items.append((full_file_name, item))
+        # Upsert all new or updated entries in one call, which generates
+        # the embeddings for the batch with a single request.
+        if changed_items:
+            try:
+                documents = [item.section.content for _, item in changed_items]
+                embeddings = None
+                if embedding_function is not None:
+                    embeddings = embedding_function.embed_documents(
+                        documents,
+                        keys=[item.section.md_hash for _, item in changed_items],
+                    )
+                chroma_collection.upsert(
+                    documents=documents,
+                    embeddings=embeddings,
+                    metadatas=[item.metadata for _, item in changed_items],
+                    ids=[item.section.uuid for _, item in changed_items],
+                )
+                new_count += len(changed_items)
+                if journal is not None:
+                    journal.record_chroma_batch(
+                        ids=[item.section.uuid for _, item in changed_items],
+                        md_hashes=[item.section.md_hash for _, item in changed_items],
+                    )
+            except Exception as e:
+                logging.error(
+                    f"Error during collection.upsert for a batch of {len(changed_items)} entries "
+                    + f"(first ID {changed_items[0][1].section.uuid}): {e}",
+                    exc_info=True,
+                )
+                skipped_count += len(changed_items)
+    else:
+        logging.warning(
+            f"Skipping add/upsert of {len(batch)} files because Chroma collection is not available."
+        )
+        skipped_count += len(batch)
+
+    # Upload the new or updated entries using the Semantic Retrieval API.
+    if semantic and corpus_name:
+        corpus_items = changed_items
+        if journal is not None:
+            changed_ids = set(item.section.uuid for _, item in changed_items)
+            corpus_items = []
+            for full_file_name, item in batch:
+                uuid = item.section.uuid
+                md_hash = item.section.md_hash
+                if (
+                    uuid in changed_ids
+                    and not journal.is_committed_to_corpus(corpus_name, uuid, md_hash)
+                ) or journal.needs_corpus_upload(corpus_name, uuid, md_hash):
+                    corpus_items.append((full_file_name, item))
+        for full_file_name, item in corpus_items:
+            file_page_prefix = full_file_name
+            is_this_first_chunk = True
+            document_name_in_corpus = ""
+            match_file_page = re.search(r"(.*)_\d+\.md$", full_file_name)
+            if match_file_page:
+                file_page_prefix = match_file_page.group(1)
+                if file_page_prefix in dict_document_names_in_corpus:
+                    document_name_in_corpus = dict_document_names_in_corpus[
+                        file_page_prefix
+                    ]
+                    is_this_first_chunk = False
+            try:
+                document_name = upload_an_entry_to_a_corpus(
+                    semantic,
+                    corpus_name,
+                    document_name_in_corpus,
+                    item,
+                    is_this_first_chunk,
+                    journal=journal,
+                    file_page_prefix=file_page_prefix,
+                )
+                dict_document_names_in_corpus[file_page_prefix] = document_name
+            except Exception as e:
+                logging.error(
+                    f"Failed to upload chunk for {full_file_name} to Semantic Retriever: {e}",
+                    exc_info=True,
+                )
+    return new_count, unchanged_count, skipped_count
 
-    # Examine the new candidate entries in the current `data` directory.
-    candidate_entries = {}
-    (index_object, full_index_path) = load_index(input_path=product_config.output_path)
+
+# The changes needed to bring a Chroma collection in sync with the text chunks
+# of the current dataset. Entries are identified by their UUIDs.
+class PopulatePlan:
+    def __init__(self):
+        self.to_add = set()
+        self.to_update = set()
+        self.unchanged = set()
+        self.to_delete = []
+
+    def needs_upsert(self, uuid: str) -> bool:
+        return uuid in self.to_add or uuid in self.to_update
+
+    def __str__(self):
+        return (
+            f"{len(self.to_add)} to add, {len(self.to_update)} to update, "
+            f"{len(self.unchanged)} unchanged, {len(self.to_delete)} to delete"
+        )
+
+
+# Return the text chunk entries of the (last) product in the index object.
+def return_index_entries(index_object) -> dict:
+    dictionary_input = {}
     for product in index_object:
         dictionary_input = index_object[product]
-    # Extract the text chunk name and hash from each chunk data.
-    for item in dictionary_input:
-        chunk_data = dictionary_input[item]
-        text_chunk_filename = ""
-        text_chunk_md_hash = ""
-        # print(f"Candidate text chunk data: {chunk_data}")
-        if "text_chunk_filename" in chunk_data:
-            text_chunk_filename = chunk_data["text_chunk_filename"]
-        if "md_hash" in chunk_data:
-            text_chunk_md_hash = chunk_data["md_hash"]
-        # print(f"Candidate text chunk filename: {text_chunk_filename}")
-        if text_chunk_filename != "":
-            candidate_entries[text_chunk_filename] = text_chunk_md_hash
-
-    # Compare the existing online entries to the candidate entries.
-    to_be_deleted_online_entry_ids = []
-    index = 0
-    for index, item in enumerate(existing_online_entry_text_chunk_filenames):
-        existing_text_chunk = item
-        existing_md_hash = existing_online_entry_md_hashes[index]
-        existing_id = existing_online_entry_ids[index]
-        if existing_text_chunk in candidate_entries:
-            candidate_md_hash = candidate_entries[existing_text_chunk]
-            if existing_md_hash != candidate_md_hash:
-                logging.info(
-                    f"The entry {existing_text_chunk} in the Chroma database "
-                    + "will be deleted because its content has changed."
-                )
-                to_be_deleted_online_entry_ids.append(existing_id)
+    return dictionary_input
+
+
+# Return the IDs and md hashes of all entries in a Chroma collection.
+# Only the metadata is fetched, one page at a time.
+def get_existing_md_hashes_in_chroma(collection, page_size: int = 1000) -> dict:
+    existing_md_hashes = {}
+    offset = 0
+    while True:
+        page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+        for index, entry_id in enumerate(page["ids"]):
+            metadata = page["metadatas"][index] or {}
+            existing_md_hashes[str(entry_id)] = str(metadata.get("md_hash", ""))
+        if len(page["ids"]) < page_size:
+            break
+        offset += page_size
+    return existing_md_hashes
+
+
+# Yield the metadata of each text chunk of the current dataset, streamed from
+# the packed chunk file or the file index (unless the file index is already
+# opened as index_entries).
+def iterate_chunk_entries(
+    product_config: ProductConfig, index_entries: typing.Optional[FileIndex] = None
+):
+    if chunk_store.is_packed(product_config):
+        for _, _, chunk_data in chunk_store.iterate_chunks(product_config.output_path):
+            yield chunk_data
+        return
+    if index_entries is None:
+        index_entries = load_file_index(input_path=product_config.output_path)
+    yield from index_entries.values()
+
+
+# Compare the entries in a Chroma collection to the metadata of the text
+# chunks (see `iterate_chunk_entries`) and return a plan of the entries to
+# add, update, and delete.
+def plan_chroma_changes(collection, chunk_entries: typing.Iterable[dict]) -> PopulatePlan:
+    plan = PopulatePlan()
+    existing_md_hashes = get_existing_md_hashes_in_chroma(collection)
+    candidate_ids = set()
+    for chunk_data in chunk_entries:
+        uuid = str(chunk_data.get("UUID", ""))
+        if uuid == "":
+            continue
+        candidate_ids.add(uuid)
+        if uuid not in existing_md_hashes:
+            plan.to_add.add(uuid)
+        elif existing_md_hashes[uuid] != str(chunk_data.get("md_hash", "")):
+            plan.to_update.add(uuid)
         else:
-            logging.info(
-                f"The entry {existing_text_chunk} in the Chroma database "
-                + "will be deleted because it is no longer found in the current dataset."
-            )
-            to_be_deleted_online_entry_ids.append(existing_id)
+            plan.unchanged.add(uuid)
+    plan.to_delete = [
+        entry_id for entry_id in existing_md_hashes if entry_id not in candidate_ids
+    ]
+    logging.info(f"Chroma populate plan: {plan}")
+    return plan
+
 
+# Delete entries in the Chroma database if we cannot find matches in the current dataset.
+# Entries whose content has changed are updated in place by `populateToDbFromProduct`.
+def delete_unmatched_entries_in_chroma(
+    product_config: ProductConfig,
+    chroma_client,
+    collection,
+    plan: typing.Optional[PopulatePlan] = None,
+    page_size: int = 1000,
+):
+    print()
+    print(f"Scanning the Chroma database to identify entries to be deleted.")
+    if plan is None:
+        plan = plan_chroma_changes(collection, iterate_chunk_entries(product_config))
+    to_be_deleted_online_entry_ids = list(plan.to_delete)
     # Delete identified entries in the Chroma database.
     if to_be_deleted_online_entry_ids:
-        collection.delete(ids=to_be_deleted_online_entry_ids)
+        for start in range(0, len(to_be_deleted_online_entry_ids), page_size):
+            collection.delete(
+                ids=to_be_deleted_online_entry_ids[start : start + page_size]
+            )
         deleted_entries_count = len(to_be_deleted_online_entry_ids)
         print(f"Deleted entries count: {deleted_entries_count}")
     else:
@@ -220,12 +412,8 @@ def delete_unmatched_entries_in_online_corpus(
 
     # Examine the new candidate entries in the current `data` directory.
     candidate_entries = {}
-    (index_object, full_index_path) = load_index(input_path=product_config.output_path)
-    for product in index_object:
-        dictionary_input = index_object[product]
     # Extract the text chunk name and hash from each chunk data.
-    for item in dictionary_input:
-        chunk_data = dictionary_input[item]
+    for chunk_data in iterate_chunk_entries(product_config):
         text_chunk_filename = ""
         text_chunk_md_hash = ""
         # print(f"Candidate text chunk data: {chunk_data}")
@@ -288,8 +476,8 @@ def delete_unmatched_entries_in_online_corpus(
     return to_be_deleted_online_chunk_names
 
 
-# Read plain text files (.md) from an input dir and
-# add their content to the vector database.
+# Read plain text files (.md) from an input dir, or the text chunks in the
+# packed chunk file, and add their content to the vector database.
 # Embeddings are generated automatically as they are added to the database.
 def populateToDbFromProduct(product_config: ProductConfig):
     """Populates the vector database with product documentation.
@@ -297,8 +485,38 @@ def populateToDbFromProduct(product_config: ProductConfig):
         product_config: A ProductConfig object containing configuration details.
     """
     logging.info("Starting populateToDbFromProduct")
+    # Load the index file, unless the text chunks are streamed from the packed
+    # chunk file.
+    index_entries = None
+    if chunk_store.is_packed(product_config):
+        chunks_path = chunk_store.get_chunks_path(product_config.output_path)
+        if not os.path.exists(chunks_path):
+            logging.error(
+                f"The file {chunks_path} does not exist. Re-chunk your project with docsAgent chunk"
+            )
+            return
+    else:
+        logging.info(f"Opening file index... {product_config.output_path}")
+        index_entries = load_file_index(input_path=product_config.output_path)
+        logging.info(f"File index opened with {len(index_entries)} entries.")
+    try:
+        populate_text_chunks(product_config, index_entries)
+    finally:
+        if index_entries is not None:
+            index_entries.close()
+
+
+# Add the text chunks of a product to the vector database. index_entries is
+# the opened file index, or None with the packed chunk format.
+def populate_text_chunks(
+    product_config: ProductConfig, index_entries: typing.Optional[FileIndex]
+):
     # Initialize variables
     chroma_collection = None
+    chroma = None
+    vector_dtype = "float32"
+    embedding_function = None
+    plan = None
     semantic = None
     corpus_name = ""
 
@@ -310,21 +528,33 @@ def populateToDbFromProduct(product_config: ProductConfig):
                 chroma = ChromaEnhanced(
                     chroma_dir=resolve_path(db_conf.vector_db_dir),
                     models_config=product_config.models,
+                    embedding_cache=EmbeddingCache.from_product_config(product_config),
+                    output_dimensionality=db_conf.output_dimensionality,
                 )
+                vector_dtype = db_conf.vector_dtype
+                embedding_function = chroma.embedding_function_instance
                 logging.info(f"Attempting to get or create collection '{db_conf.collection_name}'")
                 chroma_collection = chroma.client.get_or_create_collection(
                     name=db_conf.collection_name,
                     embedding_function=chroma.embedding_function_instance,
                 )
                 logging.info(f"Successfully got or created collection '{db_conf.collection_name}'")
+                # Compare the collection to the current dataset in a single pass.
+                plan = plan_chroma_changes(
+                    chroma_collection,
+                    iterate_chunk_entries(product_config, index_entries),
+                )
+                print(f"\nChroma database: {plan}.")
                 # Delete unmatched entries in Chroma
                 if (
                     hasattr(product_config, "enable_delete_chunks")
                     and product_config.enable_delete_chunks == "True"
                 ):
                     delete_unmatched_entries_in_chroma(
-                        product_config, chroma.client, chroma_collection
+                        product_config, chroma.client, chroma_collection, plan=plan
                     )
+                    # Invalidate the pages cached by running Docs Agent apps.
+                    bump_generation(chroma.chroma_dir, db_conf.collection_name)
                 break
             except Exception as e:
                 logging.error(f"Failed to initialize Chroma DB or collection '{db_conf.collection_name}': {e}", exc_info=True)
@@ -358,10 +588,6 @@ def populateToDbFromProduct(product_config: ProductConfig):
         logging.error("Chroma collection could not be initialized. Aborting population.")
         return
 
-    # Load the index file
-    logging.info(f"Loading file index... {product_config.output_path}")
-    index, full_index_path = load_index(input_path=product_config.output_path)
-    logging.info("File index loaded.")
     # Resolve the output path
     resolved_walk_path = resolve_path(product_config.output_path)
     logging.info(f"Starting file processing in directory: {resolved_walk_path}")
@@ -369,11 +595,11 @@ def populateToDbFromProduct(product_config: ProductConfig):
         logging.error(f"Target directory does not exist or is not a directory: {resolved_walk_path}")
         return
 
-    # Get the file count in the directory
-    file_count = get_file_count_in_a_dir(resolved_walk_path)
-    logging.info(f"Using os.walk file count ({file_count}) for main progress bar.")
+    # Get the number of text chunks
+    chunk_count = get_chunk_count(product_config)
+    logging.info(f"Using the chunk count ({chunk_count}) for main progress bar.")
     # Initialize progress bars
-    progress_bar, progress_new_file, progress_unchanged_file = init_progress_bars(file_count)
+    progress_bar, progress_new_file, progress_unchanged_file = init_progress_bars(chunk_count)
 
     # Counters
     total_files_processed = 0
@@ -383,131 +609,172 @@ def populateToDbFromProduct(product_config: ProductConfig):
     skipped_other_count = 0
 
     # Semantic Retriever state
-    document_name_in_corpus = ""
     dict_document_names_in_corpus = {}
-
-    # Loop through the files in the directory
-    for root, dirs, files in os.walk(resolved_walk_path):
-        for file in files:
-            # Update main progress bar based on os.walk count total
-            progress_bar.update(1)
-            progress_bar.set_description_str(f"Processing file {file}", refresh=True)
-            full_file_name = os.path.join(root, file)
-            # Skip the index file itself
-            if full_file_name == full_index_path:
+    use_corpus = bool(semantic and corpus_name)
+
+    # Open the checkpoint journal. If the previous run was interrupted, the
+    # entries committed to Chroma are already unchanged in the plan, and the
+    # chunks and documents committed to the corpus are restored.
+    journal = PopulateJournal(get_journal_path(product_config))
+    if journal.resumed:
+        print(
+            f"\nResuming an interrupted populate run: {journal.committed_batches} "
+            + f"batches ({len(journal.committed_chroma)} entries) were committed to Chroma."
+        )
+        if plan is not None:
+            print(
+                f"Remaining: {len(plan.to_add) + len(plan.to_update)} entries "
+                + "to add or update in Chroma."
+            )
+        if use_corpus:
+            dict_document_names_in_corpus.update(
+                journal.document_names.get(corpus_name, {})
+            )
+            print(
+                f"Committed to the corpus: {len(journal.committed_corpus.get(corpus_name, {}))} "
+                + f"chunks, with {journal.pending_corpus_count(corpus_name)} "
+                + "entries committed to Chroma but not to the corpus."
+            )
+    journal.start(total=chunk_count)
+
+    # Batched ingest state. Chunks are collected into batches so that each
+    # batch needs only one existence check, one embedding request, and one
+    # upsert in Chroma.
+    batch_size = max(1, int(getattr(product_config, "populate_batch_size", 100)))
+    pending_batch = []
+    logging.info(f"Using a batch size of {batch_size} chunks.")
+
+    # Loop through the text chunks
+    for full_file_name, chunk_data, content_file in iterate_text_chunks(
+        product_config, index_entries
+    ):
+        file = os.path.basename(full_file_name)
+        progress_bar.update(1)
+        progress_bar.set_description_str(f"Processing file {file}", refresh=True)
+        # Skip unchanged chunks without reading their content (unless an
+        # interrupted run did not upload them to the corpus).
+        if plan is not None:
+            chunk_uuid = (chunk_data or {}).get("UUID")
+            if chunk_uuid in plan.unchanged and not (
+                use_corpus
+                and journal.needs_corpus_upload(
+                    corpus_name, chunk_uuid, chunk_data.get("md_hash")
+                )
+            ):
+                unchanged_count += 1
+                total_files_processed += 1
+                progress_unchanged_file.update(1)
+                progress_unchanged_file.set_description_str(f"Total unchanged files {unchanged_count}", refresh=False)
                 continue
-            if file.endswith(".md"):
-                try:
-                    content_file = get_file_content(full_file_name)
-                    chroma_add_item = findFileinDict(
-                        input_file_name=full_file_name,
-                        index_object=index,
-                        content_file=content_file,
-                    )
-                    # Check for invalid content
-                    if not chroma_add_item.section.content:
-                        logging.warning(f"Skipping {file}: Content is empty.")
-                        skipped_other_count += 1
-                        continue
-                    if len(chroma_add_item.section.content) >= 10000:
-                        logging.warning(f"Skipping {file}: Content too large ({len(chroma_add_item.section.content)} bytes).")
-                        skipped_other_count += 1
-                        continue
-                    if not chroma_add_item.section.md_hash:
-                         logging.warning(f"Skipping {file}: Missing md_hash in index data.")
-                         skipped_other_count += 1
-                         continue
-
-                    # Check for invalid UUID
-                    uuid_value = chroma_add_item.section.uuid
-                    if not isinstance(uuid_value, str) or not uuid_value:
-                        logging.error(f"File {file}: Invalid UUID detected ({repr(uuid_value)}). Skipping operation for this file.")
-                        skipped_invalid_uuid_count += 1
-                        continue
-                    id_to_not_change = []
-                    # Check for Chroma collection existence
-                    if chroma_collection:
-                        try:
-                            ids_to_check = [uuid_value]
-                            get_result = chroma_collection.get(
-                                ids=ids_to_check,
-                                where={"md_hash": {"$eq": chroma_add_item.section.md_hash}},
-                                include=[],
-                            )
-                            id_to_not_change = get_result["ids"]
-                        except Exception as e:
-                            if "does not exist" in str(e).lower():
-                                 id_to_not_change = []
-                            else:
-                                 logging.warning(f"File {file}: Error in Chroma to get for ID {uuid_value}: {e}")
-                                 id_to_not_change = []
-
-                    # Check for existing entry with same hash
-                    if id_to_not_change:
-                        # Exists with same hash -> Unchanged
-                        qty_change = len(id_to_not_change)
-                        unchanged_count += qty_change
-                        total_files_processed += qty_change
-                        progress_unchanged_file.update(qty_change)
-                        progress_unchanged_file.set_description_str(f"Total unchanged files {unchanged_count}", refresh=True)
-                    else:
-                        # New or updated entry
-                        if chroma_collection:
-                            try:
-                                doc_list = [chroma_add_item.section.content]
-                                meta_list = [chroma_add_item.metadata]
-                                id_list = [uuid_value]
-                                # Upsert the entry
-                                chroma_collection.upsert(
-                                    documents=doc_list,
-                                    metadatas=meta_list,
-                                    ids=id_list,
-                                )
-                                new_count += 1
-                                total_files_processed += 1
-                                progress_new_file.update(1)
-                                progress_new_file.set_description_str(f"Total new/updated files {new_count}", refresh=True)
-
-                            except Exception as e:
-                                # Keep this error log
-                                logging.error(f"Error during collection.upsert for ID {uuid_value}: {e}", exc_info=True)
-                                skipped_other_count += 1
-                        else:
-                             logging.warning(f"File {file}: Skipping add/upsert because Chroma collection is not available.")
-                             skipped_other_count += 1
-
-                        # Check for Semantic Retriever initialization
-                        if semantic and corpus_name:
-                            file_page_prefix = full_file_name
-                            is_this_first_chunk = True
-                            match_file_page = re.search(r"(.*)_\d+\.md$", full_file_name)
-                            if match_file_page:
-                                file_page_prefix = match_file_page.group(1)
-                                if file_page_prefix in dict_document_names_in_corpus:
-                                    document_name_in_corpus = dict_document_names_in_corpus[file_page_prefix]
-                                    is_this_first_chunk = False
-                                else:
-                                     document_name_in_corpus = ""
-
-                            try:
-                                document_name = upload_an_entry_to_a_corpus(
-                                    semantic,
-                                    corpus_name,
-                                    document_name_in_corpus,
-                                    chroma_add_item,
-                                    is_this_first_chunk,
-                                )
-                                dict_document_names_in_corpus[file_page_prefix] = document_name
-                            except Exception as e:
-                                logging.error(f"Failed to upload chunk for {file} to Semantic Retriever: {e}", exc_info=True)
-
-                except Exception as e:
-                    # Keep this error log for file-level processing errors
-                    logging.error(f"Error processing file {full_file_name}: {e}", exc_info=True)
-                    skipped_other_count += 1
-            else:
-                 # Skip non-markdown files
-                 pass
+        try:
+            if content_file is None and chunk_data is not None:
+                content_file = get_file_content(full_file_name)
+            if chunk_data is None:
+                logging.warning(f"Skipping {file}: Not found in the file index.")
+                skipped_other_count += 1
+                continue
+            chroma_add_item = make_chroma_add_section(
+                chunk_data=chunk_data, content_file=content_file
+            )
+            # Check for invalid content
+            if not chroma_add_item.section.content:
+                logging.warning(f"Skipping {file}: Content is empty.")
+                skipped_other_count += 1
+                continue
+            if len(chroma_add_item.section.content) >= 10000:
+                logging.warning(f"Skipping {file}: Content too large ({len(chroma_add_item.section.content)} bytes).")
+                skipped_other_count += 1
+                continue
+            if not chroma_add_item.section.md_hash:
+                 logging.warning(f"Skipping {file}: Missing md_hash in index data.")
+                 skipped_other_count += 1
+                 continue
+
+            # Check for invalid UUID
+            uuid_value = chroma_add_item.section.uuid
+            if not isinstance(uuid_value, str) or not uuid_value:
+                logging.error(f"File {file}: Invalid UUID detected ({repr(uuid_value)}). Skipping operation for this file.")
+                skipped_invalid_uuid_count += 1
+                continue
+            # Add this chunk to the pending batch.
+            pending_batch.append((full_file_name, chroma_add_item))
+            if len(pending_batch) >= batch_size:
+                (
+                    batch_new,
+                    batch_unchanged,
+                    batch_skipped,
+                ) = process_a_batch_of_chunks(
+                    batch=pending_batch,
+                    chroma_collection=chroma_collection,
+                    semantic=semantic,
+                    corpus_name=corpus_name,
+                    dict_document_names_in_corpus=dict_document_names_in_corpus,
+                    embedding_function=embedding_function,
+                    plan=plan,
+                    journal=journal,
+                )
+                pending_batch = []
+                new_count += batch_new
+                unchanged_count += batch_unchanged
+                skipped_other_count += batch_skipped
+                total_files_processed += batch_new + batch_unchanged
+                progress_new_file.update(batch_new)
+                progress_new_file.set_description_str(f"Total new/updated files {new_count}", refresh=True)
+                progress_unchanged_file.update(batch_unchanged)
+                progress_unchanged_file.set_description_str(f"Total unchanged files {unchanged_count}", refresh=True)
+
+        except Exception as e:
+            # Keep this error log for file-level processing errors
+            logging.error(f"Error processing file {full_file_name}: {e}", exc_info=True)
+            skipped_other_count += 1
+
+    # Process the remaining chunks in the last (partial) batch.
+    if pending_batch:
+        (
+            batch_new,
+            batch_unchanged,
+            batch_skipped,
+        ) = process_a_batch_of_chunks(
+            batch=pending_batch,
+            chroma_collection=chroma_collection,
+            semantic=semantic,
+            corpus_name=corpus_name,
+            dict_document_names_in_corpus=dict_document_names_in_corpus,
+            embedding_function=embedding_function,
+            plan=plan,
+            journal=journal,
+        )
+        new_count += batch_new
+        unchanged_count += batch_unchanged
+        skipped_other_count += batch_skipped
+        total_files_processed += batch_new + batch_unchanged
+        progress_new_file.update(batch_new)
+        progress_new_file.set_description_str(f"Total new/updated files {new_count}", refresh=True)
+        progress_unchanged_file.update(batch_unchanged)
+        progress_unchanged_file.set_description_str(f"Total unchanged files {unchanged_count}", refresh=True)
+
+    # Mark the run as finished in the checkpoint journal.
+    journal.complete()
+    # Invalidate the pages cached by running Docs Agent apps.
+    if chroma_collection is not None:
+        generation = bump_generation(chroma.chroma_dir, chroma_collection.name)
+        # Export the collection for apps that search it with NumPy.
+        if getattr(product_config, "vector_index", "chroma") == "flat":
+            exported_count = export_flat_index(
+                chroma_collection,
+                get_flat_index_dir(chroma.chroma_dir, chroma_collection.name),
+                generation=generation,
+                vector_dtype=vector_dtype,
+            )
+            print(f"\nExported {exported_count} entries to the flat index.")
+        # Index the collection for the lexical search of running apps.
+        if getattr(product_config, "lexical_search", "off") != "off":
+            indexed_count = build_lexical_index(
+                chroma_collection,
+                get_lexical_index_dir(chroma.chroma_dir, chroma_collection.name),
+                generation=generation,
+            )
+            print(f"\nIndexed {indexed_count} entries in the lexical index.")
 
     # Close all progress bars
     progress_bar.set_description_str(f"Finished processing.", refresh=True)
@@ -531,52 +798,88 @@ def populateToDbFromProduct(product_config: ProductConfig):
         print("Finalized generation of embeddings for all files in Chroma DB.")
 
 
-def findFileinDict(input_file_name: str, index_object, content_file):
-    metadata_dict_final = {}
-    for product in index_object:
-        dictionary_input = index_object[product]
-    if input_file_name in dictionary_input:
-        chunk_data = dictionary_input[input_file_name]
-        # Extract the text chunk name from the index object.
-        text_chunk_filename = ""
-        if "text_chunk_filename" in chunk_data:
-            text_chunk_filename = chunk_data["text_chunk_filename"]
-            # logging.error(f"Chunk name: {text_chunk_filename}")
-        # If metadata exists, add these to a dictionary that is then
-        # merged with other metadata values
-        if "metadata" in dictionary_input[input_file_name]:
-            # Save and flatten dictionary
-            metadata_dict_extra = extract_extra_metadata(
-                input_dictionary=dictionary_input[input_file_name]["metadata"]
-            )
-        else:
-            metadata_dict_extra = {}
-        section = markdown_splitter.DictionarytoSection(
-            dictionary_input[input_file_name]
+# Create a chromaAddSection object from the metadata of a text chunk
+# (an entry in the `file_index.json` or `chunks.jsonl` file) and its content.
+def make_chroma_add_section(chunk_data: dict, content_file: str) -> chromaAddSection:
+    # Extract the text chunk name from the index object.
+    text_chunk_filename = ""
+    if "text_chunk_filename" in chunk_data:
+        text_chunk_filename = chunk_data["text_chunk_filename"]
+    # If metadata exists, add these to a dictionary that is then
+    # merged with other metadata values
+    if "metadata" in chunk_data:
+        # Save and flatten dictionary
+        metadata_dict_extra = extract_extra_metadata(
+            input_dictionary=chunk_data["metadata"]
         )
-        if "URL" in metadata_dict_extra:
-            section.url = metadata_dict_extra["URL"]
-        # Merges dictionaries with main metadata and additional metadata
-        section.content = content_file
-        # Combines Section db in dictionary with extra
-        metadata_dict_final = section.encodeToChromaDBNoContent() | metadata_dict_extra
-        # Add the text chunk filename to the metadata.
-        if text_chunk_filename != "":
-            metadata_dict_final["text_chunk_filename"] = text_chunk_filename
-        # Overide title if it exists from frontmatter
-        if "title" in metadata_dict_final:
-            doc_title = str(metadata_dict_final["title"])
-        else:
-            doc_title = section.createChunkTitle()
-        # print("Title: " + doc_title)
     else:
-        doc_title = ""
-        section = markdown_splitter.DictionarytoSection(metadata_dict_final)
-        logging.info(f"{input_file_name} not found.")
-    chroma_add = chromaAddSection(
+        metadata_dict_extra = {}
+    section = markdown_splitter.DictionarytoSection(chunk_data)
+    if "URL" in metadata_dict_extra:
+        section.url = metadata_dict_extra["URL"]
+    # Merges dictionaries with main metadata and additional metadata
+    section.content = content_file
+    # Combines Section db in dictionary with extra
+    metadata_dict_final = section.encodeToChromaDBNoContent() | metadata_dict_extra
+    # Add the text chunk filename to the metadata.
+    if text_chunk_filename != "":
+        metadata_dict_final["text_chunk_filename"] = text_chunk_filename
+    # Overide title if it exists from frontmatter
+    if "title" in metadata_dict_final:
+        doc_title = str(metadata_dict_final["title"])
+    else:
+        doc_title = section.createChunkTitle()
+    return chromaAddSection(
         section=section, metadata=metadata_dict_final, doc_title=doc_title
     )
-    return chroma_add
+
+
+def findFileinDict(input_file_name: str, index_object, content_file):
+    if isinstance(index_object, FileIndex):
+        dictionary_input = index_object
+    else:
+        dictionary_input = return_index_entries(index_object)
+    if input_file_name in dictionary_input:
+        return make_chroma_add_section(
+            chunk_data=dictionary_input[input_file_name], content_file=content_file
+        )
+    section = markdown_splitter.DictionarytoSection({})
+    logging.info(f"{input_file_name} not found.")
+    return chromaAddSection(section=section, metadata={}, doc_title="")
+
+
+# Yield (full_file_name, chunk_data, content) for each text chunk of a product.
+# With the packed chunk format, the chunks are streamed from the `chunks.jsonl`
+# file. Otherwise, the output directory is walked for text chunk files, whose
+# metadata is looked up in index_entries (the file index). The content of
+# these files is None, so that a file is read only if its chunk needs to be
+# added.
+def iterate_text_chunks(
+    product_config: ProductConfig, index_entries: typing.Optional[FileIndex] = None
+):
+    if chunk_store.is_packed(product_config):
+        for chunk, content, chunk_data in chunk_store.iterate_chunks(
+            product_config.output_path
+        ):
+            yield chunk, chunk_data, content
+        return
+    if index_entries is None:
+        index_entries = load_file_index(input_path=product_config.output_path)
+    for root, dirs, files in os.walk(resolve_path(product_config.output_path)):
+        for file in files:
+            full_file_name = os.path.join(root, file)
+            if file.endswith(".md"):
+                yield full_file_name, index_entries.get(full_file_name), None
+
+
+# Return the number of text chunks of a product.
+def get_chunk_count(product_config: ProductConfig) -> int:
+    if chunk_store.is_packed(product_config):
+        return chunk_store.count_chunks(product_config.output_path)
+    chunk_count = 0
+    for _, _, files in os.walk(resolve_path(product_config.output_path)):
+        chunk_count += sum(1 for file in files if file.endswith(".md"))
+    return chunk_count
 
 
 # Load the file index information from the file_index.json file.
@@ -603,6 +906,18 @@ def load_index(
         return sys.exit(1)
 
 
+# Open the file index of the `file_index.json` file for indexed, streamed
+# access to its entries without loading the file into memory.
+def load_file_index(input_path: str) -> FileIndex:
+    try:
+        file_index = FileIndex(output_path=input_path)
+        logging.info("Using file index: " + file_index.json_path + "\n")
+        return file_index
+    except FileNotFoundError as error:
+        logging.error(f"{error} Re-chunk your project with docsAgent chunk")
+        return sys.exit(1)
+
+
 # Given a ReadConfig object, process all products
 # Default Read config defaults to source of project with config.yaml
 # temp_process_path is where temporary files will be processed and then deleted
@@ -24,6 +24,17 @@ import frontmatter
 from docs_agent.utilities.helpers import add_scheme_url
 
 
+# Parse a parent_tree, which is stored as a string in the metadata of
+# a text chunk (for example, "[1, 3]"), into a tuple of ints.
+def parse_parent_tree(parent_tree) -> tuple[int, ...]:
+    if parent_tree is None:
+        return ()
+    if isinstance(parent_tree, (list, tuple)):
+        return tuple(int(item) for item in parent_tree)
+    items = str(parent_tree).strip().strip("[]()").split(",")
+    return tuple(int(item) for item in items if item.strip())
+
+
 class Section:
     def __init__(
         self,
@@ -54,6 +65,8 @@ class Section:
         self.origin_uuid = origin_uuid
         self.md_hash = md_hash
         self.uuid = uuid
+        # The parsed parent_tree and the value it was parsed from
+        self._parsed_parent_tree = None
 
     def __str__(self):
         return f"UUID: {self.uuid}\n\
@@ -75,21 +88,23 @@ Content hash: {self.md_hash}\n"
         self.content = new_content
         return self
 
+    # Returns the parent_tree as a tuple of ints. The parent_tree is parsed
+    # only once, even if it is stored as a string (for example, "[1, 3]")
+    def returnParentTree(self) -> tuple[int, ...]:
+        parsed = getattr(self, "_parsed_parent_tree", None)
+        if parsed is None or parsed[0] != self.parent_tree:
+            parsed = (self.parent_tree, parse_parent_tree(self.parent_tree))
+            self._parsed_parent_tree = parsed
+        return parsed[1]
+
     # Given a section, return the id of the parent. If no, parent returns 0
     # 0 is equivalent to the top of the page
     def returnDirectParentId(self):
-        parent_tree = eval(self.parent_tree)
-        # Prepare direct_parent variable
-        if len(parent_tree) > 1:
-            direct_parent = parent_tree[len(parent_tree) - 1]
-        # If the curr_parent_tree has a len of 0, this means that no parents
+        parent_tree = self.returnParentTree()
+        # If the parent_tree is empty, this means that there are no parents
         if len(parent_tree) == 0:
-            no_parent = True
-            direct_parent = 0
-        else:
-            no_parent = False
-            direct_parent = parent_tree[len(parent_tree) - 1]
-        return direct_parent
+            return 0
+        return parent_tree[-1]
 
     def encodeToChromaDBNoContent(self):
         metadata = {}
@@ -19,14 +19,26 @@
 from enum import auto, Enum
 import string
 import shutil
+import threading
 import typing
 
 from absl import logging
 import chromadb
+import numpy as np
 from chromadb import Documents, EmbeddingFunction, Embeddings
 from chromadb.api.types import Images
 from chromadb.api.types import QueryResult
 from docs_agent.storage.base import RAG
+from docs_agent.storage.embedding_cache import EmbeddingCache, content_key
+from docs_agent.storage.embedding_cache import QueryEmbeddingCache
+from docs_agent.storage.lexical_index import (
+    DEFAULT_DECISIVE_RATIO,
+    LexicalIndex,
+    is_decisive,
+    load_collection_lexical_index,
+    reciprocal_rank_fusion,
+)
+from docs_agent.storage.page_cache import PageCache, read_generation
 from docs_agent.models.llm import GenerativeLanguageModelFactory
 from docs_agent.utilities.config import Models, ProductConfig, DbConfig
 from docs_agent.utilities.helpers import resolve_path
@@ -303,9 +315,17 @@ Section URL: {SectionDB.URL}\n"
 class GeminiEmbeddingFunction(EmbeddingFunction):
     """Embedding function wrapper for Gemini models"""
 
-    def __init__(self, models_config: Models, task_type: str = "RETRIEVAL_DOCUMENT"):
+    def __init__(
+        self,
+        models_config: Models,
+        task_type: str = "RETRIEVAL_DOCUMENT",
+        embedding_cache: typing.Optional[EmbeddingCache] = None,
+        output_dimensionality: typing.Optional[int] = None,
+    ):
         self.models_config = models_config
         self.task_type = task_type
+        self.embedding_cache = embedding_cache
+        self.output_dimensionality = output_dimensionality
         # Create the embedding model instance
         self.model = GenerativeLanguageModelFactory.create_model(
             model_type=self.models_config.embedding_model,
@@ -315,7 +335,7 @@ class GeminiEmbeddingFunction(EmbeddingFunction):
     def __call__(self, input: Embeddable) -> Embeddings:
         # Handles list of strings
         if isinstance(input, list) and all(isinstance(i, str) for i in input):
-            embeddings_list = self.model.embed(content=input, task_type=self.task_type)
+            embeddings_list = self.embed_documents(input)
         # Commented out for now. Can use images here.
         # elif isinstance(input, list) and all(isinstance(i, np.ndarray) for i in input):
         #    embeddings_list = model.embed_images(images=input, task_type=self.task_type) # Example
@@ -325,27 +345,175 @@ class GeminiEmbeddingFunction(EmbeddingFunction):
             )
             # In case there is a single string, which is the most common case
             if isinstance(input, str):
-                embeddings_list = self.model.embed(
-                    content=[input], task_type=self.task_type
-                )
+                embeddings_list = self.embed_documents([input])
             else:
                 # Update this if images get enabled
                 raise TypeError("Input must be Documents (List[str])")
 
         return typing.cast(Embeddings, embeddings_list)
 
+    def embed_documents(
+        self,
+        documents: typing.List[str],
+        keys: typing.Optional[typing.List[typing.Optional[str]]] = None,
+    ) -> typing.List[typing.List[float]]:
+        """Embeds a list of documents, using the embedding cache if available.
+
+        Args:
+            documents: The texts to embed.
+            keys: Optional cache keys (such as `md_hash`) for each text. A text
+              without a key is cached under a hash of its content.
+
+        Returns:
+            A list containing one embedding per document, in the same order.
+        """
+        if self.embedding_cache is None:
+            return self.embed_texts(documents)
+        if keys is None:
+            keys = [None] * len(documents)
+        cache_keys = [
+            key if key else content_key(document)
+            for document, key in zip(documents, keys)
+        ]
+        model_name = self.model_key()
+        cached = self.embedding_cache.get_many(
+            model=model_name, task_type=self.task_type, keys=cache_keys
+        )
+        # Embed only the documents that are not in the cache.
+        missing = {}
+        for document, cache_key in zip(documents, cache_keys):
+            if cache_key not in cached and cache_key not in missing:
+                missing[cache_key] = document
+        if missing:
+            new_embeddings = self.embed_texts(list(missing.values()))
+            new_items = list(zip(missing.keys(), new_embeddings))
+            self.embedding_cache.put_many(
+                model=model_name, task_type=self.task_type, items=new_items
+            )
+            cached.update(new_items)
+        logging.info(
+            f"Embedding cache: {len(documents) - len(missing)} hits, "
+            f"{len(missing)} misses."
+        )
+        return [cached[cache_key] for cache_key in cache_keys]
+
+    # Return the name under which the embeddings of this function are cached.
+    # Embeddings with a reduced dimension are cached separately.
+    def model_key(self) -> str:
+        model_name = self.models_config.embedding_model
+        if self.output_dimensionality:
+            return f"{model_name}:{self.output_dimensionality}"
+        return model_name
+
+    # Embed texts with the embedding model. Embeddings with a reduced
+    # dimension are normalized to unit length, since only full-size
+    # embeddings are returned normalized.
+    def embed_texts(self, texts: typing.List[str]) -> typing.List[typing.List[float]]:
+        if not self.output_dimensionality:
+            return self.model.embed(content=texts, task_type=self.task_type)
+        embeddings = self.model.embed(
+            content=texts,
+            task_type=self.task_type,
+            output_dimensionality=self.output_dimensionality,
+        )
+        normalized = []
+        for embedding in embeddings:
+            norm = sum(value * value for value in embedding) ** 0.5
+            normalized.append(
+                [value / norm for value in embedding] if norm > 0 else embedding
+            )
+        return normalized
+
+
+# Return the distance between two embeddings, the same way as Chroma.
+def vector_distance(embedding, query_embedding, space: str = "l2") -> float:
+    embedding = np.asarray(embedding, dtype=np.float32)
+    query = np.asarray(query_embedding, dtype=np.float32)
+    if space == "cosine":
+        norms = np.linalg.norm(embedding) * np.linalg.norm(query)
+        return float(1 - embedding @ query / norms) if norms > 0 else 1.0
+    if space == "ip":
+        return float(1 - embedding @ query)
+    difference = embedding - query
+    return float(difference @ difference)
+
+
+# Chroma clients shared by all callers in this process, keyed by chroma_dir.
+shared_clients = {}
+# Collection handles shared by all callers in this process, keyed by
+# (chroma_dir, collection_name). Each value is (generation, collection).
+shared_collections = {}
+shared_chroma_lock = threading.Lock()
+
+
+# Return the Chroma client of a directory, creating it on the first call.
+def get_shared_client(chroma_dir: str):
+    with shared_chroma_lock:
+        client = shared_clients.get(chroma_dir)
+        if client is None:
+            client = chromadb.PersistentClient(path=chroma_dir)
+            shared_clients[chroma_dir] = client
+        return client
+
+
+# Return the handle of a collection, looking it up only on the first call
+# or after the collection is populated again (its generation changed).
+def get_shared_collection(
+    client, chroma_dir: str, name: str, generation: typing.Optional[int] = None
+):
+    if generation is None:
+        generation = read_generation(chroma_dir, name)
+    key = (chroma_dir, name)
+    with shared_chroma_lock:
+        cached = shared_collections.get(key)
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+    collection = client.get_collection(name=name)
+    with shared_chroma_lock:
+        shared_collections[key] = (generation, collection)
+    return collection
+
+
+# Forget the shared collection handles of a directory (or of one collection
+# in the directory), so that they are looked up again on the next query.
+def refresh_chroma(chroma_dir: str, name: typing.Optional[str] = None) -> None:
+    with shared_chroma_lock:
+        for key in list(shared_collections):
+            if key[0] == chroma_dir and (name is None or key[1] == name):
+                del shared_collections[key]
+
 
 class ChromaEnhanced(RAG):
     """Chroma wrapper"""
 
-    def __init__(self, chroma_dir: str, models_config: Models) -> None:
-        self.client = chromadb.PersistentClient(path=chroma_dir)
+    def __init__(
+        self,
+        chroma_dir: str,
+        models_config: Models,
+        embedding_cache: typing.Optional[EmbeddingCache] = None,
+        page_cache: typing.Optional[PageCache] = None,
+        query_embedding_cache: typing.Optional[QueryEmbeddingCache] = None,
+        output_dimensionality: typing.Optional[int] = None,
+        lexical_search: str = "off",
+        lexical_decisive_ratio: float = DEFAULT_DECISIVE_RATIO,
+    ) -> None:
+        self.client = get_shared_client(chroma_dir)
         self.models_config = models_config
         self.chroma_dir = chroma_dir
+        self.page_cache = page_cache
+        self.query_embedding_cache = query_embedding_cache
+        self.lexical_search = lexical_search
+        self.lexical_decisive_ratio = lexical_decisive_ratio
         self._collection_name: typing.Optional[str] = None
+        # Collection wrappers that use the default embedding function, keyed
+        # by name, so that their query embedding function is reused.
+        self._collections = {}
         # Start the embedding function
         self.embedding_function_instance = GeminiEmbeddingFunction(
-            models_config=self.models_config, task_type="RETRIEVAL_DOCUMENT"
+            models_config=self.models_config,
+            task_type="RETRIEVAL_DOCUMENT",
+            embedding_cache=embedding_cache,
+            output_dimensionality=output_dimensionality,
         )
         logging.info(f"ChromaEnhanced instance initialized for path: {chroma_dir}")
 
@@ -380,7 +548,16 @@ class ChromaEnhanced(RAG):
         # Create the ChromaEnhanced instance
         try:
             chroma_instance = ChromaEnhanced(
-                chroma_dir=resolved_chroma_dir, models_config=product_config.models
+                chroma_dir=resolved_chroma_dir,
+                models_config=product_config.models,
+                embedding_cache=EmbeddingCache.from_product_config(product_config),
+                page_cache=PageCache.from_product_config(product_config),
+                query_embedding_cache=QueryEmbeddingCache.from_product_config(
+                    product_config
+                ),
+                output_dimensionality=chroma_db_conf.output_dimensionality,
+                lexical_search=product_config.lexical_search,
+                lexical_decisive_ratio=product_config.lexical_decisive_ratio,
             )
             logging.info(
                 f"ChromaEnhanced successfully created for path: {resolved_chroma_dir}"
@@ -453,14 +630,49 @@ class ChromaEnhanced(RAG):
             if embedding_function
             else self.embedding_function_instance
         )
+        generation = read_generation(self.chroma_dir, name)
         try:
-            collection = self.client.get_collection(name=name)
+            collection = get_shared_collection(
+                self.client, self.chroma_dir, name, generation
+            )
             if self._collection_name is None:
                 self._collection_name = name
         except Exception as e:
             logging.error(f"Failed to get collection '{name}': {e}")
             raise
-        return ChromaCollectionEnhanced(collection, ef_to_use)
+        lexical_index = None
+        if self.lexical_search != "off":
+            lexical_index = load_collection_lexical_index(
+                self.chroma_dir, name, generation
+            )
+        if embedding_function is None:
+            wrapper = self._collections.get(name)
+            if wrapper is not None and wrapper.collection is collection:
+                wrapper.lexical_index = lexical_index
+                return wrapper
+        wrapper = ChromaCollectionEnhanced(
+            collection,
+            ef_to_use,
+            page_cache=self.page_cache,
+            chroma_dir=self.chroma_dir,
+            query_embedding_cache=self.query_embedding_cache,
+            lexical_index=lexical_index,
+            lexical_search=self.lexical_search,
+            lexical_decisive_ratio=self.lexical_decisive_ratio,
+        )
+        if embedding_function is None:
+            self._collections[name] = wrapper
+        return wrapper
+
+    def refresh(self, name: typing.Optional[str] = None) -> None:
+        """Looks up the collections (or the named collection) again on the
+        next query, for example, after they were deleted or recreated by
+        another process."""
+        refresh_chroma(self.chroma_dir, name)
+        if name is None:
+            self._collections = {}
+        else:
+            self._collections.pop(name, None)
 
     def query_vector_store_to_build(
         self,
@@ -503,21 +715,58 @@ class ChromaEnhanced(RAG):
             raise
 
         # Call the function from docs_retriever
-        return retriever_query_vector_store_to_build(
-            collection=collection_obj,
-            docs_agent_config=target_docs_agent_config,
-            question=question,
-            token_limit=token_limit,
-            results_num=results_num,
-            max_sources=max_sources,
-        )
+        try:
+            return retriever_query_vector_store_to_build(
+                collection=collection_obj,
+                docs_agent_config=target_docs_agent_config,
+                question=question,
+                token_limit=token_limit,
+                results_num=results_num,
+                max_sources=max_sources,
+            )
+        except Exception as e:
+            if "does not exist" not in str(e):
+                raise
+            # The shared collection handle is stale (the collection was
+            # deleted or recreated), so look it up again and retry once.
+            logging.info(f"Refreshing the collection '{target_collection_name}'.")
+            self.refresh(target_collection_name)
+            collection_obj = self.get_collection(name=target_collection_name)
+            return retriever_query_vector_store_to_build(
+                collection=collection_obj,
+                docs_agent_config=target_docs_agent_config,
+                question=question,
+                token_limit=token_limit,
+                results_num=results_num,
+                max_sources=max_sources,
+            )
 
 
 class ChromaCollectionEnhanced:
     """Chroma collection wrapper"""
 
-    def __init__(self, collection, embedding_function_instance) -> None:
+    def __init__(
+        self,
+        collection,
+        embedding_function_instance,
+        page_cache: typing.Optional[PageCache] = None,
+        chroma_dir: typing.Optional[str] = None,
+        query_embedding_cache: typing.Optional[QueryEmbeddingCache] = None,
+        lexical_index: typing.Optional[LexicalIndex] = None,
+        lexical_search: str = "off",
+        lexical_decisive_ratio: float = DEFAULT_DECISIVE_RATIO,
+    ) -> None:
         self.collection = collection
+        # The lexical index is only used if `lexical_search` is not "off"
+        self.lexical_index = lexical_index
+        self.lexical_search = lexical_search
+        self.lexical_decisive_ratio = lexical_decisive_ratio
+        # Pages are only cached if the generation of the collection is known
+        self.page_cache = page_cache if chroma_dir else None
+        self.chroma_dir = chroma_dir
+        self.query_embedding_cache = query_embedding_cache
+        # Created on the first query
+        self._query_embedding_function = None
         # Store the embedding function instance
         self.embedding_function = embedding_function_instance
         # Retrieve the models config from the embedding function instance
@@ -530,13 +779,27 @@ class ChromaCollectionEnhanced:
             )
 
     def query(self, text: str, top_k: int = 1, where: dict = None):
+        """Queries the collection, combining the vector search with the
+        lexical index if `lexical_search` is set."""
+        if (
+            self.lexical_index is None
+            or self.lexical_search == "off"
+            or where is not None
+            or not self._models_config
+        ):
+            return self.vectorQuery(text, top_k=top_k, where=where)
+        return self.hybridQuery(text, top_k=top_k)
+
+    def vectorQuery(
+        self, text: str, top_k: int = 1, where: dict = None, query_embedding=None
+    ):
         """Queries the ChromaDB collection using appropriate query embeddings."""
         if self._models_config:
-            query_ef = GeminiEmbeddingFunction(
-                models_config=self._models_config, task_type="RETRIEVAL_QUERY"
-            )
             # Query the collection using the query embeddings
-            query_embeddings = query_ef([text])
+            if query_embedding is None:
+                query_embeddings = self.embedQuery(text)
+            else:
+                query_embeddings = [query_embedding]
             query_args = {"query_embeddings": query_embeddings, "n_results": top_k}
             if where is not None:
                 query_args["where"] = where
@@ -551,35 +814,183 @@ class ChromaCollectionEnhanced:
             result = self.collection.query(**query_args)
         return ChromaQueryResultEnhanced(result)
 
+    # Return the best lexical matches of a question without embedding it if
+    # the best match is decisive (in the "fast_path" mode). Otherwise, return
+    # the results of the vector search and of the lexical index merged with
+    # reciprocal rank fusion. Results found only by the lexical index get
+    # their distance to the question; results of the fast path get 0.
+    def hybridQuery(self, text: str, top_k: int = 1):
+        lexical_index = self.lexical_index
+        rows, scores = lexical_index.search(text, top_k=top_k)
+        lexical_ids = [lexical_index.ids[row] for row in rows]
+        # The fast path returns entries from the lexical index without
+        # checking the collection, so it needs an up-to-date lexical index.
+        if (
+            self.lexical_search == "fast_path"
+            and self.isLexicalIndexCurrent()
+            and is_decisive(scores, self.lexical_decisive_ratio)
+        ):
+            logging.info("Found a decisive lexical match for the question.")
+            return ChromaQueryResultEnhanced(
+                {
+                    "ids": [lexical_ids],
+                    "documents": [[lexical_index.documents[row] for row in rows]],
+                    "metadatas": [[lexical_index.metadatas[row] for row in rows]],
+                    "distances": [[0.0] * len(rows)],
+                }
+            )
+        query_embedding = self.embedQuery(text)[0]
+        vector_result = self.vectorQuery(
+            text, top_k=top_k, query_embedding=query_embedding
+        ).result
+        entries = {}
+        for index, entry_id in enumerate(vector_result["ids"][0]):
+            entries[entry_id] = (
+                vector_result["documents"][0][index],
+                vector_result["metadatas"][0][index],
+                vector_result["distances"][0][index],
+            )
+        fused_ids = reciprocal_rank_fusion(
+            [vector_result["ids"][0], lexical_ids]
+        )[:top_k]
+        missing_ids = [entry_id for entry_id in fused_ids if entry_id not in entries]
+        if missing_ids:
+            distances = self.entryDistances(missing_ids, query_embedding)
+            for row, entry_id in zip(rows, lexical_ids):
+                if entry_id in distances:
+                    entries[entry_id] = (
+                        lexical_index.documents[row],
+                        lexical_index.metadatas[row],
+                        distances[entry_id],
+                    )
+        # Entries deleted since the lexical index was built are skipped.
+        fused_ids = [entry_id for entry_id in fused_ids if entry_id in entries]
+        return ChromaQueryResultEnhanced(
+            {
+                "ids": [fused_ids],
+                "documents": [[entries[entry_id][0] for entry_id in fused_ids]],
+                "metadatas": [[entries[entry_id][1] for entry_id in fused_ids]],
+                "distances": [[entries[entry_id][2] for entry_id in fused_ids]],
+            }
+        )
+
+    # Return True if the lexical index was built from the current generation
+    # of the collection (or if the generation is unknown). A lexical index
+    # that is older than the collection may contain deleted or changed entries.
+    def isLexicalIndexCurrent(self) -> bool:
+        if not self.chroma_dir:
+            return True
+        return self.lexical_index.generation == read_generation(
+            self.chroma_dir, self.collection.name
+        )
+
+    # Return the distance between a query embedding and each entry of a list
+    # of ids, keyed by id. Ids that are not in the collection are skipped.
+    def entryDistances(self, ids: typing.List[str], query_embedding) -> dict:
+        result = self.collection.get(ids=ids, include=["embeddings"])
+        space = (self.collection.metadata or {}).get("hnsw:space", "l2")
+        return {
+            entry_id: vector_distance(embedding, query_embedding, space)
+            for entry_id, embedding in zip(result["ids"], result["embeddings"])
+        }
+
+    # Return the embedding of a question (as a list of one embedding), using
+    # the query embedding cache if available.
+    def embedQuery(self, text: str):
+        output_dimensionality = getattr(
+            self.embedding_function, "output_dimensionality", None
+        )
+        model_name = self._models_config.embedding_model
+        if output_dimensionality:
+            model_name = f"{model_name}:{output_dimensionality}"
+        task_type = "RETRIEVAL_QUERY"
+        if self.query_embedding_cache is not None:
+            embedding = self.query_embedding_cache.get(model_name, task_type, text)
+            if embedding is not None:
+                return [embedding]
+        if self._query_embedding_function is None:
+            self._query_embedding_function = GeminiEmbeddingFunction(
+                models_config=self._models_config,
+                task_type=task_type,
+                output_dimensionality=output_dimensionality,
+            )
+        query_embeddings = self._query_embedding_function([text])
+        if self.query_embedding_cache is not None:
+            self.query_embedding_cache.put(
+                model_name, task_type, text, query_embeddings[0]
+            )
+        return query_embeddings
+
+    # Return True if each md_hash in a list belongs to an entry in the
+    # collection, which means that the content of these entries is unchanged.
+    def hasMdHashes(self, md_hashes: typing.List[str]) -> bool:
+        unique_md_hashes = list(dict.fromkeys(md_hashes))
+        if not unique_md_hashes:
+            return True
+        get_result = self.collection.get(
+            include=["metadatas"],
+            where={"md_hash": {"$in": unique_md_hashes}},
+        )
+        found = set(
+            (metadata or {}).get("md_hash", None)
+            for metadata in get_result["metadatas"]
+        )
+        return all(md_hash in found for md_hash in unique_md_hashes)
+
     # Return a FullPage (list of Section) that match an origin_uuid
     def getPageOriginUUIDList(self, origin_uuid):
+        return self.getPageOriginUUIDLists([origin_uuid]).get(
+            origin_uuid, FullPage([])
+        )
+
+    # Return a dictionary of FullPage (list of Section) keyed by origin_uuid,
+    # fetching all the pages that match a list of origin_uuids in one query.
+    # Duplicated origin_uuids are only fetched once. If a page cache is set,
+    # only the pages that are not cached for the current generation of the
+    # collection are fetched. Cached pages are shared, so callers must copy
+    # the sections of a page before modifying them.
+    def getPageOriginUUIDLists(self, origin_uuids: typing.Iterable[str]):
+        unique_origin_uuids = list(dict.fromkeys(origin_uuids))
+        if self.page_cache is None:
+            return self._fetchPages(unique_origin_uuids)
+        generation = read_generation(self.chroma_dir, self.collection.name)
+        keys = {
+            origin_uuid: (self.chroma_dir, self.collection.name, generation, origin_uuid)
+            for origin_uuid in unique_origin_uuids
+        }
+        cached_pages = self.page_cache.get_many(keys.values())
+        pages = {}
+        missing_origin_uuids = []
+        for origin_uuid, key in keys.items():
+            if key in cached_pages:
+                pages[origin_uuid] = cached_pages[key]
+            else:
+                missing_origin_uuids.append(origin_uuid)
+        fetched_pages = self._fetchPages(missing_origin_uuids)
+        self.page_cache.put_many(
+            {keys[origin_uuid]: page for origin_uuid, page in fetched_pages.items()}
+        )
+        pages.update(fetched_pages)
+        return {origin_uuid: pages[origin_uuid] for origin_uuid in unique_origin_uuids}
+
+    def _fetchPages(self, unique_origin_uuids: list[str]):
+        if not unique_origin_uuids:
+            return {}
         get_obj = ChromaDBGet(
             self.collection.get(
                 include=["metadatas", "documents"],
-                where={"origin_uuid": {"$eq": origin_uuid}},
+                where={"origin_uuid": {"$in": unique_origin_uuids}},
             )
         )
-        page = []
-        # added_id = []
+        pages = {origin_uuid: [] for origin_uuid in unique_origin_uuids}
         for i in range(len(get_obj.id)):
-            # Makes sure that each ID is only added once
-            # if get_obj.id not in added_id:
-            section = Section(
-                id=get_obj.metadata[i].get("section_id", None),
-                name_id=get_obj.metadata[i].get("name_id", None),
-                page_title=get_obj.metadata[i].get("page_title", None),
-                section_title=get_obj.metadata[i].get("section_title", None),
-                level=get_obj.metadata[i].get("level", None),
-                previous_id=get_obj.metadata[i].get("previous_id", None),
-                parent_tree=get_obj.metadata[i].get("parent_tree", None),
-                token_count=get_obj.metadata[i].get("token_estimate", None),
-                url=get_obj.metadata[i].get("url", None),
-                uuid=get_obj.id[i],
-                content=get_obj.document[i],
+            metadata = get_obj.metadata[i] or {}
+            section = section_from_metadata(
+                metadata, uuid=get_obj.id[i], content=get_obj.document[i]
             )
-            page.append(section)
-        full_page = FullPage(page)
-        return full_page
+            if metadata.get("origin_uuid", None) in pages:
+                pages[metadata["origin_uuid"]].append(section)
+        return {origin_uuid: FullPage(page) for origin_uuid, page in pages.items()}
 
     def getPageSection(self, section_title):
         return self.collection.get(
@@ -590,6 +1001,23 @@ class ChromaCollectionEnhanced:
         return self.embedding_function(text)
 
 
+# Return a Section built from the metadata of an entry in a vector database.
+def section_from_metadata(metadata: dict, uuid: str, content: str) -> Section:
+    return Section(
+        id=metadata.get("section_id", None),
+        name_id=metadata.get("name_id", None),
+        page_title=metadata.get("page_title", None),
+        section_title=metadata.get("section_title", None),
+        level=metadata.get("level", None),
+        previous_id=metadata.get("previous_id", None),
+        parent_tree=metadata.get("parent_tree", None),
+        token_count=metadata.get("token_estimate", None),
+        url=metadata.get("url", None),
+        uuid=uuid,
+        content=content,
+    )
+
+
 class ChromaQueryResultEnhanced:
     """Chroma query result wrapper"""
 
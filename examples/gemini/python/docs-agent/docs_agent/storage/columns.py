@@ -0,0 +1,106 @@
+#
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Memory-mapped columns of strings stored in snapshot directories"""
+
+import bisect
+import json
+import os
+import typing
+
+import numpy as np
+
+
+class StringColumnWriter:
+    """Writes a column of strings as a blob of UTF-8 bytes (`<name>.bin`) and
+    the offset of each string in the blob (`<name>.offsets.npy`)."""
+
+    def __init__(self, snapshot_dir: str, name: str) -> None:
+        self.snapshot_dir = snapshot_dir
+        self.name = name
+        self.blob_file = open(os.path.join(snapshot_dir, f"{name}.bin"), "wb")
+        self.offsets = [0]
+
+    def append(self, value: typing.Optional[str]) -> None:
+        data = ("" if value is None else str(value)).encode("utf-8")
+        self.blob_file.write(data)
+        self.offsets.append(self.offsets[-1] + len(data))
+
+    def close(self) -> None:
+        self.blob_file.close()
+        np.save(
+            os.path.join(self.snapshot_dir, f"{self.name}.offsets.npy"),
+            np.asarray(self.offsets, dtype=np.int64),
+        )
+
+
+class StringColumn:
+    """A memory-mapped column of strings written by `StringColumnWriter`.
+
+    Strings are decoded only when they are accessed, so opening a column
+    does not read the column.
+    """
+
+    def __init__(self, snapshot_dir: str, name: str) -> None:
+        self.offsets = np.load(
+            os.path.join(snapshot_dir, f"{name}.offsets.npy"), mmap_mode="r"
+        )
+        blob_path = os.path.join(snapshot_dir, f"{name}.bin")
+        if os.path.getsize(blob_path) > 0:
+            self.blob = np.memmap(blob_path, dtype=np.uint8, mode="r")
+        else:
+            self.blob = np.zeros(0, dtype=np.uint8)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row) -> str:
+        return self.blob[self.offsets[row] : self.offsets[row + 1]].tobytes().decode(
+            "utf-8"
+        )
+
+
+class MetadataColumn:
+    """A column of metadata dictionaries stored as JSON strings."""
+
+    def __init__(self, column: StringColumn) -> None:
+        self.column = column
+
+    def __len__(self):
+        return len(self.column)
+
+    def __getitem__(self, row) -> dict:
+        return json.loads(self.column[row]) or {}
+
+
+class SortedRows:
+    """The values of a column in sorted order, for binary search."""
+
+    def __init__(self, column: StringColumn, order: np.ndarray) -> None:
+        self.column = column
+        self.order = order
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, position) -> str:
+        return self.column[self.order[position]]
+
+    # Return the rows whose value is equal to `value`, in ascending order.
+    def find(self, value: str) -> np.ndarray:
+        start = bisect.bisect_left(self, value)
+        end = bisect.bisect_right(self, value, lo=start)
+        return np.asarray(self.order[start:end])
@@ -0,0 +1,331 @@
+#
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Persistent, content-addressed cache of embeddings"""
+
+from array import array
+from collections import OrderedDict
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import typing
+
+from absl import logging
+
+from docs_agent.utilities.config import ProductConfig
+from docs_agent.utilities.helpers import resolve_path
+
+
+# The default maximum number of embeddings kept in the cache.
+DEFAULT_MAX_ENTRIES = 1000000
+
+# The default maximum number of question embeddings kept in memory.
+DEFAULT_QUERY_MAX_ENTRIES = 1000
+
+
+def content_key(text: str) -> str:
+    """Returns a cache key derived from the content of a text chunk."""
+    return "sha256:" + hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def normalize_query(text: str) -> str:
+    """Returns the form of a question used as a cache key: case-folded, with
+    leading, trailing and repeated whitespace removed."""
+    return " ".join(text.split()).casefold()
+
+
+class EmbeddingCache:
+    """An on-disk cache of embeddings stored in a SQLite database.
+
+    Entries are keyed by `(embedding_model, task_type, key)`, where `key` is
+    the `md_hash` of a text chunk or, if a text has no `md_hash`, a hash of
+    its content. Vectors are stored as float32 blobs. When the cache holds
+    more than `max_entries` embeddings, the least recently used entries are
+    evicted.
+    """
+
+    def __init__(self, path: str, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.path = resolve_path(path)
+        self.max_entries = int(max_entries)
+        self.lock = threading.Lock()
+        parent_dir = os.path.dirname(self.path)
+        if parent_dir:
+            os.makedirs(parent_dir, exist_ok=True)
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self.connection:
+            self.connection.execute(
+                """CREATE TABLE IF NOT EXISTS embeddings (
+                    model TEXT NOT NULL,
+                    task_type TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (model, task_type, key)
+                )"""
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS embeddings_last_used "
+                "ON embeddings (last_used)"
+            )
+        logging.info(f"Opened the embedding cache: {self.path}")
+
+    @staticmethod
+    def from_product_config(
+        product_config: ProductConfig,
+    ) -> typing.Optional["EmbeddingCache"]:
+        """Returns the embedding cache configured for a product, if any."""
+        cache_path = getattr(product_config, "embedding_cache_path", None)
+        if cache_path is None or cache_path == "":
+            return None
+        max_entries = getattr(
+            product_config, "embedding_cache_max_entries", DEFAULT_MAX_ENTRIES
+        )
+        try:
+            return EmbeddingCache(path=cache_path, max_entries=max_entries)
+        except sqlite3.Error as e:
+            logging.error(f"Cannot open the embedding cache {cache_path}: {e}")
+            return None
+
+    def get_many(
+        self, model: str, task_type: str, keys: typing.List[str]
+    ) -> typing.Dict[str, typing.List[float]]:
+        """Returns the cached embeddings found for the given keys."""
+        found = {}
+        if not keys:
+            return found
+        unique_keys = list(dict.fromkeys(keys))
+        with self.lock:
+            # Stay well below SQLite's limit on the number of query parameters.
+            for start in range(0, len(unique_keys), 500):
+                key_batch = unique_keys[start : start + 500]
+                placeholders = ",".join("?" * len(key_batch))
+                rows = self.connection.execute(
+                    "SELECT key, vector FROM embeddings WHERE model = ? "
+                    f"AND task_type = ? AND key IN ({placeholders})",
+                    [model, task_type, *key_batch],
+                ).fetchall()
+                for key, vector in rows:
+                    found[key] = array("f", vector).tolist()
+            if found:
+                now = time.time()
+                with self.connection:
+                    self.connection.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE model = ? "
+                        "AND task_type = ? AND key = ?",
+                        [(now, model, task_type, key) for key in found],
+                    )
+        return found
+
+    def put_many(
+        self,
+        model: str,
+        task_type: str,
+        items: typing.List[typing.Tuple[str, typing.List[float]]],
+    ) -> None:
+        """Stores a list of `(key, embedding)` pairs in the cache."""
+        if not items:
+            return
+        now = time.time()
+        rows = [
+            (model, task_type, key, array("f", vector).tobytes(), now)
+            for key, vector in items
+        ]
+        with self.lock:
+            with self.connection:
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO embeddings "
+                    "(model, task_type, key, vector, last_used) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+            self._evict(self.max_entries)
+
+    def prune(self, max_entries: typing.Optional[int] = None) -> int:
+        """Evicts the least recently used entries beyond `max_entries`.
+
+        Returns:
+            The number of evicted entries.
+        """
+        if max_entries is None:
+            max_entries = self.max_entries
+        with self.lock:
+            return self._evict(int(max_entries))
+
+    def clear(self) -> int:
+        """Deletes all entries in the cache and returns their number."""
+        with self.lock:
+            with self.connection:
+                cursor = self.connection.execute("DELETE FROM embeddings")
+            self.connection.execute("VACUUM")
+            return cursor.rowcount
+
+    def stats(self) -> typing.List[typing.Tuple[str, str, int]]:
+        """Returns the number of entries for each `(model, task_type)` pair."""
+        with self.lock:
+            return self.connection.execute(
+                "SELECT model, task_type, COUNT(*) FROM embeddings "
+                "GROUP BY model, task_type ORDER BY model, task_type"
+            ).fetchall()
+
+    def count(self) -> int:
+        """Returns the total number of entries in the cache."""
+        with self.lock:
+            return self.connection.execute(
+                "SELECT COUNT(*) FROM embeddings"
+            ).fetchone()[0]
+
+    def close(self) -> None:
+        with self.lock:
+            self.connection.close()
+
+    # Deletes the least recently used entries so that at most `max_entries`
+    # remain. The caller must hold `self.lock`.
+    def _evict(self, max_entries: int) -> int:
+        total = self.connection.execute(
+            "SELECT COUNT(*) FROM embeddings"
+        ).fetchone()[0]
+        excess = total - max(0, max_entries)
+        if excess <= 0:
+            return 0
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM embeddings WHERE rowid IN (SELECT rowid FROM "
+                "embeddings ORDER BY last_used ASC LIMIT ?)",
+                (excess,),
+            )
+        logging.info(f"Evicted {excess} entries from the embedding cache.")
+        return excess
+
+
+class QueryEmbeddingCache:
+    """An in-memory LRU cache of question embeddings.
+
+    Entries are keyed by `(embedding_model, task_type, question)`, where
+    `question` is normalized with `normalize_query`, so that repeated
+    questions are only embedded once per process. If a `disk_cache` is
+    provided, question embeddings are also stored in it (keyed by a hash of
+    the normalized question), so that they survive restarts.
+
+    Attributes:
+        max_entries (int): The maximum number of embeddings kept in memory.
+        disk_cache (EmbeddingCache): The optional on-disk embedding cache.
+        hits (int): The number of lookups that found a cached embedding.
+        misses (int): The number of lookups that did not find an embedding.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_QUERY_MAX_ENTRIES,
+        disk_cache: typing.Optional[EmbeddingCache] = None,
+    ) -> None:
+        self.max_entries = int(max_entries)
+        self.disk_cache = disk_cache
+        self.lock = threading.Lock()
+        self.embeddings = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def from_product_config(
+        product_config: ProductConfig,
+    ) -> typing.Optional["QueryEmbeddingCache"]:
+        """Returns the question embedding cache shared by all collections that
+        use the same settings, or None if the cache is disabled."""
+        max_entries = int(
+            getattr(
+                product_config,
+                "query_embedding_cache_max_entries",
+                DEFAULT_QUERY_MAX_ENTRIES,
+            )
+        )
+        if max_entries <= 0:
+            return None
+        cache_path = getattr(product_config, "embedding_cache_path", None) or None
+        key = (max_entries, resolve_path(cache_path) if cache_path else None)
+        with shared_query_caches_lock:
+            if key not in shared_query_caches:
+                shared_query_caches[key] = QueryEmbeddingCache(
+                    max_entries=max_entries,
+                    disk_cache=EmbeddingCache.from_product_config(product_config),
+                )
+            return shared_query_caches[key]
+
+    def get(
+        self, model: str, task_type: str, question: str
+    ) -> typing.Optional[typing.List[float]]:
+        """Returns the cached embedding of a question, or None."""
+        normalized = normalize_query(question)
+        key = (model, task_type, normalized)
+        with self.lock:
+            embedding = self.embeddings.get(key)
+            if embedding is not None:
+                self.embeddings.move_to_end(key)
+                self.hits += 1
+                return embedding
+        if self.disk_cache is not None:
+            disk_key = content_key(normalized)
+            found = self.disk_cache.get_many(
+                model=model, task_type=task_type, keys=[disk_key]
+            )
+            if disk_key in found:
+                self._remember(key, found[disk_key])
+                with self.lock:
+                    self.hits += 1
+                return found[disk_key]
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def put(
+        self, model: str, task_type: str, question: str, embedding: typing.List[float]
+    ) -> None:
+        """Stores the embedding of a question."""
+        normalized = normalize_query(question)
+        embedding = [float(value) for value in embedding]
+        self._remember((model, task_type, normalized), embedding)
+        if self.disk_cache is not None:
+            self.disk_cache.put_many(
+                model=model,
+                task_type=task_type,
+                items=[(content_key(normalized), embedding)],
+            )
+
+    def stats(self) -> dict:
+        """Returns the counters of the cache for monitoring."""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.embeddings),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _remember(self, key: tuple, embedding: typing.List[float]) -> None:
+        with self.lock:
+            self.embeddings[key] = embedding
+            self.embeddings.move_to_end(key)
+            while len(self.embeddings) > self.max_entries:
+                self.embeddings.popitem(last=False)
+
+
+# Question embedding caches shared by all collections in this process, keyed
+# by max entries and the path of the on-disk cache.
+shared_query_caches = {}
+shared_query_caches_lock = threading.Lock()
@@ -0,0 +1,744 @@
+#
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""In-memory flat index of a Chroma collection for exact search with NumPy"""
+
+import json
+import os
+import shutil
+import threading
+import typing
+
+from absl import logging
+import numpy as np
+
+from docs_agent.storage.base import RAG
+from docs_agent.storage.chroma import (
+    ChromaCollectionEnhanced,
+    ChromaQueryResultEnhanced,
+    GeminiEmbeddingFunction,
+    section_from_metadata,
+)
+from docs_agent.storage.columns import (
+    MetadataColumn,
+    SortedRows,
+    StringColumn,
+    StringColumnWriter,
+)
+from docs_agent.storage.embedding_cache import QueryEmbeddingCache
+from docs_agent.storage.lexical_index import (
+    DEFAULT_DECISIVE_RATIO,
+    LexicalIndex,
+    load_collection_lexical_index,
+)
+from docs_agent.storage.page_cache import read_generation
+from docs_agent.postprocess.docs_retriever import FullPage
+from docs_agent.postprocess.docs_retriever import (
+    query_vector_store_to_build as retriever_query_vector_store_to_build,
+    SectionDistance,
+)
+from docs_agent.utilities import helpers
+from docs_agent.utilities.config import Models, ProductConfig
+from docs_agent.utilities.helpers import resolve_path
+
+
+# The version of the snapshot format written by `export_flat_index`.
+SNAPSHOT_FORMAT = 2
+
+MANIFEST_FILE = "manifest.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+SCALES_FILE = "scales.npy"
+FULL_EMBEDDINGS_FILE = "full_embeddings.npy"
+SQUARED_NORMS_FILE = "squared_norms.npy"
+
+# The types in which embeddings can be stored in a snapshot.
+VECTOR_DTYPES = ("float32", "float16", "int8")
+
+# When embeddings are not stored in full precision, this many times the
+# requested number of results are selected and re-ranked using the full
+# precision embeddings.
+RERANK_FACTOR = 4
+
+# The number of rows of a quantized matrix converted to float32 at a time.
+BLOCK_SIZE = 256
+
+# The metadata fields that can be looked up without decoding the metadata of
+# each entry. For each of these fields, the snapshot stores the rows of the
+# entries sorted by value.
+INDEXED_FIELDS = ("origin_uuid", "md_hash", "section_title")
+
+# The distance functions of Chroma collections (the `hnsw:space` metadata).
+SUPPORTED_SPACES = ("l2", "cosine", "ip")
+
+
+# Return the directory of the flat index exported from a Chroma collection.
+def get_flat_index_dir(chroma_dir: str, collection_name: str) -> str:
+    return os.path.join(chroma_dir, f"{collection_name}.flat")
+
+
+# Return embeddings stored in a smaller type and, for int8, the scale of each
+# embedding (its largest absolute value divided by 127).
+def quantize_vectors(
+    vectors: np.ndarray, vector_dtype: str
+) -> tuple[np.ndarray, typing.Optional[np.ndarray]]:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vector_dtype == "float32":
+        return vectors, None
+    if vector_dtype == "float16":
+        return vectors.astype(np.float16), None
+    if vector_dtype == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127 if vectors.size else np.zeros(0)
+        scales = np.where(scales > 0, scales, 1).astype(np.float32)
+        quantized = np.clip(np.rint(vectors / scales[:, None]), -127, 127)
+        return quantized.astype(np.int8), scales
+    raise ValueError(f"Unsupported vector dtype: {vector_dtype}")
+
+
+# Return the dot products of a query and all embeddings of a matrix. A
+# matrix that is not float32 is converted in small blocks, which keeps the
+# conversion in the CPU cache.
+def dot_products(
+    embeddings: np.ndarray,
+    query: np.ndarray,
+    scales: typing.Optional[np.ndarray] = None,
+) -> np.ndarray:
+    if embeddings.dtype == np.float32:
+        products = embeddings @ query
+    else:
+        products = np.empty(len(embeddings), dtype=np.float32)
+        block = np.empty((min(BLOCK_SIZE, len(embeddings)), embeddings.shape[1]), np.float32)
+        for start in range(0, len(embeddings), BLOCK_SIZE):
+            rows = embeddings[start : start + BLOCK_SIZE]
+            block[: len(rows)] = rows
+            np.dot(block[: len(rows)], query, out=products[start : start + len(rows)])
+    if scales is not None:
+        products *= scales
+    return products
+
+
+# Return the distances between a query and embeddings from their dot
+# products, the same way as Chroma.
+def distances_from_dot_products(
+    products: np.ndarray, squared_norms: np.ndarray, query: np.ndarray, space: str
+) -> np.ndarray:
+    if space == "l2":
+        return squared_norms - 2 * products + query @ query
+    if space == "cosine":
+        norms = np.sqrt(squared_norms) * np.linalg.norm(query)
+        return 1 - products / np.where(norms > 0, norms, 1)
+    return 1 - products
+
+
+# Return the rows and distances of the `top_k` embeddings nearest to a query,
+# sorted by distance. If `full_embeddings` is set, the nearest candidates in
+# `embeddings` (which may be quantized) are re-ranked using the full
+# precision embeddings. Rows that are False in `mask` are never returned.
+def search_vectors(
+    embeddings: np.ndarray,
+    query: np.ndarray,
+    top_k: int,
+    squared_norms: np.ndarray,
+    space: str = "l2",
+    scales: typing.Optional[np.ndarray] = None,
+    full_embeddings: typing.Optional[np.ndarray] = None,
+    mask: typing.Optional[np.ndarray] = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    distances = distances_from_dot_products(
+        dot_products(embeddings, query, scales), squared_norms, query, space
+    )
+    if mask is not None:
+        distances = np.where(mask, distances, np.inf)
+    top_k = min(int(top_k), len(distances))
+    if top_k <= 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    candidate_count = top_k if full_embeddings is None else top_k * RERANK_FACTOR
+    rows = select_nearest(distances, candidate_count)
+    rows = rows[np.isfinite(distances[rows])]
+    if full_embeddings is None:
+        return rows, distances[rows]
+    # Only the rows of the candidates are read from the full precision file.
+    rows = np.sort(rows)
+    distances = distances_from_dot_products(
+        np.asarray(full_embeddings[rows], dtype=np.float32) @ query,
+        squared_norms[rows],
+        query,
+        space,
+    )
+    nearest = select_nearest(distances, top_k)
+    return rows[nearest], distances[nearest]
+
+
+# Return the positions of the `count` smallest distances, sorted by distance.
+def select_nearest(distances: np.ndarray, count: int) -> np.ndarray:
+    count = min(count, len(distances))
+    if count < len(distances):
+        positions = np.argpartition(distances, count - 1)[:count]
+    else:
+        positions = np.arange(len(distances))
+    return positions[np.argsort(distances[positions], kind="stable")]
+
+
+# Export all entries of a Chroma collection to a snapshot directory.
+# The embeddings are written into a float32 `.npy` matrix (one row per
+# entry) and the ids, documents and metadata into string columns in the same
+# order, so that every file can be memory-mapped. If `vector_dtype` is not
+# float32, the embeddings are stored as float16 or int8 (with a scale per
+# embedding), and a float32 copy is also written for re-ranking. The new
+# snapshot replaces an existing snapshot only once it is complete.
+def export_flat_index(
+    collection,
+    index_dir: str,
+    generation: int = 0,
+    page_size: int = 1000,
+    vector_dtype: str = "float32",
+) -> int:
+    space = (collection.metadata or {}).get("hnsw:space", "l2")
+    if space not in SUPPORTED_SPACES:
+        raise ValueError(f"Unsupported distance function: {space}")
+    if vector_dtype not in VECTOR_DTYPES:
+        raise ValueError(f"Unsupported vector dtype: {vector_dtype}")
+    count = collection.count()
+    temp_dir = index_dir + ".tmp"
+    shutil.rmtree(temp_dir, ignore_errors=True)
+    os.makedirs(temp_dir)
+    columns = {
+        name: StringColumnWriter(temp_dir, name)
+        for name in ("id", "document", "metadata") + INDEXED_FIELDS
+    }
+    indexed_values = {field: [] for field in ("id",) + INDEXED_FIELDS}
+    embeddings = None
+    full_embeddings = None
+    scales = np.ones(count, dtype=np.float32)
+    squared_norms = np.zeros(count, dtype=np.float32)
+    row = 0
+    for offset in range(0, count, page_size):
+        page = collection.get(
+            include=["embeddings", "documents", "metadatas"],
+            limit=page_size,
+            offset=offset,
+        )
+        if len(page["ids"]) == 0:
+            break
+        page_embeddings = np.asarray(page["embeddings"], dtype=np.float32)
+        if embeddings is None:
+            shape = (count, page_embeddings.shape[1])
+            embeddings = np.lib.format.open_memmap(
+                os.path.join(temp_dir, EMBEDDINGS_FILE),
+                mode="w+",
+                dtype=np.dtype(vector_dtype),
+                shape=shape,
+            )
+            if vector_dtype != "float32":
+                full_embeddings = np.lib.format.open_memmap(
+                    os.path.join(temp_dir, FULL_EMBEDDINGS_FILE),
+                    mode="w+",
+                    dtype=np.float32,
+                    shape=shape,
+                )
+        end = row + len(page["ids"])
+        stored_embeddings, page_scales = quantize_vectors(page_embeddings, vector_dtype)
+        embeddings[row:end] = stored_embeddings
+        if page_scales is not None:
+            scales[row:end] = page_scales
+        if full_embeddings is not None:
+            full_embeddings[row:end] = page_embeddings
+        squared_norms[row:end] = np.einsum(
+            "ij,ij->i", page_embeddings, page_embeddings
+        )
+        row = end
+        for entry_id, document, metadata in zip(
+            page["ids"], page["documents"], page["metadatas"]
+        ):
+            metadata = metadata or {}
+            columns["id"].append(entry_id)
+            indexed_values["id"].append(entry_id)
+            columns["document"].append(document)
+            columns["metadata"].append(json.dumps(metadata, separators=(",", ":")))
+            for field in INDEXED_FIELDS:
+                value = metadata.get(field, None)
+                value = "" if value is None else str(value)
+                columns[field].append(value)
+                indexed_values[field].append(value)
+    for column in columns.values():
+        column.close()
+    if row != count:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        raise RuntimeError(
+            f"The collection '{collection.name}' changed during the export."
+        )
+    if embeddings is None:
+        # An empty collection
+        np.save(os.path.join(temp_dir, EMBEDDINGS_FILE), np.zeros((0, 0), np.float32))
+        dimension = 0
+    else:
+        embeddings.flush()
+        dimension = embeddings.shape[1]
+        del embeddings
+        if full_embeddings is not None:
+            full_embeddings.flush()
+            del full_embeddings
+    np.save(os.path.join(temp_dir, SQUARED_NORMS_FILE), squared_norms)
+    if vector_dtype == "int8":
+        np.save(os.path.join(temp_dir, SCALES_FILE), scales)
+    for field, values in indexed_values.items():
+        # A stable sort keeps the rows of equal values in ascending order.
+        order = sorted(range(len(values)), key=values.__getitem__)
+        np.save(
+            os.path.join(temp_dir, f"{field}.order.npy"),
+            np.asarray(order, dtype=np.int64),
+        )
+    with open(os.path.join(temp_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "format": SNAPSHOT_FORMAT,
+                "collection_name": collection.name,
+                "count": row,
+                "dimension": dimension,
+                "space": space,
+                "vector_dtype": vector_dtype,
+                "generation": generation,
+                "indexed_fields": list(INDEXED_FIELDS),
+            },
+            f,
+        )
+    old_dir = index_dir + ".old"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.isdir(index_dir):
+        os.replace(index_dir, old_dir)
+    os.replace(temp_dir, index_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return row
+
+
+class FlatIndex:
+    """A read-only snapshot of a collection searched exactly with NumPy.
+
+    Every file of the snapshot is memory-mapped and nothing is copied when it
+    is opened, so processes that open the same snapshot (such as the workers
+    of a web app) share its pages in the operating system's page cache, and
+    opening it takes the same time regardless of the number of entries.
+    Documents and metadata are decoded only for the entries that are returned.
+
+    A search computes the distances between the query and all embeddings in
+    a single matrix-vector product and selects the top results with
+    `argpartition`. Distances are computed the same way as in Chroma (the
+    squared L2 distance by default). If the embeddings are stored as float16
+    or int8, the top candidates are re-ranked using the float32 embeddings,
+    of which only the rows of the candidates are read.
+
+    Attributes:
+        index_dir (str): The directory of the snapshot.
+        name (str): The name of the exported collection.
+        space (str): The distance function (`l2`, `cosine` or `ip`).
+        generation (int): The generation of the collection when it was exported.
+        ids (StringColumn): The ids of the entries.
+        documents (StringColumn): The documents of the entries.
+        metadatas (MetadataColumn): The metadata of the entries.
+        vector_dtype (str): The type of the stored embeddings (`float32`,
+            `float16` or `int8`).
+        embeddings (np.ndarray): The memory-mapped matrix of embeddings.
+        scales (np.ndarray): The scale of each int8 embedding, or None.
+        full_embeddings (np.ndarray): The memory-mapped float32 embeddings
+            used for re-ranking, or None if `embeddings` is float32.
+        squared_norms (np.ndarray): The squared norm of each embedding.
+    """
+
+    def __init__(self, index_dir: str) -> None:
+        self.index_dir = index_dir
+        with open(
+            os.path.join(index_dir, MANIFEST_FILE), "r", encoding="utf-8"
+        ) as f:
+            manifest = json.load(f)
+        if manifest.get("format", 1) != SNAPSHOT_FORMAT:
+            raise ValueError(
+                f"Unsupported flat index format in {index_dir}. "
+                "Run `agent populate` again to export the collection."
+            )
+        self.name = manifest.get("collection_name", "")
+        self.space = manifest.get("space", "l2")
+        self.vector_dtype = manifest.get("vector_dtype", "float32")
+        self.generation = int(manifest.get("generation", 0))
+        self.ids = StringColumn(index_dir, "id")
+        self.documents = StringColumn(index_dir, "document")
+        self.metadatas = MetadataColumn(StringColumn(index_dir, "metadata"))
+        self.sorted_rows = {
+            field: SortedRows(
+                StringColumn(index_dir, field),
+                np.load(os.path.join(index_dir, f"{field}.order.npy"), mmap_mode="r"),
+            )
+            for field in manifest.get("indexed_fields", [])
+        }
+        # Snapshots exported before ids were sorted are searched linearly.
+        id_order_path = os.path.join(index_dir, "id.order.npy")
+        self.sorted_ids = None
+        if os.path.isfile(id_order_path):
+            self.sorted_ids = SortedRows(
+                self.ids, np.load(id_order_path, mmap_mode="r")
+            )
+        if len(self.ids) > 0:
+            self.embeddings = np.load(
+                os.path.join(index_dir, EMBEDDINGS_FILE), mmap_mode="r"
+            )
+            self.squared_norms = np.load(
+                os.path.join(index_dir, SQUARED_NORMS_FILE), mmap_mode="r"
+            )
+        else:
+            self.embeddings = np.zeros((0, 0), dtype=np.float32)
+            self.squared_norms = np.zeros(0, dtype=np.float32)
+        self.scales = None
+        self.full_embeddings = None
+        if len(self.ids) > 0 and self.vector_dtype == "int8":
+            self.scales = np.load(os.path.join(index_dir, SCALES_FILE), mmap_mode="r")
+        full_embeddings_path = os.path.join(index_dir, FULL_EMBEDDINGS_FILE)
+        if len(self.ids) > 0 and os.path.isfile(full_embeddings_path):
+            self.full_embeddings = np.load(full_embeddings_path, mmap_mode="r")
+
+    def __len__(self):
+        return len(self.ids)
+
+    # Return the rows and distances of the `top_k` entries nearest to a
+    # query embedding, sorted by distance.
+    def search(
+        self, query_embedding, top_k: int = 1, where: typing.Optional[dict] = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        if len(self) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        if query.shape[0] != self.embeddings.shape[1]:
+            raise ValueError(
+                f"Query embedding dimension {query.shape[0]} does not match "
+                f"the index dimension {self.embeddings.shape[1]}."
+            )
+        return search_vectors(
+            self.embeddings,
+            query,
+            top_k,
+            self.squared_norms,
+            space=self.space,
+            scales=self.scales,
+            full_embeddings=self.full_embeddings,
+            mask=self.matchWhere(where) if where is not None else None,
+        )
+
+    # Return the rows (in ascending order) of the entries whose metadata
+    # field is equal to one of the values.
+    def findRows(self, field: str, values: typing.Iterable) -> np.ndarray:
+        values = list(dict.fromkeys(values))
+        if field in self.sorted_rows:
+            rows = [
+                self.sorted_rows[field].find(str(value))
+                for value in values
+                if value is not None and value != ""
+            ]
+            if not rows:
+                return np.zeros(0, dtype=np.int64)
+            return np.sort(np.concatenate(rows))
+        value_set = set(values)
+        return np.asarray(
+            [
+                row
+                for row in range(len(self))
+                if self.metadatas[row].get(field, None) in value_set
+            ],
+            dtype=np.int64,
+        )
+
+    # Return the row of each id, or -1 for ids that are not in the index.
+    def findIds(self, ids: typing.Iterable[str]) -> np.ndarray:
+        ids = list(ids)
+        if self.sorted_ids is None:
+            positions = {entry_id: position for position, entry_id in enumerate(ids)}
+            rows = np.full(len(ids), -1, dtype=np.int64)
+            for row in range(len(self)):
+                position = positions.get(self.ids[row], None)
+                if position is not None:
+                    rows[position] = row
+            return rows
+        rows = [self.sorted_ids.find(str(entry_id)) for entry_id in ids]
+        return np.asarray(
+            [found[0] if len(found) > 0 else -1 for found in rows], dtype=np.int64
+        )
+
+    # Return the distances between a query embedding and the embeddings of
+    # some rows, computed the same way as in `search`.
+    def distancesAt(self, query_embedding, rows: np.ndarray) -> np.ndarray:
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        rows = np.asarray(rows, dtype=np.int64)
+        if self.full_embeddings is not None:
+            products = np.asarray(self.full_embeddings[rows], dtype=np.float32) @ query
+        else:
+            products = dot_products(
+                self.embeddings[rows],
+                query,
+                self.scales[rows] if self.scales is not None else None,
+            )
+        return distances_from_dot_products(
+            products, self.squared_norms[rows], query, self.space
+        )
+
+    # Return a boolean mask of the entries whose metadata match a filter.
+    # Supports the `{key: value}`, `{key: {"$eq": value}}` and
+    # `{key: {"$in": [values]}}` filters of Chroma.
+    def matchWhere(self, where: dict) -> np.ndarray:
+        mask = np.ones(len(self), dtype=bool)
+        for key, condition in where.items():
+            if isinstance(condition, dict):
+                if set(condition) == {"$eq"}:
+                    values = [condition["$eq"]]
+                elif set(condition) == {"$in"}:
+                    values = list(condition["$in"])
+                else:
+                    raise ValueError(f"Unsupported filter: {condition}")
+            else:
+                values = [condition]
+            key_mask = np.zeros(len(self), dtype=bool)
+            key_mask[self.findRows(key, values)] = True
+            mask &= key_mask
+        return mask
+
+
+class FlatIndexCollection(ChromaCollectionEnhanced):
+    """Collection wrapper that queries a flat index instead of Chroma.
+
+    It has the same methods (and results) as `ChromaCollectionEnhanced`.
+    """
+
+    def __init__(
+        self,
+        flat_index: FlatIndex,
+        embedding_function_instance,
+        query_embedding_cache: typing.Optional[QueryEmbeddingCache] = None,
+        lexical_index: typing.Optional[LexicalIndex] = None,
+        lexical_search: str = "off",
+        lexical_decisive_ratio: float = DEFAULT_DECISIVE_RATIO,
+    ) -> None:
+        super().__init__(
+            None,
+            embedding_function_instance,
+            query_embedding_cache=query_embedding_cache,
+            lexical_index=lexical_index,
+            lexical_search=lexical_search,
+            lexical_decisive_ratio=lexical_decisive_ratio,
+        )
+        self.flat_index = flat_index
+        self.name = flat_index.name
+
+    def isLexicalIndexCurrent(self) -> bool:
+        """Returns True if the lexical index was built from the same
+        generation of the collection as the flat index."""
+        return self.lexical_index.generation == self.flat_index.generation
+
+    def vectorQuery(
+        self, text: str, top_k: int = 1, where: dict = None, query_embedding=None
+    ):
+        """Queries the flat index using the embedding of a question."""
+        if query_embedding is None:
+            query_embedding = self.embedQuery(text)[0]
+        rows, distances = self.flat_index.search(
+            query_embedding, top_k=top_k, where=where
+        )
+        return ChromaQueryResultEnhanced(
+            {
+                "ids": [[self.flat_index.ids[row] for row in rows]],
+                "documents": [[self.flat_index.documents[row] for row in rows]],
+                "metadatas": [[self.flat_index.metadatas[row] for row in rows]],
+                "distances": [[float(distance) for distance in distances]],
+            }
+        )
+
+    def entryDistances(self, ids: typing.List[str], query_embedding) -> dict:
+        rows = self.flat_index.findIds(ids)
+        found = rows >= 0
+        distances = self.flat_index.distancesAt(query_embedding, rows[found])
+        return {
+            entry_id: float(distance)
+            for entry_id, distance in zip(
+                [entry_id for entry_id, ok in zip(ids, found) if ok], distances
+            )
+        }
+
+    def hasMdHashes(self, md_hashes: typing.List[str]) -> bool:
+        return all(
+            len(self.flat_index.findRows("md_hash", [md_hash])) > 0
+            for md_hash in dict.fromkeys(md_hashes)
+        )
+
+    # Return a dictionary of FullPage (list of Section) keyed by origin_uuid.
+    def getPageOriginUUIDLists(self, origin_uuids: typing.Iterable[str]):
+        pages = {}
+        for origin_uuid in dict.fromkeys(origin_uuids):
+            pages[origin_uuid] = FullPage(
+                [
+                    section_from_metadata(
+                        self.flat_index.metadatas[row],
+                        uuid=self.flat_index.ids[row],
+                        content=self.flat_index.documents[row],
+                    )
+                    for row in self.flat_index.findRows("origin_uuid", [origin_uuid])
+                ]
+            )
+        return pages
+
+    def getPageSection(self, section_title):
+        rows = self.flat_index.findRows("section_title", [section_title])
+        return {
+            "ids": [self.flat_index.ids[row] for row in rows],
+            "metadatas": [self.flat_index.metadatas[row] for row in rows],
+        }
+
+
+# Flat indexes shared by all callers in this process, keyed by index
+# directory. Each value is (modification time of the manifest, FlatIndex).
+shared_flat_indexes = {}
+shared_flat_indexes_lock = threading.Lock()
+
+
+# Return the flat index in a directory, loading it again if it was exported
+# again since it was loaded.
+def load_flat_index(index_dir: str) -> FlatIndex:
+    manifest_path = os.path.join(index_dir, MANIFEST_FILE)
+    try:
+        mtime = os.stat(manifest_path).st_mtime_ns
+    except OSError:
+        raise FileNotFoundError(
+            f"Flat index not found: {index_dir}. Run `agent populate` first."
+        )
+    with shared_flat_indexes_lock:
+        cached = shared_flat_indexes.get(index_dir)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        flat_index = FlatIndex(index_dir)
+        shared_flat_indexes[index_dir] = (mtime, flat_index)
+        logging.info(f"Loaded {len(flat_index)} entries from the flat index: {index_dir}")
+        return flat_index
+
+
+class FlatIndexRAG(RAG):
+    """RAG backend that searches flat indexes exported from Chroma collections."""
+
+    def __init__(
+        self,
+        chroma_dir: str,
+        models_config: Models,
+        query_embedding_cache: typing.Optional[QueryEmbeddingCache] = None,
+        output_dimensionality: typing.Optional[int] = None,
+        lexical_search: str = "off",
+        lexical_decisive_ratio: float = DEFAULT_DECISIVE_RATIO,
+    ) -> None:
+        self.chroma_dir = chroma_dir
+        self.models_config = models_config
+        self.query_embedding_cache = query_embedding_cache
+        self.lexical_search = lexical_search
+        self.lexical_decisive_ratio = lexical_decisive_ratio
+        self._collection_name: typing.Optional[str] = None
+        self._collections = {}
+        self.embedding_function_instance = GeminiEmbeddingFunction(
+            models_config=self.models_config,
+            task_type="RETRIEVAL_DOCUMENT",
+            output_dimensionality=output_dimensionality,
+        )
+
+    @staticmethod
+    def from_product_config(product_config: ProductConfig) -> "FlatIndexRAG":
+        """Creates a FlatIndexRAG instance from a ProductConfig."""
+        for db_conf in product_config.db_configs:
+            if db_conf.db_type == "chroma" and db_conf.vector_db_dir:
+                return FlatIndexRAG(
+                    chroma_dir=resolve_path(db_conf.vector_db_dir),
+                    models_config=product_config.models,
+                    query_embedding_cache=QueryEmbeddingCache.from_product_config(
+                        product_config
+                    ),
+                    output_dimensionality=db_conf.output_dimensionality,
+                    lexical_search=product_config.lexical_search,
+                    lexical_decisive_ratio=product_config.lexical_decisive_ratio,
+                )
+        logging.error("Chroma vector_db_dir is missing in the configuration.")
+        raise ValueError("Chroma vector_db_dir is missing in the configuration.")
+
+    def embedding_function(self, *args, **kwargs) -> GeminiEmbeddingFunction:
+        return self.embedding_function_instance
+
+    def get_collection(self, name, embedding_function=None):
+        flat_index = load_flat_index(get_flat_index_dir(self.chroma_dir, name))
+        generation = read_generation(self.chroma_dir, name)
+        if flat_index.generation != generation:
+            logging.warning(
+                f"The flat index of '{name}' is older than the Chroma collection."
+            )
+        if self._collection_name is None:
+            self._collection_name = name
+        lexical_index = None
+        if self.lexical_search != "off":
+            lexical_index = load_collection_lexical_index(
+                self.chroma_dir, name, generation
+            )
+        collection = self._collections.get(name)
+        if (
+            embedding_function is None
+            and collection is not None
+            and collection.flat_index is flat_index
+        ):
+            collection.lexical_index = lexical_index
+            return collection
+        collection = FlatIndexCollection(
+            flat_index,
+            embedding_function or self.embedding_function_instance,
+            query_embedding_cache=self.query_embedding_cache,
+            lexical_index=lexical_index,
+            lexical_search=self.lexical_search,
+            lexical_decisive_ratio=self.lexical_decisive_ratio,
+        )
+        if embedding_function is None:
+            self._collections[name] = collection
+        return collection
+
+    def backup(self, output_dir: typing.Optional[str] = None):
+        """Backs up the flat indexes (and the Chroma database) to a directory."""
+        if output_dir is None:
+            output_dir = helpers.parallel_backup_dir(self.chroma_dir)
+        try:
+            shutil.copytree(self.chroma_dir, output_dir, dirs_exist_ok=True)
+            return output_dir
+        except OSError:
+            logging.exception(
+                "Failed to backup from: %s to %s", self.chroma_dir, output_dir
+            )
+            return None
+
+    def query_vector_store_to_build(
+        self,
+        question: str,
+        token_limit: float = 200000,
+        results_num: int = 10,
+        max_sources: int = 4,
+        collection_name: typing.Optional[str] = None,
+        docs_agent_config: typing.Optional[str] = "normal",
+    ) -> tuple[list[SectionDistance], str]:
+        """Queries the flat index of a collection and builds a context string."""
+        target_collection_name = collection_name or self._collection_name
+        if not target_collection_name:
+            raise ValueError(
+                "Must provide collection_name or call get_collection first."
+            )
+        return retriever_query_vector_store_to_build(
+            collection=self.get_collection(name=target_collection_name),
+            docs_agent_config=docs_agent_config,
+            question=question,
+            token_limit=token_limit,
+            results_num=results_num,
+            max_sources=max_sources,
+        )
@@ -0,0 +1,331 @@
+#
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""BM25 inverted index of a collection for lexical search"""
+
+import bisect
+import json
+import math
+import os
+import re
+import shutil
+import threading
+import typing
+
+from absl import logging
+import numpy as np
+
+from docs_agent.storage.columns import (
+    MetadataColumn,
+    StringColumn,
+    StringColumnWriter,
+)
+
+
+# The version of the index format written by `build_lexical_index`.
+INDEX_FORMAT = 1
+
+MANIFEST_FILE = "manifest.json"
+TERM_OFFSETS_FILE = "term_offsets.npy"
+POSTING_ROWS_FILE = "posting_rows.npy"
+POSTING_FREQUENCIES_FILE = "posting_frequencies.npy"
+LENGTHS_FILE = "lengths.npy"
+
+# The BM25 parameters.
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Each occurrence of a term in the section title or page title of a chunk
+# counts as this many occurrences in its text.
+TITLE_WEIGHT = 2
+
+# The constant of reciprocal rank fusion (the rank of a result is added to
+# this number before taking its reciprocal).
+RRF_K = 60
+
+# The default ratio between the scores of the best and the second best
+# lexical matches above which the best match is decisive.
+DEFAULT_DECISIVE_RATIO = 2.0
+
+# A token is a sequence of letters, digits and underscores, which may be
+# joined by dots, hyphens, colons or slashes (such as `genai.Client`,
+# `--batch_size` or `RESOURCE_EXHAUSTED`).
+TOKEN_PATTERN = re.compile(r"[0-9A-Za-z_]+(?:[.\-:/][0-9A-Za-z_]+)*")
+SEPARATOR_PATTERN = re.compile(r"[.\-:/]")
+
+
+# Return the lowercase tokens of a text. A token joined by separators is
+# also split into its parts, so that `genai.Client` matches `Client`.
+def tokenize(text: typing.Optional[str]) -> typing.List[str]:
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(text or ""):
+        token = match.group(0).lower()
+        tokens.append(token)
+        parts = SEPARATOR_PATTERN.split(token)
+        if len(parts) > 1:
+            tokens.extend(part for part in parts if part)
+    return tokens
+
+
+# Return the directory of the lexical index of a collection.
+def get_lexical_index_dir(chroma_dir: str, collection_name: str) -> str:
+    return os.path.join(chroma_dir, f"{collection_name}.lexical")
+
+
+# Build the lexical index of all entries of a Chroma collection. The text of
+# each entry and its `section_title` and `page_title` metadata are indexed.
+# The ids, documents and metadata are stored with the index, so that lexical
+# results are returned without querying the collection. The new index
+# replaces an existing index only once it is complete.
+def build_lexical_index(
+    collection,
+    index_dir: str,
+    generation: int = 0,
+    page_size: int = 1000,
+) -> int:
+    temp_dir = index_dir + ".tmp"
+    shutil.rmtree(temp_dir, ignore_errors=True)
+    os.makedirs(temp_dir)
+    columns = {
+        name: StringColumnWriter(temp_dir, name)
+        for name in ("id", "document", "metadata")
+    }
+    postings = {}
+    lengths = []
+    for offset in range(0, collection.count(), page_size):
+        page = collection.get(
+            include=["documents", "metadatas"], limit=page_size, offset=offset
+        )
+        if len(page["ids"]) == 0:
+            break
+        for entry_id, document, metadata in zip(
+            page["ids"], page["documents"], page["metadatas"]
+        ):
+            metadata = metadata or {}
+            row = len(lengths)
+            columns["id"].append(entry_id)
+            columns["document"].append(document)
+            columns["metadata"].append(json.dumps(metadata, separators=(",", ":")))
+            frequencies = {}
+            for token in tokenize(document):
+                frequencies[token] = frequencies.get(token, 0) + 1
+            for field in ("section_title", "page_title"):
+                for token in tokenize(metadata.get(field, None)):
+                    frequencies[token] = frequencies.get(token, 0) + TITLE_WEIGHT
+            for token, frequency in frequencies.items():
+                postings.setdefault(token, []).append((row, frequency))
+            lengths.append(sum(frequencies.values()))
+    for column in columns.values():
+        column.close()
+    terms = sorted(postings)
+    term_writer = StringColumnWriter(temp_dir, "term")
+    term_offsets = [0]
+    posting_rows = []
+    posting_frequencies = []
+    for term in terms:
+        term_writer.append(term)
+        for row, frequency in postings[term]:
+            posting_rows.append(row)
+            posting_frequencies.append(frequency)
+        term_offsets.append(len(posting_rows))
+    term_writer.close()
+    np.save(
+        os.path.join(temp_dir, TERM_OFFSETS_FILE),
+        np.asarray(term_offsets, dtype=np.int64),
+    )
+    np.save(
+        os.path.join(temp_dir, POSTING_ROWS_FILE),
+        np.asarray(posting_rows, dtype=np.int32),
+    )
+    np.save(
+        os.path.join(temp_dir, POSTING_FREQUENCIES_FILE),
+        np.asarray(posting_frequencies, dtype=np.float32),
+    )
+    np.save(os.path.join(temp_dir, LENGTHS_FILE), np.asarray(lengths, dtype=np.float32))
+    with open(os.path.join(temp_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "format": INDEX_FORMAT,
+                "collection_name": collection.name,
+                "count": len(lengths),
+                "terms": len(terms),
+                "average_length": float(np.mean(lengths)) if lengths else 0.0,
+                "generation": generation,
+            },
+            f,
+        )
+    old_dir = index_dir + ".old"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.isdir(index_dir):
+        os.replace(index_dir, old_dir)
+    os.replace(temp_dir, index_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return len(lengths)
+
+
+class LexicalIndex:
+    """A memory-mapped BM25 inverted index of a collection.
+
+    The sorted terms, the postings (the rows of the entries that contain each
+    term and the frequency of the term in each entry) and the ids, documents
+    and metadata of the entries are memory-mapped, so opening an index does
+    not read it.
+
+    Attributes:
+        index_dir (str): The directory of the index.
+        name (str): The name of the indexed collection.
+        generation (int): The generation of the collection when it was indexed.
+        ids (StringColumn): The ids of the entries.
+        documents (StringColumn): The documents of the entries.
+        metadatas (MetadataColumn): The metadata of the entries.
+    """
+
+    def __init__(self, index_dir: str) -> None:
+        self.index_dir = index_dir
+        with open(
+            os.path.join(index_dir, MANIFEST_FILE), "r", encoding="utf-8"
+        ) as f:
+            manifest = json.load(f)
+        if manifest.get("format", None) != INDEX_FORMAT:
+            raise ValueError(
+                f"Unsupported lexical index format in {index_dir}. "
+                "Run `agent populate` again to build the index."
+            )
+        self.name = manifest.get("collection_name", "")
+        self.generation = int(manifest.get("generation", 0))
+        self.average_length = float(manifest.get("average_length", 0.0)) or 1.0
+        self.ids = StringColumn(index_dir, "id")
+        self.documents = StringColumn(index_dir, "document")
+        self.metadatas = MetadataColumn(StringColumn(index_dir, "metadata"))
+        self.terms = StringColumn(index_dir, "term")
+        self.term_offsets = np.load(
+            os.path.join(index_dir, TERM_OFFSETS_FILE), mmap_mode="r"
+        )
+        self.posting_rows = np.load(
+            os.path.join(index_dir, POSTING_ROWS_FILE), mmap_mode="r"
+        )
+        self.posting_frequencies = np.load(
+            os.path.join(index_dir, POSTING_FREQUENCIES_FILE), mmap_mode="r"
+        )
+        self.lengths = np.load(os.path.join(index_dir, LENGTHS_FILE), mmap_mode="r")
+
+    def __len__(self):
+        return len(self.ids)
+
+    # Return the rows and BM25 scores of the `top_k` entries that best match
+    # a text, sorted by score. Entries that match no term are not returned.
+    def search(self, text: str, top_k: int = 10) -> tuple[np.ndarray, np.ndarray]:
+        scores = np.zeros(len(self), dtype=np.float32)
+        for term in dict.fromkeys(tokenize(text)):
+            position = bisect.bisect_left(self.terms, term)
+            if position >= len(self.terms) or self.terms[position] != term:
+                continue
+            start = self.term_offsets[position]
+            end = self.term_offsets[position + 1]
+            rows = self.posting_rows[start:end]
+            frequencies = self.posting_frequencies[start:end]
+            idf = math.log(1 + (len(self) - len(rows) + 0.5) / (len(rows) + 0.5))
+            norms = BM25_K1 * (
+                1 - BM25_B + BM25_B * self.lengths[rows] / self.average_length
+            )
+            scores[rows] += idf * frequencies * (BM25_K1 + 1) / (frequencies + norms)
+        matched = np.flatnonzero(scores > 0)
+        if len(matched) > top_k:
+            matched = matched[np.argpartition(-scores[matched], top_k - 1)[:top_k]]
+        matched = matched[np.argsort(-scores[matched], kind="stable")]
+        return matched, scores[matched]
+
+
+# Return True if the best lexical match is decisive: its score is at least
+# `ratio` times the score of the second best match.
+def is_decisive(scores: np.ndarray, ratio: float) -> bool:
+    if len(scores) == 0:
+        return False
+    if len(scores) == 1:
+        return True
+    return bool(scores[0] >= ratio * scores[1])
+
+
+# Return the ids of two ranked lists of results merged with reciprocal rank
+# fusion, best first.
+def reciprocal_rank_fusion(
+    ranked_lists: typing.List[typing.List[str]], k: int = RRF_K
+) -> typing.List[str]:
+    scores = {}
+    for ranked_ids in ranked_lists:
+        for rank, entry_id in enumerate(ranked_ids):
+            scores[entry_id] = scores.get(entry_id, 0.0) + 1.0 / (k + rank + 1)
+    # Ties keep the order in which the ids were first seen.
+    return sorted(scores, key=lambda entry_id: -scores[entry_id])
+
+
+# Lexical indexes shared by all callers in this process, keyed by index
+# directory. Each value is (modification time of the manifest, LexicalIndex).
+shared_lexical_indexes = {}
+shared_lexical_indexes_lock = threading.Lock()
+
+
+# Return the lexical index in a directory (loading it again if it was built
+# again since it was loaded), or None if there is no index.
+def load_lexical_index(index_dir: str) -> typing.Optional[LexicalIndex]:
+    try:
+        mtime = os.stat(os.path.join(index_dir, MANIFEST_FILE)).st_mtime_ns
+    except OSError:
+        return None
+    with shared_lexical_indexes_lock:
+        cached = shared_lexical_indexes.get(index_dir)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        try:
+            lexical_index = LexicalIndex(index_dir)
+        except (OSError, ValueError) as error:
+            logging.error(f"Cannot open the lexical index {index_dir}: {error}")
+            return None
+        shared_lexical_indexes[index_dir] = (mtime, lexical_index)
+        logging.info(
+            f"Loaded {len(lexical_index)} entries from the lexical index: {index_dir}"
+        )
+        return lexical_index
+
+
+# Return the lexical index of a collection, or None (with a warning on the
+# first call) if the collection has no lexical index.
+def load_collection_lexical_index(
+    chroma_dir: str, collection_name: str, generation: int
+) -> typing.Optional[LexicalIndex]:
+    index_dir = get_lexical_index_dir(chroma_dir, collection_name)
+    lexical_index = load_lexical_index(index_dir)
+    warning = None
+    if lexical_index is None:
+        warning = (
+            f"The collection '{collection_name}' has no lexical index. "
+            "Run `agent populate` to build it."
+        )
+    elif lexical_index.generation != generation:
+        warning = (
+            f"The lexical index of '{collection_name}' is older than the "
+            "Chroma collection."
+        )
+    if warning is not None:
+        with shared_lexical_indexes_lock:
+            if (index_dir, warning) not in logged_warnings:
+                logged_warnings.add((index_dir, warning))
+                logging.warning(warning)
+    return lexical_index
+
+
+# The warnings about missing or outdated lexical indexes that were logged.
+logged_warnings = set()
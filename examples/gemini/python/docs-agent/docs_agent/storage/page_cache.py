@@ -0,0 +1,161 @@
+#
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""In-process LRU cache of pages rebuilt from a vector database"""
+
+from collections import OrderedDict
+import os
+import threading
+import typing
+
+from docs_agent.utilities.config import ProductConfig
+
+
+# The default maximum number of pages kept in the cache.
+DEFAULT_MAX_ENTRIES = 1000
+
+
+# Return the path of the file that stores the generation of a collection.
+# The generation is increased each time the collection is populated, which
+# invalidates the pages cached from earlier generations.
+def get_generation_path(chroma_dir: str, collection_name: str) -> str:
+    return os.path.join(chroma_dir, f"{collection_name}.generation")
+
+
+# The generations read in this process, keyed by the path of the generation
+# file. Each value is ((inode, mtime, size), generation).
+read_generations = {}
+
+
+# Return the generation of a collection (0 if it was never populated).
+# The file is only read again if it was replaced or modified since it was
+# last read, so that a query costs a single `stat` call.
+def read_generation(chroma_dir: str, collection_name: str) -> int:
+    generation_path = get_generation_path(chroma_dir, collection_name)
+    try:
+        stat = os.stat(generation_path)
+    except OSError:
+        read_generations.pop(generation_path, None)
+        return 0
+    file_state = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    cached = read_generations.get(generation_path)
+    if cached is not None and cached[0] == file_state:
+        return cached[1]
+    try:
+        with open(generation_path, "r", encoding="utf-8") as generation_file:
+            generation = int(generation_file.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+    read_generations[generation_path] = (file_state, generation)
+    return generation
+
+
+# Increase the generation of a collection and return the new generation.
+def bump_generation(chroma_dir: str, collection_name: str) -> int:
+    generation = read_generation(chroma_dir, collection_name) + 1
+    generation_path = get_generation_path(chroma_dir, collection_name)
+    os.makedirs(chroma_dir, exist_ok=True)
+    temp_path = generation_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as generation_file:
+        generation_file.write(str(generation))
+    os.replace(temp_path, generation_path)
+    return generation
+
+
+class PageCache:
+    """A bounded, thread-safe LRU cache of pages (`FullPage` objects).
+
+    Pages are keyed by `(chroma_dir, collection_name, generation, origin_uuid)`,
+    so pages cached before a collection is populated again are never returned
+    (and are evicted as new pages are added). Cached pages are shared by all
+    callers and must not be modified.
+
+    Attributes:
+        max_entries (int): The maximum number of pages kept in the cache.
+        hits (int): The number of lookups that found a cached page.
+        misses (int): The number of lookups that did not find a cached page.
+        evictions (int): The number of pages evicted from the cache.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.max_entries = int(max_entries)
+        self.lock = threading.Lock()
+        self.pages = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def from_product_config(
+        product_config: ProductConfig,
+    ) -> typing.Optional["PageCache"]:
+        """Returns the page cache shared by all products that use the same
+        maximum number of entries, or None if the page cache is disabled."""
+        max_entries = int(
+            getattr(product_config, "page_cache_max_entries", DEFAULT_MAX_ENTRIES)
+        )
+        if max_entries <= 0:
+            return None
+        with shared_page_caches_lock:
+            if max_entries not in shared_page_caches:
+                shared_page_caches[max_entries] = PageCache(max_entries=max_entries)
+            return shared_page_caches[max_entries]
+
+    def get_many(self, keys: typing.Iterable[tuple]) -> dict:
+        """Returns the cached pages for the keys found in the cache."""
+        found = {}
+        with self.lock:
+            for key in keys:
+                page = self.pages.get(key)
+                if page is None:
+                    self.misses += 1
+                    continue
+                self.pages.move_to_end(key)
+                self.hits += 1
+                found[key] = page
+        return found
+
+    def put_many(self, pages: dict) -> None:
+        """Adds pages to the cache, evicting the least recently used pages."""
+        with self.lock:
+            for key, page in pages.items():
+                self.pages[key] = page
+                self.pages.move_to_end(key)
+            while len(self.pages) > self.max_entries:
+                self.pages.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self.lock:
+            self.pages.clear()
+
+    def stats(self) -> dict:
+        """Returns the counters of the cache for monitoring."""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.pages),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# Page caches shared by all callers in this process, keyed by max entries.
+shared_page_caches = {}
+shared_page_caches_lock = threading.Lock()
@@ -18,6 +18,7 @@ from absl import logging
 from docs_agent.storage.base import RAG
 from docs_agent.utilities.config import ProductConfig
 from docs_agent.storage.chroma import ChromaEnhanced
+from docs_agent.storage.flat_index import FlatIndexRAG
 
 
 class RAGFactory:
@@ -26,7 +27,14 @@ class RAGFactory:
         # Find the Chroma DB configuration in the product config.
         has_chroma = any(db.db_type == "chroma" for db in product_config.db_configs)
 
-        if has_chroma:
+        if has_chroma and getattr(product_config, "vector_index", "chroma") == "flat":
+            logging.info("[RAGFactory] Flat index selected. Creating FlatIndexRAG instance.")
+            try:
+                return FlatIndexRAG.from_product_config(product_config)
+            except Exception as e:
+                logging.error(f"[RAGFactory] Failed to create flat index RAG instance: {e}")
+                raise
+        elif has_chroma:
             logging.info("[RAGFactory] Chroma DB configuration found. Creating ChromaEnhanced instance.")
             try:
                 # Create the ChromaEnhanced instance from the product config
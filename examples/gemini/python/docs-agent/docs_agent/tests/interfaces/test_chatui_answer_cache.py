@@ -0,0 +1,155 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+from flask import Flask
+
+from docs_agent.agents.docs_agent import DocsAgent
+from docs_agent.interfaces.chatbot import chatui
+from docs_agent.memory.answer_cache import AnswerCache
+from docs_agent.postprocess.docs_retriever import SectionDistance
+from docs_agent.preprocess.splitters.markdown_splitter import Section
+
+
+class FakeRAG:
+    def query_vector_store_to_build(self, question, **kwargs):
+        section = Section(
+            id=1,
+            name_id="page_1",
+            page_title="Page",
+            section_title="Section",
+            level=1,
+            previous_id=0,
+            parent_tree=[0],
+            token_count=10,
+            content="Some context.",
+            url="https://example.com/page",
+            md_hash="hash",
+        )
+        return [SectionDistance(section=section, distance=0.5)], "Some context."
+
+
+class FakeCollection:
+    def embedQuery(self, question):
+        return [[1.0, 0.0]]
+
+    def hasMdHashes(self, md_hashes):
+        return True
+
+
+class FakeDocsAgent:
+    """A docs agent with fake models and a real answer cache."""
+
+    lookup_cached_answer = DocsAgent.lookup_cached_answer
+    cache_answer = DocsAgent.cache_answer
+
+    def __init__(self, answer_cache):
+        self.config = types.SimpleNamespace(
+            product_name="Product",
+            app_mode="web",
+            docs_agent_config="normal",
+            db_type="chroma",
+            secondary_db_type=None,
+            models=types.SimpleNamespace(language_model="gemini-2.0-flash"),
+            conditions=types.SimpleNamespace(model_error_message="Model error"),
+        )
+        self.rag = FakeRAG()
+        self.collection = FakeCollection()
+        self.answer_cache = answer_cache
+        self.aqa_model = None
+        self.prompts = []
+        self.response = "An answer."
+        self.related_questions_response = "1. What is this?"
+
+    def get_answer_cache_scope(self, interface):
+        return interface
+
+    def ask_content_model_with_context_prompt(self, context, question, **kwargs):
+        self.prompts.append(question)
+        if "questions" in question:
+            return self.related_questions_response, ""
+        return self.response, ""
+
+
+class TestChatUIAnswerCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.answer_cache = AnswerCache(
+            path=os.path.join(self.temp_dir.name, "answers.sqlite")
+        )
+        # Related questions link to the `chatui.question` endpoint.
+        self.app = Flask(__name__)
+        self.app.add_url_rule("/question/<ask>", endpoint="chatui.question")
+        self.request_context = self.app.test_request_context()
+        self.request_context.push()
+
+    def tearDown(self):
+        self.request_context.pop()
+        self.answer_cache.close()
+        self.temp_dir.cleanup()
+
+    def ask_model(self, docs_agent):
+        with mock.patch.object(
+            chatui, "render_template", side_effect=lambda template, **kwargs: kwargs
+        ):
+            return chatui.ask_model("What is this??do_not_log", agent=docs_agent)
+
+    def test_answer_is_stored_and_reused(self):
+        docs_agent = FakeDocsAgent(self.answer_cache)
+        with mock.patch.object(
+            chatui, "render_template", side_effect=lambda template, **kwargs: kwargs
+        ):
+            first = chatui.ask_model("What is this??do_not_log", agent=docs_agent)
+            self.assertEqual(self.answer_cache.count(), 1)
+            prompts = len(docs_agent.prompts)
+            second = chatui.ask_model("What is this??do_not_log", agent=docs_agent)
+        # The second answer comes from the answer cache.
+        self.assertEqual(len(docs_agent.prompts), prompts)
+        self.assertEqual(second["response"], "An answer.")
+        self.assertIn("What is this?", str(first["related_questions"]))
+        self.assertEqual(second["related_questions"], str(first["related_questions"]))
+        self.assertEqual(second["search_result"][0].section.md_hash, "hash")
+
+    def test_failed_answers_are_not_stored(self):
+        docs_agent = FakeDocsAgent(self.answer_cache)
+        for response in ["Model error", ""]:
+            docs_agent.response = response
+            self.assertEqual(self.ask_model(docs_agent)["response"], response)
+            self.assertEqual(self.answer_cache.count(), 0)
+
+    def test_answers_without_related_questions_are_not_stored(self):
+        docs_agent = FakeDocsAgent(self.answer_cache)
+        docs_agent.related_questions_response = "Model error"
+        self.assertEqual(self.ask_model(docs_agent)["related_questions"], "")
+        self.assertEqual(self.answer_cache.count(), 0)
+        # Once the related questions succeed, the answer is stored.
+        docs_agent.related_questions_response = "1. What is this?"
+        self.ask_model(docs_agent)
+        self.assertEqual(self.answer_cache.count(), 1)
+
+    def test_answers_with_deferred_related_questions_are_stored(self):
+        docs_agent = FakeDocsAgent(self.answer_cache)
+        docs_agent.config.defer_related_questions = "True"
+        result = self.ask_model(docs_agent)
+        self.assertTrue(result["defer_related_questions"])
+        self.assertEqual(self.answer_cache.count(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import types
+import unittest
+
+from flask import Flask
+
+from docs_agent.interfaces.chatbot.chatui import (
+    generate_related_questions,
+    stream_answer,
+)
+from docs_agent.postprocess.docs_retriever import SectionDistance
+from docs_agent.preprocess.splitters.markdown_splitter import Section
+
+
+class FakeRAG:
+    def query_vector_store_to_build(self, question, **kwargs):
+        section = Section(
+            id=1,
+            name_id="page_1",
+            page_title="Page",
+            section_title="Section",
+            level=1,
+            previous_id=0,
+            parent_tree=[0],
+            token_count=10,
+            content="Some context.",
+            url="https://example.com/page",
+            md_hash="hash",
+        )
+        return [SectionDistance(section=section, distance=0.5)], "Some context."
+
+
+class FakeDocsAgent:
+    def __init__(self):
+        self.config = types.SimpleNamespace(
+            app_mode="web",
+            docs_agent_config="normal",
+            db_type="chroma",
+            models=types.SimpleNamespace(language_model="gemini-2.0-flash"),
+            conditions=types.SimpleNamespace(model_error_message="Model error"),
+        )
+        self.rag = FakeRAG()
+        self.cached = {}
+
+    def lookup_cached_answer(self, question, interface):
+        return self.cached.get(question)
+
+    def cache_answer(self, question, interface, answer, search_result):
+        self.cached[question] = answer
+
+    def ask_content_model_with_context_prompt_stream(self, context, question):
+        yield "An "
+        yield "answer."
+
+    def ask_content_model_with_context_prompt(self, context, question, **kwargs):
+        return "1. What is this?", ""
+
+
+def parse_events(stream):
+    events = []
+    for message in stream:
+        event, data = message.strip().split("\n")
+        events.append((event[len("event: ") :], json.loads(data[len("data: ") :])))
+    return events
+
+
+class TestStreamAnswer(unittest.TestCase):
+    def setUp(self):
+        # Related questions link to the `chatui.question` endpoint.
+        self.app = Flask(__name__)
+        self.app.add_url_rule("/question/<ask>", endpoint="chatui.question")
+        self.request_context = self.app.test_request_context()
+        self.request_context.push()
+
+    def tearDown(self):
+        self.request_context.pop()
+
+    def test_answer_is_streamed(self):
+        docs_agent = FakeDocsAgent()
+        question = "What is this??do_not_log"
+        events = parse_events(stream_answer(question, docs_agent, "https://server/"))
+        self.assertEqual(
+            [event for event, _ in events],
+            ["token", "token", "sources", "related_questions", "done"],
+        )
+        self.assertEqual(events[0][1], {"text": "An "})
+        self.assertEqual(events[2][1][0]["url"], "https://example.com/page")
+        self.assertIn("What is this?", events[3][1]["html"])
+        self.assertEqual(docs_agent.cached["What is this??"]["response"], "An answer.")
+        # A cached answer is sent at once.
+        events = parse_events(stream_answer(question, docs_agent, "https://server/"))
+        self.assertEqual(events[0], ("token", {"text": "An answer."}))
+        self.assertEqual(events[1][1][0]["section_title"], "Section")
+        self.assertEqual(len(events), 4)
+
+    def test_failure_during_the_stream_is_reported(self):
+        docs_agent = FakeDocsAgent()
+
+        def ask_content_model_with_context_prompt_stream(context, question):
+            yield "An "
+            raise RuntimeError("unavailable")
+
+        docs_agent.ask_content_model_with_context_prompt_stream = (
+            ask_content_model_with_context_prompt_stream
+        )
+        question = "What is this??do_not_log"
+        events = parse_events(stream_answer(question, docs_agent, "https://server/"))
+        self.assertEqual(
+            events, [("token", {"text": "An "}), ("error", {"message": "Model error"})]
+        )
+        # The partial answer is not cached.
+        self.assertEqual(docs_agent.cached, {})
+
+    def test_failed_related_questions_are_raised(self):
+        docs_agent = FakeDocsAgent()
+        docs_agent.ask_content_model_with_context_prompt = lambda **kwargs: (
+            "Model error",
+            "",
+        )
+        with self.assertRaises(RuntimeError):
+            generate_related_questions(docs_agent, "Some context.")
+
+
+if __name__ == "__main__":
+    unittest.main()
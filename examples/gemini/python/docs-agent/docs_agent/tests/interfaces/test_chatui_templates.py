@@ -0,0 +1,36 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import glob
+import os
+import unittest
+
+from docs_agent.interfaces.chatbot import chatui
+
+
+class TestChatUITemplates(unittest.TestCase):
+    def test_result_templates_can_load_deferred_related_questions(self):
+        # `app.js` loads deferred related questions into this element.
+        template_dir = os.path.join(os.path.dirname(chatui.__file__), "templates")
+        templates = glob.glob(os.path.join(template_dir, "*", "result.html"))
+        self.assertEqual(len(templates), 5)
+        for template in templates:
+            with open(template, "r", encoding="utf-8") as template_file:
+                self.assertIn(
+                    'id="suggested-questions"', template_file.read(), template
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
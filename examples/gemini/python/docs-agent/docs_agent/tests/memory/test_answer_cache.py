@@ -0,0 +1,90 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import unittest
+
+from docs_agent.memory.answer_cache import AnswerCache
+from docs_agent.memory.answer_cache import decode_search_result, encode_search_result
+from docs_agent.postprocess.docs_retriever import SectionDistance
+from docs_agent.preprocess.splitters.markdown_splitter import Section
+
+
+class TestAnswerCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "answers.sqlite")
+        self.cache = AnswerCache(path=self.path, similarity_threshold=0.95, max_entries=2)
+
+    def tearDown(self):
+        self.cache.close()
+        self.temp_dir.cleanup()
+
+    def test_similar_questions_reuse_the_answer(self):
+        self.cache.store("scope", "What is Gemini?", [1.0, 0.0], {"response": "A"}, ["x"])
+        self.assertEqual(self.cache.lookup("scope", [0.99, 0.05]), {"response": "A"})
+        self.assertIsNone(self.cache.lookup("scope", [0.0, 1.0]))
+        self.assertIsNone(self.cache.lookup("other scope", [1.0, 0.0]))
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+    def test_answers_with_changed_sources_are_deleted(self):
+        self.cache.store("scope", "question", [1.0, 0.0], {"response": "A"}, ["x", "y"])
+        checked = []
+
+        def validate(md_hashes):
+            checked.append(md_hashes)
+            return False
+
+        self.assertIsNone(self.cache.lookup("scope", [1.0, 0.0], validate=validate))
+        self.assertEqual(checked, [["x", "y"]])
+        self.assertEqual(self.cache.count(), 0)
+
+    def test_answers_from_other_instances_and_eviction(self):
+        other_cache = AnswerCache(path=self.path, max_entries=2)
+        self.assertIsNone(self.cache.lookup("scope", [1.0, 0.0]))
+        other_cache.store("scope", "a", [1.0, 0.0], {"response": "A"}, ["x"])
+        self.assertEqual(self.cache.lookup("scope", [1.0, 0.0]), {"response": "A"})
+        other_cache.store("scope", "b", [0.0, 1.0], {"response": "B"}, ["x"])
+        other_cache.store("scope", "c", [-1.0, 0.0], {"response": "C"}, ["x"])
+        # The least recently used answer is evicted.
+        self.assertEqual(self.cache.count(), 2)
+        self.assertIsNone(self.cache.lookup("scope", [1.0, 0.0]))
+        self.assertEqual(self.cache.lookup("scope", [0.0, 1.0]), {"response": "B"})
+        other_cache.close()
+
+    def test_search_result_round_trip(self):
+        section = Section(
+            id=3,
+            name_id="page_3",
+            page_title="Page",
+            section_title="Section",
+            level=2,
+            previous_id=2,
+            parent_tree="[1]",
+            token_count=10,
+            content="Content",
+            url="https://example.com",
+            md_hash="x",
+        )
+        search_result = decode_search_result(
+            encode_search_result([SectionDistance(section=section, distance=0.5)])
+        )
+        self.assertEqual(search_result[0].distance, 0.5)
+        self.assertEqual(search_result[0].section.url, "https://example.com")
+        self.assertEqual(search_result[0].section.returnParentTree(), (1,))
+
+
+if __name__ == "__main__":
+    unittest.main()
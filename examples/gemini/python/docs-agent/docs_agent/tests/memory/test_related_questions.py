@@ -0,0 +1,83 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import types
+import unittest
+
+from docs_agent.memory.related_questions import RelatedQuestionsTasks, get_source_key
+
+
+def make_result(*md_hashes):
+    return [
+        types.SimpleNamespace(section=types.SimpleNamespace(md_hash=md_hash))
+        for md_hash in md_hashes
+    ]
+
+
+class TestRelatedQuestionsTasks(unittest.TestCase):
+    def test_source_key(self):
+        self.assertEqual(
+            get_source_key(make_result("a", "b")), get_source_key(make_result("b", "a"))
+        )
+        self.assertNotEqual(
+            get_source_key(make_result("a")), get_source_key(make_result("b"))
+        )
+        self.assertNotEqual(get_source_key([], "one"), get_source_key([], "two"))
+
+    def test_related_questions_are_generated_once_per_source_set(self):
+        tasks = RelatedQuestionsTasks(max_entries=2)
+        release = threading.Event()
+        calls = []
+
+        def generate():
+            calls.append(1)
+            release.wait(5)
+            return "<ul><li>Question?</li></ul>"
+
+        tasks.submit("uuid-1", "sources", generate)
+        with self.assertRaises(TimeoutError):
+            tasks.get("uuid-1", timeout=0.01)
+        # Another request with the same sources reuses the running task.
+        tasks.submit("uuid-2", "sources", generate)
+        release.set()
+        self.assertEqual(tasks.get("uuid-2", timeout=5), "<ul><li>Question?</li></ul>")
+        self.assertEqual(tasks.get("uuid-1", timeout=5), "<ul><li>Question?</li></ul>")
+        self.assertEqual(len(calls), 1)
+        self.assertIsNone(tasks.get("unknown"))
+        # The least recently used requests are evicted.
+        tasks.submit("uuid-3", "other", lambda: "")
+        self.assertIsNone(tasks.get("uuid-1"))
+        self.assertEqual(tasks.stats()["hits"], 1)
+
+    def test_failed_generation_is_retried(self):
+        tasks = RelatedQuestionsTasks()
+
+        def fail():
+            raise RuntimeError("unavailable")
+
+        tasks.submit("uuid-1", "sources", fail)
+        self.assertEqual(tasks.get("uuid-1", timeout=5), "")
+        tasks.submit("uuid-2", "sources", lambda: "questions")
+        self.assertEqual(tasks.get("uuid-2", timeout=5), "questions")
+        # Empty related questions are generated again too.
+        tasks.submit("uuid-3", "other", lambda: "")
+        self.assertEqual(tasks.get("uuid-3", timeout=5), "")
+        tasks.submit("uuid-4", "other", lambda: "more questions")
+        self.assertEqual(tasks.get("uuid-4", timeout=5), "more questions")
+        self.assertEqual(tasks.stats()["hits"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import concurrent.futures
+import unittest
+from unittest import mock
+
+import google.ai.generativelanguage as glm
+
+from docs_agent.models import aqa_models
+from docs_agent.models.aqa_models import AQA
+
+
+# Answer each question with its own text and a probability that depends on
+# the question, so that answers can be matched with their questions.
+def generate_answer(request):
+    question = request.contents[0].parts[0].text
+    return glm.GenerateAnswerResponse(
+        answer=glm.Candidate(content=glm.Content(parts=[glm.Part(text=question)])),
+        answerable_probability=len(question) / 100,
+    )
+
+
+class TestAQA(unittest.TestCase):
+    def setUp(self):
+        client = mock.Mock()
+        client.generate_answer.side_effect = generate_answer
+        patcher = mock.patch.object(
+            aqa_models, "get_shared_service_client", return_value=client
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.aqa = AQA()
+
+    def test_concurrent_answers_are_returned_as_values(self):
+        questions = [f"Question {'?' * i}" for i in range(20)]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+            responses = list(
+                executor.map(
+                    lambda q: self.aqa.answer_question(q, ["Passage."], "VERBOSE"),
+                    questions,
+                )
+            )
+        for question, response in zip(questions, responses):
+            self.assertEqual(response.answer_text, question)
+            self.assertAlmostEqual(response.answerable_probability, len(question) / 100)
+            self.assertEqual(response.results[0]["text"], "Passage.")
+        # The tuple API returns the same answer.
+        self.assertEqual(
+            self.aqa.generate_answer("Hi", ["Passage."], "VERBOSE")[0], "Hi"
+        )
+
+    def test_failed_request(self):
+        self.aqa.generative_service_client.generate_answer.side_effect = RuntimeError
+        response = self.aqa.answer_question("Hi", ["Passage."], "VERBOSE")
+        self.assertEqual((response.answer_text, response.results), ("", []))
+        self.assertIsNone(response.raw_response)
+        self.assertEqual(response.answerable_probability, 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import types
+import unittest
+from unittest import mock
+
+from google.genai import errors as genai_errors
+from google.genai import types as genai_types
+
+from docs_agent.models.google_genai import Gemini
+from docs_agent.utilities.config import Models
+
+
+def make_error(code, status):
+    return genai_errors.APIError(
+        code, {"error": {"code": code, "message": "error", "status": status}}
+    )
+
+
+def make_response(batch):
+    return genai_types.EmbedContentResponse(
+        embeddings=[
+            genai_types.ContentEmbedding(values=[float(text)]) for text in batch
+        ]
+    )
+
+
+class FakeLimiter:
+    def __init__(self):
+        self.pauses = []
+
+    def acquire(self, tokens):
+        pass
+
+    async def acquire_async(self, tokens):
+        pass
+
+    def pause(self, delay):
+        self.pauses.append(delay)
+
+
+class TestGeminiEmbed(unittest.TestCase):
+    def setUp(self):
+        self.gemini = Gemini(
+            models_config=Models(
+                language_model="gemini-2.0-flash",
+                embedding_model="text-embedding-004",
+                api_key="test-key",
+            )
+        )
+        self.gemini.max_embed_batch_size = 3
+        # The limiter is shared, so replace the limiter of this model only.
+        self.gemini.embed_limiter = FakeLimiter()
+        self.inputs = [str(i) for i in range(10)]
+        self.expected = [[float(i)] for i in range(10)]
+        self.batches = []
+
+    def test_embed_splits_batches_in_order(self):
+        def embed_batch(batch, **kwargs):
+            self.batches.append(batch)
+            return [[float(text)] for text in batch]
+
+        self.gemini._embed_batch = embed_batch
+        self.assertEqual(
+            self.gemini.embed(self.inputs, max_concurrency=1), self.expected
+        )
+        self.assertEqual(
+            self.batches, [["0", "1", "2"], ["3", "4", "5"], ["6", "7", "8"], ["9"]]
+        )
+        self.assertEqual(self.gemini.embed("7", max_concurrency=1), [[7.0]])
+
+    def test_concurrent_embed_keeps_the_order_of_inputs(self):
+        completed = []
+
+        async def embed_batch_async(batch, **kwargs):
+            self.batches.append(batch)
+            # Later batches complete first.
+            await asyncio.sleep(0.01 * (10 - int(batch[0])))
+            completed.append(batch)
+            return [[float(text)] for text in batch]
+
+        self.gemini._embed_batch_async = embed_batch_async
+        self.assertEqual(
+            self.gemini.embed(self.inputs, max_concurrency=4), self.expected
+        )
+        self.assertEqual(len(self.batches), 4)
+        self.assertEqual(completed[0], ["9"])
+        self.assertEqual(
+            asyncio.run(self.gemini.embed_async(self.inputs, max_concurrency=2)),
+            self.expected,
+        )
+
+    def test_rate_limited_requests_are_retried(self):
+        errors = [make_error(429, "RESOURCE_EXHAUSTED")] * 2
+
+        def embed_content(model, contents, config):
+            self.batches.append(contents)
+            if errors:
+                raise errors.pop()
+            return make_response(contents)
+
+        self.gemini.client = types.SimpleNamespace(
+            models=types.SimpleNamespace(embed_content=embed_content)
+        )
+        with mock.patch("time.sleep") as sleep:
+            self.assertEqual(
+                self.gemini.embed(self.inputs, max_concurrency=1), self.expected
+            )
+        # The first batch is retried with an exponential backoff, and all
+        # users of the limiter are paused.
+        self.assertEqual(len(self.batches), 6)
+        self.assertEqual(self.batches[:3], [["0", "1", "2"]] * 3)
+        self.assertEqual([c.args[0] for c in sleep.call_args_list], [2, 4])
+        self.assertEqual(self.gemini.embed_limiter.pauses, [2, 4])
+
+    def test_rate_limited_async_requests_are_retried(self):
+        errors = [make_error(429, "RESOURCE_EXHAUSTED")]
+
+        async def embed_content(model, contents, config):
+            self.batches.append(contents)
+            if contents[0] == "3" and errors:
+                raise errors.pop()
+            return make_response(contents)
+
+        self.gemini.client = types.SimpleNamespace(
+            aio=types.SimpleNamespace(
+                models=types.SimpleNamespace(embed_content=embed_content)
+            )
+        )
+        self.gemini.embed_retry_delay = 0
+        self.assertEqual(
+            asyncio.run(self.gemini.embed_async(self.inputs, max_concurrency=4)),
+            self.expected,
+        )
+        self.assertEqual(self.batches.count(["3", "4", "5"]), 2)
+        self.assertEqual(self.gemini.embed_limiter.pauses, [0])
+
+    def test_other_errors_and_exhausted_retries_are_raised(self):
+        errors = [make_error(400, "INVALID_ARGUMENT")]
+
+        def embed_content(model, contents, config):
+            self.batches.append(contents)
+            raise errors[-1]
+
+        self.gemini.client = types.SimpleNamespace(
+            models=types.SimpleNamespace(embed_content=embed_content)
+        )
+        with mock.patch("time.sleep"):
+            with self.assertRaises(genai_errors.APIError):
+                self.gemini.embed(self.inputs, max_concurrency=1)
+            self.assertEqual(len(self.batches), 1)
+            errors.append(make_error(429, "RESOURCE_EXHAUSTED"))
+            with self.assertRaises(genai_errors.APIError):
+                self.gemini.embed(self.inputs, max_concurrency=1)
+        self.assertEqual(len(self.batches), 2 + self.gemini.max_embed_retries)
+        self.assertEqual(
+            len(self.gemini.embed_limiter.pauses), self.gemini.max_embed_retries
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
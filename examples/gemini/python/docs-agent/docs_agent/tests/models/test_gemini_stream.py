@@ -0,0 +1,88 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import types
+import unittest
+
+from google.genai import types as genai_types
+
+from docs_agent.models.google_genai import Gemini
+from docs_agent.utilities.config import Conditions, Models
+
+
+def make_chunk(text):
+    return genai_types.GenerateContentResponse(
+        candidates=[
+            genai_types.Candidate(
+                content=genai_types.Content(
+                    role="model", parts=[genai_types.Part(text=text)]
+                )
+            )
+        ]
+    )
+
+
+class TestGeminiStream(unittest.TestCase):
+    def setUp(self):
+        self.gemini = Gemini(
+            models_config=Models(
+                language_model="gemini-2.0-flash",
+                embedding_model="text-embedding-004",
+                api_key="test-key",
+            ),
+            conditions=Conditions(
+                condition_text="", model_error_message="Model error"
+            ),
+        )
+        self.requests = []
+
+    def stream(self, chunks, error=None):
+        def generate_content_stream(**kwargs):
+            self.requests.append(kwargs)
+            for chunk in chunks:
+                yield chunk
+            if error is not None:
+                raise error
+
+        # Clients are shared, so replace the client of this model only.
+        self.gemini.client = types.SimpleNamespace(
+            models=types.SimpleNamespace(
+                generate_content_stream=generate_content_stream
+            )
+        )
+
+    def test_chunks_are_yielded_as_they_arrive(self):
+        self.stream([make_chunk("Hello"), make_chunk(", "), make_chunk("world")])
+        texts = self.gemini.generate_content_stream("question")
+        # The request is only sent when the first chunk is requested.
+        self.assertEqual(self.requests, [])
+        self.assertEqual(next(texts), "Hello")
+        self.assertEqual(list(texts), [", ", "world"])
+        self.assertEqual(self.requests[0]["contents"], "question")
+
+    def test_errors(self):
+        self.stream([], error=RuntimeError("unavailable"))
+        self.assertEqual(list(self.gemini.generate_content_stream("q")), ["Model error"])
+        # An error after some text is raised after the text.
+        self.stream([make_chunk("Partial")], error=RuntimeError("unavailable"))
+        texts = self.gemini.generate_content_stream("q")
+        self.assertEqual(next(texts), "Partial")
+        with self.assertRaises(RuntimeError):
+            next(texts)
+        self.stream([])
+        self.assertEqual(list(self.gemini.generate_content_stream("q")), ["Model error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
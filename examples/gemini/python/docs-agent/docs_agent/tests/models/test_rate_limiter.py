@@ -0,0 +1,58 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import unittest
+
+from docs_agent.models.rate_limiter import TokenBucketLimiter, get_shared_limiter
+
+
+class TestTokenBucketLimiter(unittest.TestCase):
+    def test_requests_are_limited(self):
+        limiter = TokenBucketLimiter(requests_per_period=2, period=60)
+        self.assertEqual(limiter.try_acquire(), 0)
+        self.assertEqual(limiter.try_acquire(), 0)
+        wait = limiter.try_acquire()
+        self.assertGreater(wait, 29)
+        self.assertLessEqual(wait, 30)
+
+    def test_tokens_are_limited(self):
+        limiter = TokenBucketLimiter(
+            requests_per_period=100, period=60, tokens_per_minute=600
+        )
+        self.assertEqual(limiter.try_acquire(tokens=400), 0)
+        wait = limiter.try_acquire(tokens=400)
+        self.assertGreater(wait, 19)
+        self.assertLessEqual(wait, 20)
+        # A request larger than the bucket only needs a full bucket.
+        self.assertLessEqual(limiter.try_acquire(tokens=10000), 40)
+
+    def test_pause_stops_all_requests(self):
+        limiter = TokenBucketLimiter(requests_per_period=100, period=60)
+        limiter.pause(5)
+        self.assertGreater(limiter.try_acquire(), 4)
+
+    def test_acquire_async(self):
+        limiter = TokenBucketLimiter(requests_per_period=1000, period=1)
+        asyncio.run(limiter.acquire_async(tokens=10))
+        self.assertLess(limiter.available_requests, 1000)
+
+    def test_shared_limiter(self):
+        limiter = get_shared_limiter("model", requests_per_period=10, period=1)
+        self.assertIs(get_shared_limiter("model", 10, 1), limiter)
+        self.assertIsNot(get_shared_limiter("model", 20, 1), limiter)
+
+
+if __name__ == "__main__":
+    unittest.main()
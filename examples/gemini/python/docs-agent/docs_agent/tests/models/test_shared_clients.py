@@ -0,0 +1,54 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+from unittest import mock
+
+from docs_agent.models import google_genai
+from docs_agent.models.google_genai import Gemini
+from docs_agent.utilities.config import Models
+
+
+def make_gemini(language_model, api_key="test-key"):
+    return Gemini(
+        models_config=Models(
+            language_model=language_model,
+            embedding_model="text-embedding-004",
+            api_key=api_key,
+        )
+    )
+
+
+class TestSharedClients(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(google_genai.shared_clients, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(google_genai.genai, "Client")
+        self.client_class = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_clients_are_created_on_first_use_and_shared(self):
+        flash = make_gemini("gemini-2.0-flash")
+        pro = make_gemini("gemini-1.5-pro")
+        self.client_class.assert_not_called()
+        self.assertIs(flash.client, pro.client)
+        self.client_class.assert_called_once_with(api_key="test-key")
+        # Another API key uses another client.
+        make_gemini("gemini-2.0-flash", api_key="other-key").client
+        self.assertEqual(self.client_class.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+from docs_agent.postprocess.docs_retriever import FullPage
+from docs_agent.preprocess.splitters.markdown_splitter import Section
+from docs_agent.preprocess.splitters.markdown_splitter import parse_parent_tree
+
+
+def make_section(id, parent_tree):
+    return Section(
+        id=id,
+        name_id=f"section_{id}",
+        page_title="Page",
+        section_title=f"Section {id}",
+        level=len(parent_tree) + 1,
+        previous_id=id - 1,
+        parent_tree=str(parent_tree),
+        token_count=10,
+        content=f"Content {id}",
+    )
+
+
+class TestFullPage(unittest.TestCase):
+    def setUp(self):
+        # 1
+        # ├── 2
+        # │   └── 4
+        # └── 3
+        # 5
+        self.page = FullPage(
+            [
+                make_section(1, []),
+                make_section(2, [1]),
+                make_section(3, [1]),
+                make_section(4, [1, 2]),
+                make_section(5, []),
+            ]
+        )
+
+    def test_parse_parent_tree(self):
+        self.assertEqual(parse_parent_tree("[1, 2]"), (1, 2))
+        self.assertEqual(parse_parent_tree("[]"), ())
+        self.assertEqual(parse_parent_tree([3]), (3,))
+        with self.assertRaises(ValueError):
+            parse_parent_tree("[__import__('os')]")
+
+    def test_relations(self):
+        ids = lambda page: [section.id for section in page.section_list]
+        self.assertEqual(ids(self.page.returnChildrenSections(1)), [2, 3])
+        self.assertEqual(ids(self.page.returnSiblingSections(2)), [3])
+        self.assertEqual(ids(self.page.returnSiblingSections(1)), [5])
+        self.assertEqual(self.page.returnParentSection(4).id, 2)
+        self.assertIsNone(self.page.returnParentSection(1))
+        self.assertEqual(ids(self.page.returnChildrenSections(9)), [])
+
+    def test_build_sections(self):
+        page = self.page.buildSections(
+            section_id=2, children=True, parent=True, siblings=True
+        )
+        self.assertEqual([section.id for section in page.section_list], [1, 2, 3, 4])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import unittest
+
+from docs_agent.preprocess import chunk_manifest
+
+
+class TestChunkManifest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = self.temp_dir.name
+        self.source = os.path.join(self.root, "page.md")
+        self.include = os.path.join(self.root, "_include.md")
+        self.chunk = os.path.join(self.root, "page_0.md")
+        self.write(self.source, "# Page\n\n<<_include.md>>\n")
+        self.write(self.include, "Included text.\n")
+        self.write(self.chunk, "Chunk text.\n")
+        self.manifest = {"files": {}, "dependencies": {}}
+        chunk_manifest.record_source_file(
+            manifest=self.manifest,
+            source_path=self.source,
+            input_path_count=0,
+            relative_path="page.md",
+            chunks=[self.chunk],
+            current_dependencies={},
+        )
+        self.file_index = {self.chunk: {}}
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, path, content):
+        with open(path, "w", encoding="utf-8") as output_file:
+            output_file.write(content)
+
+    def needs_processing(self):
+        return chunk_manifest.needs_processing(
+            self.manifest, self.source, {}, self.file_index
+        )
+
+    def test_find_include_dependencies(self):
+        content = '<<_a.md>>\nText\n  {% include "b.html" %}\n<<_a.md>>\n'
+        self.assertEqual(
+            chunk_manifest.find_include_dependencies(content, "/docs/guide", "/html"),
+            ["/docs/guide/_a.md", "/html/b.html"],
+        )
+
+    def test_unchanged_file_is_not_processed(self):
+        self.assertEqual(self.manifest["files"][self.source]["includes"], [self.include])
+        self.assertFalse(self.needs_processing())
+
+    def test_changed_file_is_processed(self):
+        self.write(self.source, "# Page\n\nNew text.\n")
+        self.assertTrue(self.needs_processing())
+
+    def test_changed_include_is_processed(self):
+        self.write(self.include, "Changed text.\n")
+        self.assertTrue(self.needs_processing())
+
+    def test_missing_chunk_is_processed(self):
+        os.remove(self.chunk)
+        self.assertTrue(self.needs_processing())
+
+    def test_changed_nested_html_include_is_processed(self):
+        # The HTML includes of a Markdown include are also expanded.
+        snippet = os.path.join(self.root, "snippet.html")
+        self.write(snippet, "<p>Snippet.</p>\n")
+        self.write(self.include, '{% include "snippet.html" %}\n')
+        chunk_manifest.record_source_file(
+            manifest=self.manifest,
+            source_path=self.source,
+            input_path_count=0,
+            relative_path="page.md",
+            chunks=[self.chunk],
+            current_dependencies={},
+            include_path_html=self.root,
+        )
+        self.assertEqual(
+            self.manifest["files"][self.source]["includes"], [self.include, snippet]
+        )
+        self.assertFalse(self.needs_processing())
+        self.write(snippet, "<p>Changed snippet.</p>\n")
+        self.assertTrue(self.needs_processing())
+
+    def test_new_file_is_processed(self):
+        self.assertTrue(
+            chunk_manifest.needs_processing(
+                self.manifest, os.path.join(self.root, "new.md"), {}, self.file_index
+            )
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
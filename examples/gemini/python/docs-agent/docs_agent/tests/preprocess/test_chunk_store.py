@@ -0,0 +1,61 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import unittest
+
+from docs_agent.preprocess import chunk_store
+
+
+class TestChunkStore(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.output_path = self.temp_dir.name
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_chunks(self, chunks):
+        chunk_writer = chunk_store.ChunkWriter(self.output_path)
+        for chunk_id, content, metadata in chunks:
+            chunk_writer.write(chunk_id, content, metadata)
+        chunk_writer.close()
+        return chunk_writer
+
+    def test_write_and_iterate_chunks(self):
+        chunks = [
+            ("a/page_0.md", "First chunk.\n", {"UUID": "1", "md_hash": "x"}),
+            ("a/page_1.md", "Second\nchunk.", {"UUID": "2", "md_hash": "y"}),
+        ]
+        chunk_writer = self.write_chunks(chunks)
+        self.assertEqual(chunk_writer.count, 2)
+        self.assertEqual(list(chunk_store.iterate_chunks(self.output_path)), chunks)
+        self.assertEqual(chunk_store.count_chunks(self.output_path), 2)
+        self.assertFalse(os.path.exists(chunk_writer.temp_path))
+
+    def test_copied_lines_are_unchanged(self):
+        self.write_chunks([("a/page_0.md", "Text.", {"UUID": "1"})])
+        chunk_lines = chunk_store.read_chunk_lines(self.output_path)
+        chunk_writer = chunk_store.ChunkWriter(self.output_path)
+        chunk_writer.write_line(chunk_lines["a/page_0.md"][1])
+        chunk_writer.close()
+        self.assertEqual(chunk_store.read_chunk_lines(self.output_path), chunk_lines)
+
+    def test_read_chunk_lines_without_a_file(self):
+        self.assertIsNone(chunk_store.read_chunk_lines(self.output_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
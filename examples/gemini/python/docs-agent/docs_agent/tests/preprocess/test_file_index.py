@@ -0,0 +1,88 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+from docs_agent.preprocess import file_index
+from docs_agent.preprocess import populate_vector_database
+from docs_agent.preprocess.file_index import FileIndex
+
+
+class TestFileIndex(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.output_path = self.temp_dir.name
+        self.entries = {
+            "/data/b_0.md": {"UUID": "2", "md_hash": "y"},
+            "/data/a_0.md": {"UUID": "1", "md_hash": "x"},
+        }
+        self.write_json({"Old product": {}, "Product": self.entries})
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_json(self, index_object):
+        json_path, _ = file_index.get_index_paths(self.output_path)
+        with open(json_path, "w", encoding="utf-8") as outfile:
+            json.dump(index_object, outfile)
+
+    def test_lookups_and_streaming(self):
+        index = FileIndex(self.output_path)
+        self.assertEqual(index.product_name, "Product")
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.get("/data/a_0.md"), {"UUID": "1", "md_hash": "x"})
+        self.assertIsNone(index.get("/data/c_0.md"))
+        self.assertIn("/data/b_0.md", index)
+        self.assertEqual(list(index.items(batch_size=1)), list(self.entries.items()))
+        index.close()
+
+    def test_stale_sidecar_is_rebuilt(self):
+        file_index.write_sidecar(self.output_path, {"Product": self.entries})
+        self.assertTrue(file_index.is_sidecar_current(self.output_path))
+        self.write_json({"Product": {"/data/c_0.md": {"UUID": "3"}}})
+        json_path, _ = file_index.get_index_paths(self.output_path)
+        os.utime(json_path, ns=(0, 0))
+        self.assertFalse(file_index.is_sidecar_current(self.output_path))
+        index = FileIndex(self.output_path)
+        self.assertEqual(list(index.keys()), ["/data/c_0.md"])
+        index.close()
+
+    def test_missing_json_file(self):
+        with self.assertRaises(FileNotFoundError):
+            FileIndex(os.path.join(self.output_path, "missing"))
+
+
+    def test_populate_closes_the_file_index(self):
+        product_config = types.SimpleNamespace(
+            output_path=self.output_path, chunk_format="files"
+        )
+        with mock.patch.object(
+            FileIndex, "close", autospec=True, side_effect=FileIndex.close
+        ) as close, mock.patch.object(
+            populate_vector_database,
+            "populate_text_chunks",
+            side_effect=RuntimeError("failed"),
+        ):
+            with self.assertRaises(RuntimeError):
+                populate_vector_database.populateToDbFromProduct(product_config)
+        self.assertEqual(close.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from docs_agent.preprocess.files_to_plain_text import (
+    process_files_from_input,
+    save_file_index_json,
+)
+from docs_agent.utilities.config import Conditions, Input, Models, ProductConfig
+
+
+class TestParallelChunking(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.input_path = os.path.join(self.temp_dir.name, "input")
+        for index in range(8):
+            # Spread the files over directories so that the walk order matters.
+            path = os.path.join(
+                self.input_path, f"guide_{index % 3}", f"page_{index}.md"
+            )
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as output_file:
+                output_file.write(
+                    f"# Page {index}\n\nIntroduction of page {index}.\n\n"
+                    f"## Setup\n\nSet up the example of page {index}.\n\n"
+                    f"## Usage\n\nUse the example of page {index}.\n"
+                )
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def process(self, jobs):
+        """Processes the input files with `jobs` processes and returns the
+        list of files, the chunks and the content of `file_index.json`."""
+        # The UUIDs of chunks depend on their paths, so both runs write into
+        # the same output path.
+        output_path = os.path.join(self.temp_dir.name, "output")
+        if os.path.exists(output_path):
+            shutil.rmtree(output_path)
+        os.makedirs(output_path)
+        product_config = ProductConfig(
+            product_name="Test",
+            models=Models(
+                language_model="gemini-2.0-flash",
+                embedding_model="text-embedding-004",
+                api_key="test-key",
+            ),
+            output_path=output_path,
+            db_configs=[],
+            inputs=[],
+            conditions=Conditions(condition_text=""),
+        )
+        input_item = Input(path=self.input_path, url_prefix="https://example.com/docs")
+        _, md_count, _, file_index, metadata = process_files_from_input(
+            product_config=product_config,
+            inputpathitem=input_item,
+            splitter="process_sections",
+            jobs=jobs,
+        )
+        self.assertEqual(md_count, 8)
+        save_file_index_json(output_path, {"Test": metadata})
+        chunks = {}
+        for root, _, files in os.walk(output_path):
+            for file in files:
+                path = os.path.join(root, file)
+                if path.startswith(os.path.join(output_path, "text_chunks_")):
+                    with open(path, "r", encoding="utf-8") as chunk_file:
+                        chunks[os.path.relpath(path, output_path)] = chunk_file.read()
+        with open(
+            os.path.join(output_path, "file_index.json"), "r", encoding="utf-8"
+        ) as json_file:
+            file_index_json = json_file.read()
+        return file_index, chunks, file_index_json
+
+    def test_jobs_produce_the_same_output_as_a_serial_run(self):
+        file_index, chunks, file_index_json = self.process(jobs=1)
+        self.assertEqual(len(file_index), 8)
+        self.assertGreater(len(chunks), 8)
+        # The order of the files and of the entries of `file_index.json` is
+        # also the same, since the results of the pool are merged in the
+        # order of the tasks.
+        self.assertEqual(self.process(jobs=2), (file_index, chunks, file_index_json))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import unittest
+
+from docs_agent.preprocess.populate_journal import PopulateJournal
+
+
+class TestPopulateJournal(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "journal.jsonl")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def interrupted_run(self):
+        journal = PopulateJournal(self.path)
+        journal.start(total=3)
+        journal.record_chroma_batch(["1", "2"], ["a", "b"])
+        journal.record_document("corpus", "page", "corpora/corpus/documents/d")
+        journal.record_corpus_chunk("corpus", "1", "a")
+        journal.close()
+
+    def test_resume_interrupted_run(self):
+        self.interrupted_run()
+        # Simulate a crash in the middle of writing a record.
+        with open(self.path, "a", encoding="utf-8") as journal_file:
+            journal_file.write('{"type": "corpus", "corp')
+        journal = PopulateJournal(self.path)
+        self.assertTrue(journal.resumed)
+        self.assertEqual(journal.committed_batches, 1)
+        self.assertEqual(journal.committed_chroma, {"1": "a", "2": "b"})
+        self.assertEqual(
+            journal.document_names["corpus"], {"page": "corpora/corpus/documents/d"}
+        )
+        self.assertFalse(journal.needs_corpus_upload("corpus", "1", "a"))
+        self.assertTrue(journal.needs_corpus_upload("corpus", "2", "b"))
+        self.assertFalse(journal.needs_corpus_upload("corpus", "2", "changed"))
+        self.assertEqual(journal.pending_corpus_count("corpus"), 1)
+        # The resumed run keeps the records of the interrupted run.
+        journal.start(total=3)
+        journal.record_corpus_chunk("corpus", "2", "b")
+        journal.close()
+        journal = PopulateJournal(self.path)
+        self.assertEqual(journal.pending_corpus_count("corpus"), 0)
+
+    def test_completed_run_starts_fresh(self):
+        self.interrupted_run()
+        journal = PopulateJournal(self.path)
+        journal.start(total=3)
+        journal.complete()
+        self.assertEqual(journal.committed_chroma, {})
+        journal = PopulateJournal(self.path)
+        self.assertFalse(journal.resumed)
+        self.assertEqual(journal.committed_batches, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import types
+import unittest
+import uuid
+
+import chromadb
+
+from docs_agent.preprocess.populate_vector_database import (
+    delete_unmatched_entries_in_chroma,
+    plan_chroma_changes,
+    process_a_batch_of_chunks,
+)
+
+
+class FakeEmbeddingFunction:
+    def __init__(self):
+        self.embedded = []
+
+    def embed_documents(self, documents, keys=None):
+        self.embedded.extend(documents)
+        return [[float(len(document)), 1.0, 0.0] for document in documents]
+
+
+def make_item(entry_id, md_hash, content):
+    return (
+        f"{entry_id}.md",
+        types.SimpleNamespace(
+            section=types.SimpleNamespace(
+                uuid=entry_id, md_hash=md_hash, content=content
+            ),
+            metadata={"md_hash": md_hash},
+        ),
+    )
+
+
+class TestPopulatePlan(unittest.TestCase):
+    def setUp(self):
+        client = chromadb.EphemeralClient()
+        # Embeddings are always provided, so the collection has no embedding
+        # function.
+        self.collection = client.create_collection(
+            name=f"test_populate_plan_{uuid.uuid4().hex}", embedding_function=None
+        )
+        self.collection.upsert(
+            ids=["unchanged", "changed", "removed"],
+            documents=["Same content.", "Old content.", "Removed content."],
+            embeddings=[[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]],
+            metadatas=[{"md_hash": "a"}, {"md_hash": "b"}, {"md_hash": "c"}],
+        )
+
+    def test_plan_and_apply_changes(self):
+        batch = [
+            make_item("unchanged", "a", "Same content."),
+            make_item("changed", "b2", "New content."),
+            make_item("new", "d", "Added content."),
+        ]
+        chunk_entries = [
+            {"UUID": item.section.uuid, "md_hash": item.section.md_hash}
+            for _, item in batch
+        ]
+        plan = plan_chroma_changes(self.collection, chunk_entries)
+        self.assertEqual(plan.to_add, {"new"})
+        self.assertEqual(plan.to_update, {"changed"})
+        self.assertEqual(plan.unchanged, {"unchanged"})
+        self.assertEqual(plan.to_delete, ["removed"])
+        self.assertTrue(plan.needs_upsert("changed"))
+        self.assertFalse(plan.needs_upsert("unchanged"))
+
+        deleted = delete_unmatched_entries_in_chroma(
+            None, None, self.collection, plan=plan, page_size=1
+        )
+        self.assertEqual(deleted, ["removed"])
+        embedding_function = FakeEmbeddingFunction()
+        counts = process_a_batch_of_chunks(
+            batch,
+            self.collection,
+            embedding_function=embedding_function,
+            plan=plan,
+        )
+        self.assertEqual(counts, (2, 1, 0))
+        # Only the new and changed entries are embedded.
+        self.assertEqual(embedding_function.embedded, ["New content.", "Added content."])
+
+        entries = self.collection.get(include=["documents", "metadatas"])
+        documents = dict(zip(entries["ids"], entries["documents"]))
+        metadatas = dict(zip(entries["ids"], entries["metadatas"]))
+        self.assertEqual(
+            documents,
+            {
+                "unchanged": "Same content.",
+                "changed": "New content.",
+                "new": "Added content.",
+            },
+        )
+        # The changed entry is updated in place (with the same UUID).
+        self.assertEqual(metadatas["changed"]["md_hash"], "b2")
+        # The collection is now in sync with the chunks.
+        plan = plan_chroma_changes(self.collection, chunk_entries)
+        self.assertEqual(plan.unchanged, {"unchanged", "changed", "new"})
+        self.assertEqual((plan.to_add, plan.to_update, plan.to_delete), (set(), set(), []))
+
+
+if __name__ == "__main__":
+    unittest.main()
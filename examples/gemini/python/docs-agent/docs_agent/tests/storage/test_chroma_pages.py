@@ -0,0 +1,132 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import tempfile
+import unittest
+
+import chromadb
+
+from docs_agent.postprocess.docs_retriever import query_vector_store_to_build
+from docs_agent.storage.chroma import ChromaCollectionEnhanced
+from docs_agent.storage.page_cache import PageCache, bump_generation
+
+
+def make_metadata(origin_uuid, section_id, page_title):
+    return {
+        "origin_uuid": origin_uuid,
+        "section_id": section_id,
+        "name_id": f"{page_title}_{section_id}",
+        "page_title": page_title,
+        "section_title": f"Section {section_id}",
+        "level": 1,
+        "previous_id": 0,
+        "parent_tree": "[0]",
+        "token_estimate": 10,
+        "url": f"https://example.com/{page_title}",
+    }
+
+
+class FakeItem:
+    def __init__(self, document, metadata, distance):
+        self.document = document
+        self.metadata = metadata
+        self.distance = distance
+
+
+class FakeQueryResult:
+    def __init__(self, items):
+        self.items = items
+
+    def returnDBObjList(self):
+        return self.items
+
+
+class TestChromaPages(unittest.TestCase):
+    def setUp(self):
+        client = chromadb.EphemeralClient()
+        self.collection = client.get_or_create_collection(name="test_chroma_pages")
+        self.collection.upsert(
+            ids=["a1", "a2", "b1", "c1"],
+            documents=["A one", "A two", "B one", "C one"],
+            embeddings=[[1.0, 0.0], [0.9, 0.1], [0.0, 1.0], [0.5, 0.5]],
+            metadatas=[
+                make_metadata("page-a", 1, "a"),
+                make_metadata("page-a", 2, "a"),
+                make_metadata("page-b", 1, "b"),
+                make_metadata("page-c", 1, "c"),
+            ],
+        )
+        self.enhanced = ChromaCollectionEnhanced(self.collection, None)
+        self.get_calls = []
+        original_get = self.collection.get
+
+        def counting_get(*args, **kwargs):
+            self.get_calls.append(kwargs)
+            return original_get(*args, **kwargs)
+
+        self.enhanced.collection = type(
+            "CountingCollection",
+            (),
+            {"get": staticmethod(counting_get), "name": self.collection.name},
+        )()
+
+    def test_pages_are_fetched_in_one_query(self):
+        pages = self.enhanced.getPageOriginUUIDLists(["page-a", "page-b", "page-a"])
+        self.assertEqual(len(self.get_calls), 1)
+        self.assertEqual(sorted(pages), ["page-a", "page-b"])
+        self.assertEqual(
+            sorted(section.uuid for section in pages["page-a"].section_list),
+            ["a1", "a2"],
+        )
+        self.assertEqual(self.enhanced.getPageOriginUUIDList("missing").section_list, [])
+
+    def test_query_vector_store_to_build_expands_pages_once(self):
+        hits = [
+            FakeItem("A one", make_metadata("page-a", 1, "a"), 0.1),
+            FakeItem("A two", make_metadata("page-a", 2, "a"), 0.2),
+            FakeItem("B one", make_metadata("page-b", 1, "b"), 0.3),
+        ]
+        self.enhanced.query = lambda text, top_k: FakeQueryResult(hits)
+        search_result, context = query_vector_store_to_build(
+            collection=self.enhanced,
+            docs_agent_config="normal",
+            question="question",
+            max_sources=3,
+        )
+        self.assertEqual(len(search_result), 3)
+        self.assertEqual(len(self.get_calls), 1)
+        # Each section is templated once, although two results share a page.
+        self.assertEqual(context.count("The section titled"), 3)
+        for document in ["A one", "A two", "B one"]:
+            self.assertEqual(context.count(document), 1)
+
+    def test_pages_are_cached_until_the_generation_changes(self):
+        with tempfile.TemporaryDirectory() as chroma_dir:
+            self.enhanced.page_cache = PageCache(max_entries=10)
+            self.enhanced.chroma_dir = chroma_dir
+            self.enhanced.getPageOriginUUIDLists(["page-a"])
+            pages = self.enhanced.getPageOriginUUIDLists(["page-a", "page-b"])
+            self.assertEqual(len(self.get_calls), 2)
+            self.assertEqual(self.get_calls[1]["where"], {"origin_uuid": {"$in": ["page-b"]}})
+            self.assertEqual(sorted(pages), ["page-a", "page-b"])
+            self.enhanced.getPageOriginUUIDLists(["page-a", "page-b"])
+            self.assertEqual(len(self.get_calls), 2)
+            bump_generation(chroma_dir, self.collection.name)
+            self.enhanced.getPageOriginUUIDLists(["page-a"])
+            self.assertEqual(len(self.get_calls), 3)
+            self.assertEqual(self.enhanced.page_cache.stats()["hits"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
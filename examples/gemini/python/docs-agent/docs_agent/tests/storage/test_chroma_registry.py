@@ -0,0 +1,69 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import tempfile
+import unittest
+
+from docs_agent.storage.chroma import (
+    get_shared_client,
+    get_shared_collection,
+    refresh_chroma,
+)
+from docs_agent.storage.page_cache import bump_generation
+
+
+class CountingClient:
+    def __init__(self, client):
+        self.client = client
+        self.lookups = 0
+
+    def get_collection(self, name):
+        self.lookups += 1
+        return self.client.get_collection(name=name)
+
+
+class TestChromaRegistry(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+        self.chroma_dir = self.temp_dir.name
+        client = get_shared_client(self.chroma_dir)
+        client.get_or_create_collection(name="docs")
+        self.client = CountingClient(client)
+
+    def tearDown(self):
+        refresh_chroma(self.chroma_dir)
+        self.temp_dir.cleanup()
+
+    def test_client_is_shared_per_directory(self):
+        self.assertIs(get_shared_client(self.chroma_dir), self.client.client)
+
+    def test_collection_is_looked_up_once(self):
+        first = get_shared_collection(self.client, self.chroma_dir, "docs")
+        second = get_shared_collection(self.client, self.chroma_dir, "docs")
+        self.assertIs(first, second)
+        self.assertEqual(self.client.lookups, 1)
+
+    def test_collection_is_looked_up_again_after_refresh_or_populate(self):
+        get_shared_collection(self.client, self.chroma_dir, "docs")
+        refresh_chroma(self.chroma_dir, "docs")
+        get_shared_collection(self.client, self.chroma_dir, "docs")
+        self.assertEqual(self.client.lookups, 2)
+        bump_generation(self.chroma_dir, "docs")
+        get_shared_collection(self.client, self.chroma_dir, "docs")
+        get_shared_collection(self.client, self.chroma_dir, "docs")
+        self.assertEqual(self.client.lookups, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
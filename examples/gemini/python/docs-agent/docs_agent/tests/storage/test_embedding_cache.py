@@ -0,0 +1,117 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import time
+import unittest
+
+from docs_agent.storage.embedding_cache import EmbeddingCache, content_key
+from docs_agent.storage.embedding_cache import QueryEmbeddingCache
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "cache.sqlite")
+        self.cache = EmbeddingCache(path=self.path, max_entries=3)
+
+    def tearDown(self):
+        self.cache.close()
+        self.temp_dir.cleanup()
+
+    def test_put_and_get_many(self):
+        self.cache.put_many(
+            "text-embedding-004",
+            "RETRIEVAL_DOCUMENT",
+            [("a", [0.5, 0.25]), ("b", [1.0, -2.0])],
+        )
+        found = self.cache.get_many(
+            "text-embedding-004", "RETRIEVAL_DOCUMENT", ["a", "b", "c"]
+        )
+        self.assertEqual(found, {"a": [0.5, 0.25], "b": [1.0, -2.0]})
+
+    def test_keys_are_scoped_by_model_and_task_type(self):
+        self.cache.put_many("text-embedding-004", "RETRIEVAL_DOCUMENT", [("a", [1.0])])
+        self.assertEqual(
+            self.cache.get_many("text-embedding-004", "RETRIEVAL_QUERY", ["a"]), {}
+        )
+        self.assertEqual(self.cache.get_many("embedding-001", "RETRIEVAL_DOCUMENT", ["a"]), {})
+
+    def test_entries_persist_across_instances(self):
+        self.cache.put_many("text-embedding-004", "RETRIEVAL_DOCUMENT", [("a", [1.0])])
+        other_cache = EmbeddingCache(path=self.path)
+        self.assertEqual(
+            other_cache.get_many("text-embedding-004", "RETRIEVAL_DOCUMENT", ["a"]),
+            {"a": [1.0]},
+        )
+        other_cache.close()
+
+    def test_least_recently_used_entries_are_evicted(self):
+        for key in ["a", "b", "c"]:
+            self.cache.put_many("m", "t", [(key, [1.0])])
+            time.sleep(0.01)
+        # Reading "a" makes "b" the least recently used entry.
+        self.cache.get_many("m", "t", ["a"])
+        time.sleep(0.01)
+        self.cache.put_many("m", "t", [("d", [1.0])])
+        self.assertEqual(self.cache.count(), 3)
+        self.assertEqual(
+            sorted(self.cache.get_many("m", "t", ["a", "b", "c", "d"])),
+            ["a", "c", "d"],
+        )
+
+    def test_prune_and_clear(self):
+        self.cache.put_many("m", "t", [("a", [1.0]), ("b", [1.0])])
+        self.assertEqual(self.cache.prune(max_entries=1), 1)
+        self.assertEqual(self.cache.count(), 1)
+        self.assertEqual(self.cache.clear(), 1)
+        self.assertEqual(self.cache.count(), 0)
+
+    def test_content_key(self):
+        self.assertEqual(content_key("hello"), content_key("hello"))
+        self.assertNotEqual(content_key("hello"), content_key("hello!"))
+
+
+class TestQueryEmbeddingCache(unittest.TestCase):
+    def test_normalized_questions_share_an_entry(self):
+        cache = QueryEmbeddingCache(max_entries=2)
+        cache.put("text-embedding-004", "RETRIEVAL_QUERY", "What is Gemini?", [1.0])
+        self.assertEqual(
+            cache.get("text-embedding-004", "RETRIEVAL_QUERY", "  what is   GEMINI?"),
+            [1.0],
+        )
+        self.assertIsNone(cache.get("embedding-001", "RETRIEVAL_QUERY", "What is Gemini?"))
+        cache.put("text-embedding-004", "RETRIEVAL_QUERY", "b", [2.0])
+        cache.put("text-embedding-004", "RETRIEVAL_QUERY", "c", [3.0])
+        self.assertIsNone(cache.get("text-embedding-004", "RETRIEVAL_QUERY", "What is Gemini?"))
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 2)
+
+    def test_embeddings_persist_in_the_disk_cache(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            disk_cache = EmbeddingCache(path=os.path.join(temp_dir, "cache.sqlite"))
+            QueryEmbeddingCache(disk_cache=disk_cache).put(
+                "text-embedding-004", "RETRIEVAL_QUERY", "What is Gemini?", [0.5]
+            )
+            cache = QueryEmbeddingCache(disk_cache=disk_cache)
+            self.assertEqual(
+                cache.get("text-embedding-004", "RETRIEVAL_QUERY", "what is gemini?"),
+                [0.5],
+            )
+            disk_cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,161 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import unittest
+
+import chromadb
+import numpy as np
+
+from docs_agent.benchmarks.vector_storage_benchmark import run_vector_storage_benchmark
+from docs_agent.storage.flat_index import (
+    FlatIndex,
+    FlatIndexCollection,
+    export_flat_index,
+    load_flat_index,
+    quantize_vectors,
+)
+
+
+def make_metadata(origin_uuid, section_id, md_hash):
+    return {
+        "origin_uuid": origin_uuid,
+        "section_id": section_id,
+        "name_id": f"{origin_uuid}_{section_id}",
+        "page_title": origin_uuid,
+        "section_title": f"Section {section_id}",
+        "level": 1,
+        "previous_id": 0,
+        "parent_tree": "[0]",
+        "token_estimate": 10,
+        "md_hash": md_hash,
+    }
+
+
+class TestFlatIndex(unittest.TestCase):
+    def setUp(self):
+        client = chromadb.EphemeralClient()
+        self.collection = client.get_or_create_collection(name="test_flat_index")
+        self.collection.upsert(
+            ids=["a1", "a2", "b1", "c1", "d1"],
+            documents=["A one", "A two", "B one", "C one", "D one"],
+            embeddings=[
+                [1.0, 0.0, 0.0],
+                [0.9, 0.1, 0.0],
+                [0.0, 1.0, 0.0],
+                [0.5, 0.5, 0.1],
+                [0.0, 0.2, 1.0],
+            ],
+            metadatas=[
+                make_metadata("page-a", 1, "h1"),
+                make_metadata("page-a", 2, "h2"),
+                make_metadata("page-b", 1, "h3"),
+                make_metadata("page-c", 1, "h4"),
+                make_metadata("page-d", 1, "h5"),
+            ],
+        )
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.index_dir = os.path.join(self.temp_dir.name, "test_flat_index.flat")
+        # Export with a small page size to cover more than one page.
+        self.assertEqual(
+            export_flat_index(self.collection, self.index_dir, page_size=2), 5
+        )
+        self.flat_index = load_flat_index(self.index_dir)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_search_matches_chroma(self):
+        query = [0.8, 0.3, 0.1]
+        expected = self.collection.query(query_embeddings=[query], n_results=3)
+        rows, distances = self.flat_index.search(query, top_k=3)
+        self.assertEqual([self.flat_index.ids[row] for row in rows], expected["ids"][0])
+        for distance, expected_distance in zip(distances, expected["distances"][0]):
+            self.assertAlmostEqual(float(distance), expected_distance, places=4)
+
+    def test_search_with_filter(self):
+        rows, _ = self.flat_index.search(
+            [1.0, 0.0, 0.0], top_k=10, where={"origin_uuid": {"$in": ["page-b"]}}
+        )
+        self.assertEqual([self.flat_index.ids[row] for row in rows], ["b1"])
+
+    def test_collection_methods(self):
+        collection = FlatIndexCollection(self.flat_index, None)
+        collection.embedQuery = lambda text: [[1.0, 0.0, 0.0]]
+        result = collection.query("question", top_k=2)
+        self.assertEqual([item.id for item in result.returnDBObjList()], ["a1", "a2"])
+        pages = collection.getPageOriginUUIDLists(["page-a", "missing"])
+        self.assertEqual([s.uuid for s in pages["page-a"].section_list], ["a1", "a2"])
+        self.assertEqual(pages["missing"].section_list, [])
+        self.assertTrue(collection.hasMdHashes(["h1", "h5"]))
+        self.assertFalse(collection.hasMdHashes(["h1", "changed"]))
+
+    def test_snapshot_is_memory_mapped(self):
+        self.assertIsInstance(self.flat_index.embeddings, np.memmap)
+        self.assertIsInstance(self.flat_index.squared_norms, np.memmap)
+        self.assertEqual(self.flat_index.documents[3], "C one")
+        self.assertEqual(self.flat_index.metadatas[4]["md_hash"], "h5")
+        self.assertEqual(list(self.flat_index.findRows("origin_uuid", ["page-a"])), [0, 1])
+        self.assertEqual(list(self.flat_index.findRows("level", [1])), [0, 1, 2, 3, 4])
+
+    def test_quantized_snapshot_is_reranked(self):
+        for vector_dtype in ("float16", "int8"):
+            index_dir = os.path.join(self.temp_dir.name, vector_dtype)
+            export_flat_index(self.collection, index_dir, vector_dtype=vector_dtype)
+            flat_index = FlatIndex(index_dir)
+            self.assertEqual(flat_index.embeddings.dtype, np.dtype(vector_dtype))
+            self.assertIsNotNone(flat_index.full_embeddings)
+            query = [0.8, 0.3, 0.1]
+            expected_rows, expected_distances = self.flat_index.search(query, top_k=3)
+            rows, distances = flat_index.search(query, top_k=3)
+            self.assertEqual(list(rows), list(expected_rows))
+            np.testing.assert_allclose(distances, expected_distances, rtol=1e-5)
+
+    def test_int8_quantization(self):
+        vectors = np.array([[0.5, -1.0, 0.25], [0.0, 0.0, 0.0]], dtype=np.float32)
+        quantized, scales = quantize_vectors(vectors, "int8")
+        self.assertEqual(list(quantized[0]), [64, -127, 32])
+        np.testing.assert_allclose(quantized * scales[:, None], vectors, atol=0.01)
+
+    def test_vector_storage_benchmark(self):
+        embeddings = np.random.default_rng(0).standard_normal((200, 16))
+        results = run_vector_storage_benchmark(
+            embeddings, dimensions=(None, 8), num_queries=20, top_k=5
+        )
+        self.assertEqual(len(results), 6)
+        self.assertEqual(results[0]["recall"], 1.0)
+        self.assertEqual(results[2]["vector_dtype"], "int8")
+        self.assertGreater(results[2]["compression"], 3)
+        self.assertGreater(results[2]["recall"], 0.9)
+        self.assertEqual(results[3]["dimensions"], 8)
+        # Queries are held out of the searched embeddings.
+        self.assertEqual(results[0]["memory_bytes"], 180 * 16 * 4)
+        # Quantized embeddings also keep a float32 copy for re-ranking.
+        self.assertEqual(results[0]["rerank_bytes"], 0)
+        self.assertEqual(results[2]["rerank_bytes"], 180 * 16 * 4)
+        self.assertGreater(results[2]["disk_bytes"], results[0]["disk_bytes"])
+
+    def test_index_is_reloaded_after_export(self):
+        self.collection.delete(ids=["d1"])
+        export_flat_index(self.collection, self.index_dir)
+        # Make sure that the modification time changes.
+        manifest_path = os.path.join(self.index_dir, "manifest.json")
+        stat = os.stat(manifest_path)
+        os.utime(manifest_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertEqual(len(load_flat_index(self.index_dir)), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
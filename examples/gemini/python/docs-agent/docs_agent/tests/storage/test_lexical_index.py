@@ -0,0 +1,215 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import unittest
+
+import chromadb
+
+from docs_agent.storage.chroma import ChromaCollectionEnhanced
+from docs_agent.storage.flat_index import FlatIndexCollection, export_flat_index
+from docs_agent.storage.flat_index import load_flat_index
+from docs_agent.storage.lexical_index import (
+    build_lexical_index,
+    is_decisive,
+    load_lexical_index,
+    reciprocal_rank_fusion,
+    tokenize,
+)
+from docs_agent.storage.page_cache import bump_generation
+
+
+class FakeModelsConfig:
+    embedding_model = "fake-embedding-model"
+
+
+class FakeEmbeddingFunction:
+    models_config = FakeModelsConfig()
+
+
+class TestLexicalIndex(unittest.TestCase):
+    def setUp(self):
+        client = chromadb.EphemeralClient()
+        self.collection = client.get_or_create_collection(name="test_lexical_index")
+        self.collection.upsert(
+            ids=["a1", "a2", "b1", "c1"],
+            documents=[
+                "Create a client with genai.Client() and an API key.",
+                "Set the temperature of the model.",
+                "The RESOURCE_EXHAUSTED error means that the quota is exceeded.",
+                "Stream the response of the model.",
+            ],
+            embeddings=[
+                [1.0, 0.0, 0.0],
+                [0.9, 0.1, 0.0],
+                [0.0, 1.0, 0.0],
+                [0.0, 0.2, 1.0],
+            ],
+            metadatas=[
+                {"section_title": "Clients", "page_title": "Quickstart"},
+                {"section_title": "Configuration", "page_title": "Models"},
+                {"section_title": "Errors", "page_title": "Troubleshooting"},
+                {"section_title": "Streaming", "page_title": "Models"},
+            ],
+        )
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.index_dir = os.path.join(self.temp_dir.name, "test.lexical")
+        self.assertEqual(
+            build_lexical_index(self.collection, self.index_dir, page_size=3), 4
+        )
+        self.lexical_index = load_lexical_index(self.index_dir)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def make_collection(self, lexical_search, chroma_dir=None):
+        collection = ChromaCollectionEnhanced(
+            self.collection,
+            FakeEmbeddingFunction(),
+            chroma_dir=chroma_dir,
+            lexical_index=self.lexical_index,
+            lexical_search=lexical_search,
+        )
+        self.embedded = []
+
+        def embed_query(text):
+            self.embedded.append(text)
+            return [[0.0, 0.1, 1.0]]
+
+        collection.embedQuery = embed_query
+        return collection
+
+    def test_tokenize(self):
+        self.assertEqual(
+            tokenize("Use genai.Client, not RESOURCE_EXHAUSTED."),
+            ["use", "genai.client", "genai", "client", "not", "resource_exhausted"],
+        )
+
+    def test_search(self):
+        rows, scores = self.lexical_index.search("RESOURCE_EXHAUSTED quota", top_k=2)
+        self.assertEqual([self.lexical_index.ids[row] for row in rows], ["b1"])
+        self.assertGreater(scores[0], 0)
+        # Titles are indexed too.
+        rows, _ = self.lexical_index.search("troubleshooting", top_k=2)
+        self.assertEqual([self.lexical_index.ids[row] for row in rows], ["b1"])
+        rows, _ = self.lexical_index.search("model", top_k=4)
+        self.assertEqual(
+            sorted(self.lexical_index.ids[row] for row in rows), ["a2", "c1"]
+        )
+        rows, _ = self.lexical_index.search("unknown words", top_k=4)
+        self.assertEqual(len(rows), 0)
+
+    def test_is_decisive(self):
+        self.assertTrue(is_decisive([5.0, 2.0], 2.0))
+        self.assertFalse(is_decisive([5.0, 3.0], 2.0))
+        self.assertTrue(is_decisive([1.0], 2.0))
+        self.assertFalse(is_decisive([], 2.0))
+
+    def test_reciprocal_rank_fusion(self):
+        self.assertEqual(
+            reciprocal_rank_fusion([["a", "b", "c"], ["c", "d"]]), ["c", "a", "b", "d"]
+        )
+
+    def test_fast_path_skips_the_embedding(self):
+        collection = self.make_collection("fast_path")
+        result = collection.query("What does RESOURCE_EXHAUSTED mean?", top_k=2)
+        items = result.returnDBObjList()
+        self.assertEqual([item.id for item in items], ["b1"])
+        self.assertEqual(items[0].distance, 0.0)
+        self.assertEqual(items[0].metadata["section_title"], "Errors")
+        self.assertEqual(self.embedded, [])
+        # A question without a decisive lexical match is embedded.
+        collection.query("model", top_k=2)
+        self.assertEqual(len(self.embedded), 1)
+
+    def test_fast_path_is_skipped_for_an_outdated_index(self):
+        # The lexical index was built from generation 0.
+        collection = self.make_collection("fast_path", chroma_dir=self.temp_dir.name)
+        collection.query("What does RESOURCE_EXHAUSTED mean?", top_k=2)
+        self.assertEqual(self.embedded, [])
+        bump_generation(self.temp_dir.name, self.collection.name)
+        self.collection.delete(ids=["b1"])
+        items = collection.query(
+            "What does RESOURCE_EXHAUSTED mean?", top_k=2
+        ).returnDBObjList()
+        self.assertEqual(len(self.embedded), 1)
+        self.assertNotIn("b1", [item.id for item in items])
+
+    def test_fast_path_is_skipped_for_an_outdated_flat_index(self):
+        # The flat index was exported after the collection was populated
+        # again, but the lexical index was built from generation 0.
+        self.collection.delete(ids=["b1"])
+        flat_index_dir = os.path.join(self.temp_dir.name, "test.flat")
+        export_flat_index(self.collection, flat_index_dir, generation=1)
+        collection = FlatIndexCollection(
+            load_flat_index(flat_index_dir),
+            FakeEmbeddingFunction(),
+            lexical_index=self.lexical_index,
+            lexical_search="fast_path",
+        )
+        embedded = []
+
+        def embed_query(text):
+            embedded.append(text)
+            return [[0.0, 0.1, 1.0]]
+
+        collection.embedQuery = embed_query
+        items = collection.query(
+            "What does RESOURCE_EXHAUSTED mean?", top_k=2
+        ).returnDBObjList()
+        self.assertEqual(len(embedded), 1)
+        self.assertNotIn("b1", [item.id for item in items])
+
+    def test_fusion_merges_both_searches(self):
+        collection = self.make_collection("fusion")
+        items = collection.query("genai.Client", top_k=2).returnDBObjList()
+        self.assertEqual(len(self.embedded), 1)
+        # c1 is the nearest embedding and a1 is the only lexical match.
+        self.assertEqual([item.id for item in items], ["c1", "a1"])
+        expected = self.collection.query(
+            query_embeddings=[[0.0, 0.1, 1.0]], n_results=4
+        )
+        distances = dict(zip(expected["ids"][0], expected["distances"][0]))
+        for item in items:
+            self.assertAlmostEqual(item.distance, distances[item.id], places=4)
+        # Filtered queries only use the vector search.
+        items = collection.query(
+            "genai.Client", top_k=2, where={"section_title": "Clients"}
+        ).returnDBObjList()
+        self.assertEqual([item.id for item in items], ["a1"])
+
+    def test_fusion_with_flat_index(self):
+        flat_index_dir = os.path.join(self.temp_dir.name, "test.flat")
+        export_flat_index(self.collection, flat_index_dir)
+        collection = FlatIndexCollection(
+            load_flat_index(flat_index_dir),
+            FakeEmbeddingFunction(),
+            lexical_index=self.lexical_index,
+            lexical_search="fusion",
+        )
+        collection.embedQuery = lambda text: [[0.0, 0.1, 1.0]]
+        chroma_items = (
+            self.make_collection("fusion").query("genai.Client", 2).returnDBObjList()
+        )
+        flat_items = collection.query("genai.Client", 2).returnDBObjList()
+        self.assertEqual(
+            [item.id for item in flat_items], [item.id for item in chroma_items]
+        )
+        for flat_item, chroma_item in zip(flat_items, chroma_items):
+            self.assertAlmostEqual(flat_item.distance, chroma_item.distance, places=4)
+
+
+if __name__ == "__main__":
+    unittest.main()
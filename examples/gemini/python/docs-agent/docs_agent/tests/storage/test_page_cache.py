@@ -0,0 +1,55 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import tempfile
+import unittest
+from unittest import mock
+
+from docs_agent.storage import page_cache
+from docs_agent.storage.page_cache import PageCache
+
+
+class TestPageCache(unittest.TestCase):
+    def test_least_recently_used_pages_are_evicted(self):
+        cache = PageCache(max_entries=2)
+        cache.put_many({"a": "page a", "b": "page b"})
+        self.assertEqual(cache.get_many(["a", "c"]), {"a": "page a"})
+        cache.put_many({"c": "page c"})
+        self.assertEqual(cache.get_many(["a", "b", "c"]), {"a": "page a", "c": "page c"})
+        stats = cache.stats()
+        self.assertEqual(stats["entries"], 2)
+        self.assertEqual(stats["hits"], 3)
+        self.assertEqual(stats["misses"], 2)
+        self.assertEqual(stats["evictions"], 1)
+
+    def test_generation(self):
+        with tempfile.TemporaryDirectory() as chroma_dir:
+            self.assertEqual(page_cache.read_generation(chroma_dir, "docs"), 0)
+            self.assertEqual(page_cache.bump_generation(chroma_dir, "docs"), 1)
+            self.assertEqual(page_cache.bump_generation(chroma_dir, "docs"), 2)
+            self.assertEqual(page_cache.read_generation(chroma_dir, "docs"), 2)
+            self.assertEqual(page_cache.read_generation(chroma_dir, "other"), 0)
+
+    def test_generation_is_only_read_again_after_a_change(self):
+        with tempfile.TemporaryDirectory() as chroma_dir:
+            page_cache.bump_generation(chroma_dir, "docs")
+            self.assertEqual(page_cache.read_generation(chroma_dir, "docs"), 1)
+            with mock.patch("builtins.open", side_effect=AssertionError):
+                self.assertEqual(page_cache.read_generation(chroma_dir, "docs"), 1)
+            page_cache.bump_generation(chroma_dir, "docs")
+            self.assertEqual(page_cache.read_generation(chroma_dir, "docs"), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
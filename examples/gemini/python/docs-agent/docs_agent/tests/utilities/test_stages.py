@@ -0,0 +1,73 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import contextvars
+import threading
+import unittest
+
+from docs_agent.utilities.stages import Stage, run_stages
+
+
+class TestRunStages(unittest.TestCase):
+    def test_independent_stages_overlap(self):
+        # Both stages wait for each other, so they only complete if they
+        # run at the same time.
+        barrier = threading.Barrier(2, timeout=5)
+
+        def wait(value):
+            def run(_):
+                barrier.wait()
+                return value
+
+            return run
+
+        results = run_stages(
+            {
+                "context": Stage(lambda _: "context"),
+                "response": Stage(wait("response"), depends_on=("context",)),
+                "related": Stage(wait("related"), depends_on=("context",)),
+                "summary": Stage(
+                    lambda inputs: inputs["response"] + "+" + inputs["related"],
+                    depends_on=("response", "related"),
+                ),
+            }
+        )
+        self.assertEqual(results["summary"], "response+related")
+        self.assertEqual(len(results), 4)
+
+    def test_stages_run_in_the_callers_context(self):
+        variable = contextvars.ContextVar("variable")
+        variable.set("request")
+        results = run_stages({"a": Stage(lambda _: variable.get(None))})
+        self.assertEqual(results["a"], "request")
+
+    def test_errors(self):
+        def fail(_):
+            raise RuntimeError("unavailable")
+
+        with self.assertRaises(RuntimeError):
+            run_stages({"a": Stage(fail), "b": Stage(lambda _: 1, depends_on=("a",))})
+        with self.assertRaises(ValueError):
+            run_stages({"a": Stage(lambda _: 1, depends_on=("b",))})
+        with self.assertRaises(ValueError):
+            run_stages(
+                {
+                    "a": Stage(lambda _: 1, depends_on=("b",)),
+                    "b": Stage(lambda _: 1, depends_on=("a",)),
+                }
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
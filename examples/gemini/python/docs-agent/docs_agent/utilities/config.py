@@ -40,6 +40,10 @@ class DbConfig:
         corpus_display: typing.Optional[str] = None,
         secondary_db_type: typing.Optional[str] = None,
         secondary_corpus_name: typing.Optional[str] = None,
+        # These for 'chroma': the reduced dimension of the embeddings, and how
+        # embeddings are stored in the flat index ('float32', 'float16' or 'int8')
+        output_dimensionality: typing.Optional[int] = None,
+        vector_dtype: str = "float32",
     ):
         self.db_type = db_type
         self.vector_db_dir = vector_db_dir
@@ -48,6 +52,8 @@ class DbConfig:
         self.corpus_display = corpus_display
         self.secondary_db_type = secondary_db_type
         self.secondary_corpus_name = secondary_corpus_name
+        self.output_dimensionality = output_dimensionality
+        self.vector_dtype = vector_dtype
 
     def __str__(self):
         help_str = ""
@@ -64,6 +70,10 @@ class DbConfig:
             help_str += f"Secondary database type: {self.secondary_db_type}\n"
         if self.secondary_corpus_name is not None and self.secondary_corpus_name != "":
             help_str += f"Secondary corpus name: {self.secondary_corpus_name}\n"
+        if self.output_dimensionality is not None:
+            help_str += f"Output dimensionality: {self.output_dimensionality}\n"
+        if self.vector_dtype is not None and self.vector_dtype != "float32":
+            help_str += f"Vector dtype: {self.vector_dtype}\n"
         return help_str
 
 
@@ -83,10 +93,17 @@ class ReadDbConfigs:
                 # Using .get let's you specify optional keys
                 db_type = item["db_type"]
                 if db_type == "chroma":
+                    output_dimensionality = item.get("output_dimensionality", None)
                     input_item = DbConfig(
                         db_type=db_type,
                         vector_db_dir=item["vector_db_dir"],
                         collection_name=item["collection_name"],
+                        output_dimensionality=(
+                            int(output_dimensionality)
+                            if output_dimensionality is not None
+                            else None
+                        ),
+                        vector_dtype=item.get("vector_dtype", "float32"),
                     )
                 elif db_type == "google_semantic_retriever":
                     input_item = DbConfig(
@@ -253,6 +270,8 @@ class Models:
         api_key: typing.Optional[str] = None,
         embedding_api_call_limit: typing.Optional[int] = None,
         embedding_api_call_period: typing.Optional[int] = None,
+        embedding_max_concurrency: typing.Optional[int] = None,
+        embedding_tokens_per_minute: typing.Optional[int] = None,
         response_type: typing.Optional[str] = "text/plain",
         response_schema: typing.Optional[dict] = None,
     ):
@@ -282,6 +301,14 @@ class Models:
             self.embedding_api_call_period = 60
         else:
             self.embedding_api_call_period = embedding_api_call_period
+        if embedding_max_concurrency is None:
+            self.embedding_max_concurrency = 1
+        else:
+            self.embedding_max_concurrency = int(embedding_max_concurrency)
+        if embedding_tokens_per_minute is None:
+            self.embedding_tokens_per_minute = None
+        else:
+            self.embedding_tokens_per_minute = int(embedding_tokens_per_minute)
 
     def __str__(self):
         help_str = ""
@@ -301,6 +328,10 @@ class Models:
             help_str += f"Embedding API call limit: {self.embedding_api_call_limit}\n"
         if self.embedding_api_call_period is not None and self.embedding_api_call_period != "":
             help_str += f"Embedding API call period: {self.embedding_api_call_period}\n"
+        if self.embedding_max_concurrency is not None and self.embedding_max_concurrency != "":
+            help_str += f"Embedding max concurrency: {self.embedding_max_concurrency}\n"
+        if self.embedding_tokens_per_minute is not None and self.embedding_tokens_per_minute != "":
+            help_str += f"Embedding tokens per minute: {self.embedding_tokens_per_minute}\n"
         return help_str
 
 
@@ -329,6 +360,12 @@ class ReadModels:
                     embedding_api_call_period=item.get(
                         "embedding_api_call_period", None
                     ),
+                    embedding_max_concurrency=item.get(
+                        "embedding_max_concurrency", None
+                    ),
+                    embedding_tokens_per_minute=item.get(
+                        "embedding_tokens_per_minute", None
+                    ),
                 )
                 models.append(model_item)
             except KeyError as error:
@@ -404,6 +441,7 @@ class ProductConfig:
         log_level: typing.Optional[str] = None,
         docs_agent_config: typing.Optional[str] = None,
         markdown_splitter: str = "token_splitter",
+        chunk_format: str = "files",
         db_type: str = "chroma",
         app_mode: str = "web",
         app_port: int = 5000,
@@ -412,6 +450,19 @@ class ProductConfig:
         enable_logs_to_markdown: str = "False",
         enable_logs_for_debugging: str = "False",
         enable_delete_chunks: str = "False",
+        populate_batch_size: int = 100,
+        embedding_cache_path: typing.Optional[str] = None,
+        embedding_cache_max_entries: int = 1000000,
+        page_cache_max_entries: int = 1000,
+        query_embedding_cache_max_entries: int = 1000,
+        vector_index: str = "chroma",
+        lexical_search: str = "off",
+        lexical_decisive_ratio: float = 2.0,
+        answer_cache_path: typing.Optional[str] = None,
+        answer_cache_similarity_threshold: float = 0.97,
+        answer_cache_max_entries: int = 10000,
+        defer_related_questions: str = "False",
+        related_questions_cache_max_entries: int = 1000,
         secondary_db_type: typing.Optional[str] = None,
         secondary_corpus_name: typing.Optional[str] = None,
         mcp_servers: typing.Optional[list[MCPServerConfig]] = None,
@@ -419,6 +470,7 @@ class ProductConfig:
         self.product_name = product_name
         self.docs_agent_config = docs_agent_config
         self.markdown_splitter = markdown_splitter
+        self.chunk_format = chunk_format
         self.db_type = db_type
         self.output_path = output_path
         self.db_configs = db_configs
@@ -433,6 +485,19 @@ class ProductConfig:
         self.enable_logs_to_markdown = enable_logs_to_markdown
         self.enable_logs_for_debugging = enable_logs_for_debugging
         self.enable_delete_chunks = enable_delete_chunks
+        self.populate_batch_size = populate_batch_size
+        self.embedding_cache_path = embedding_cache_path
+        self.embedding_cache_max_entries = embedding_cache_max_entries
+        self.page_cache_max_entries = page_cache_max_entries
+        self.query_embedding_cache_max_entries = query_embedding_cache_max_entries
+        self.vector_index = vector_index
+        self.lexical_search = lexical_search
+        self.lexical_decisive_ratio = lexical_decisive_ratio
+        self.answer_cache_path = answer_cache_path
+        self.answer_cache_similarity_threshold = answer_cache_similarity_threshold
+        self.answer_cache_max_entries = answer_cache_max_entries
+        self.defer_related_questions = defer_related_questions
+        self.related_questions_cache_max_entries = related_questions_cache_max_entries
         self.secondary_db_type = secondary_db_type
         self.secondary_corpus_name = secondary_corpus_name
         self.mcp_servers = mcp_servers
@@ -471,8 +536,29 @@ class ProductConfig:
             help_str += f"Enable logs for debugging: {self.enable_logs_for_debugging}\n"
         if self.enable_delete_chunks is not None and self.enable_delete_chunks != "":
             help_str += f"Enable delete chunks: {self.enable_delete_chunks}\n"
+        if self.populate_batch_size is not None and self.populate_batch_size != "":
+            help_str += f"Populate batch size: {self.populate_batch_size}\n"
+        if self.embedding_cache_path is not None and self.embedding_cache_path != "":
+            help_str += f"Embedding cache path: {self.embedding_cache_path}\n"
+            help_str += f"Embedding cache max entries: {self.embedding_cache_max_entries}\n"
+        help_str += f"Page cache max entries: {self.page_cache_max_entries}\n"
+        help_str += f"Query embedding cache max entries: {self.query_embedding_cache_max_entries}\n"
+        if self.vector_index is not None and self.vector_index != "":
+            help_str += f"Vector index: {self.vector_index}\n"
+        if self.lexical_search is not None and self.lexical_search != "off":
+            help_str += f"Lexical search: {self.lexical_search}\n"
+            help_str += f"Lexical decisive ratio: {self.lexical_decisive_ratio}\n"
+        if self.answer_cache_path is not None and self.answer_cache_path != "":
+            help_str += f"Answer cache path: {self.answer_cache_path}\n"
+            help_str += f"Answer cache similarity threshold: {self.answer_cache_similarity_threshold}\n"
+            help_str += f"Answer cache max entries: {self.answer_cache_max_entries}\n"
+        if self.defer_related_questions == "True":
+            help_str += f"Defer related questions: {self.defer_related_questions}\n"
+            help_str += f"Related questions cache max entries: {self.related_questions_cache_max_entries}\n"
         if self.markdown_splitter is not None and self.markdown_splitter != "":
             help_str += f"Markdown splitter: {self.markdown_splitter}\n"
+        if self.chunk_format is not None and self.chunk_format != "":
+            help_str += f"Chunk format: {self.chunk_format}\n"
         if self.db_type is not None and self.db_type != "":
             help_str += f"Database type: {self.db_type}\n"
         if self.secondary_db_type is not None and self.secondary_db_type != "":
@@ -635,6 +721,75 @@ class ReadConfig:
                     enable_delete_chunks = item["enable_delete_chunks"]
                 except KeyError:
                     enable_delete_chunks = "False"
+                # Set the default value of `chunk_format` to "files"
+                supported_chunk_formats = ["files", "jsonl"]
+                try:
+                    chunk_format = item["chunk_format"]
+                except KeyError:
+                    chunk_format = "files"
+                if chunk_format not in supported_chunk_formats:
+                    logging.error(
+                        f"Your configuration is using an invalid chunk format: {chunk_format}. Valid formats are {supported_chunk_formats}"
+                    )
+                    return sys.exit(1)
+                try:
+                    populate_batch_size = int(item["populate_batch_size"])
+                except KeyError:
+                    populate_batch_size = 100
+                try:
+                    embedding_cache_path = item["embedding_cache_path"]
+                except KeyError:
+                    embedding_cache_path = None
+                try:
+                    embedding_cache_max_entries = int(item["embedding_cache_max_entries"])
+                except KeyError:
+                    embedding_cache_max_entries = 1000000
+                try:
+                    page_cache_max_entries = int(item["page_cache_max_entries"])
+                except KeyError:
+                    page_cache_max_entries = 1000
+                try:
+                    query_embedding_cache_max_entries = int(
+                        item["query_embedding_cache_max_entries"]
+                    )
+                except KeyError:
+                    query_embedding_cache_max_entries = 1000
+                try:
+                    vector_index = item["vector_index"]
+                except KeyError:
+                    vector_index = "chroma"
+                try:
+                    lexical_search = item["lexical_search"]
+                except KeyError:
+                    lexical_search = "off"
+                try:
+                    lexical_decisive_ratio = float(item["lexical_decisive_ratio"])
+                except KeyError:
+                    lexical_decisive_ratio = 2.0
+                try:
+                    answer_cache_path = item["answer_cache_path"]
+                except KeyError:
+                    answer_cache_path = None
+                try:
+                    answer_cache_similarity_threshold = float(
+                        item["answer_cache_similarity_threshold"]
+                    )
+                except KeyError:
+                    answer_cache_similarity_threshold = 0.97
+                try:
+                    answer_cache_max_entries = int(item["answer_cache_max_entries"])
+                except KeyError:
+                    answer_cache_max_entries = 10000
+                try:
+                    defer_related_questions = str(item["defer_related_questions"])
+                except KeyError:
+                    defer_related_questions = "False"
+                try:
+                    related_questions_cache_max_entries = int(
+                        item["related_questions_cache_max_entries"]
+                    )
+                except KeyError:
+                    related_questions_cache_max_entries = 1000
                 try:
                     secondary_db_type = item["secondary_db_type"]
                 except KeyError:
@@ -648,6 +803,7 @@ class ReadConfig:
                         product_name=item["product_name"],
                         docs_agent_config=item["docs_agent_config"],
                         markdown_splitter=item["markdown_splitter"],
+                        chunk_format=chunk_format,
                         db_type=item["db_type"],
                         output_path=item["output_path"],
                         db_configs=item["db_configs"],
@@ -662,6 +818,19 @@ class ReadConfig:
                         enable_logs_to_markdown=enable_logs_to_markdown,
                         enable_logs_for_debugging=enable_logs_for_debugging,
                         enable_delete_chunks=enable_delete_chunks,
+                        populate_batch_size=populate_batch_size,
+                        embedding_cache_path=embedding_cache_path,
+                        embedding_cache_max_entries=embedding_cache_max_entries,
+                        page_cache_max_entries=page_cache_max_entries,
+                        query_embedding_cache_max_entries=query_embedding_cache_max_entries,
+                        vector_index=vector_index,
+                        lexical_search=lexical_search,
+                        lexical_decisive_ratio=lexical_decisive_ratio,
+                        answer_cache_path=answer_cache_path,
+                        answer_cache_similarity_threshold=answer_cache_similarity_threshold,
+                        answer_cache_max_entries=answer_cache_max_entries,
+                        defer_related_questions=defer_related_questions,
+                        related_questions_cache_max_entries=related_questions_cache_max_entries,
                         secondary_db_type=secondary_db_type,
                         secondary_corpus_name=secondary_corpus_name,
                         mcp_servers=item.get("mcp_servers", None),
@@ -0,0 +1,108 @@
+#
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Run the stages of a request as a dependency graph on a thread pool"""
+
+import concurrent.futures
+import contextvars
+import time
+import typing
+
+from absl import logging
+
+
+class Stage(typing.NamedTuple):
+    """A stage of a request.
+
+    `run` is called with a dictionary of the results of the stages listed in
+    `depends_on` once all of them are complete.
+    """
+
+    run: typing.Callable[[dict], typing.Any]
+    depends_on: typing.Tuple[str, ...] = ()
+
+
+def run_stages(
+    stages: typing.Dict[str, Stage],
+    max_workers: typing.Optional[int] = None,
+    label: str = "request",
+) -> dict:
+    """Runs stages as soon as the stages they depend on are complete.
+
+    Independent stages run concurrently, so the total latency is that of the
+    longest chain of dependent stages instead of the sum of all stages. The
+    time spent in each stage (and in total) is logged. Stages run in a copy
+    of the caller's context, so they can use the current Flask request (for
+    instance, `url_for`).
+
+    Args:
+        stages: The stages to run, keyed by name.
+        max_workers: The maximum number of stages that run at the same time.
+            Defaults to the number of stages.
+        label: A label for the log lines of the timings.
+
+    Returns:
+        A dictionary of the results of all stages, keyed by name.
+
+    Raises:
+        ValueError: If a stage depends on an unknown stage or if the
+            dependencies form a cycle.
+        Exception: The first exception raised by a stage.
+    """
+    for name, stage in stages.items():
+        for dependency in stage.depends_on:
+            if dependency not in stages:
+                raise ValueError(f"Stage {name} depends on unknown stage {dependency}")
+    results = {}
+    timings = {}
+    pending = dict(stages)
+    running = {}
+    start = time.perf_counter()
+
+    def timed(name, stage, inputs):
+        stage_start = time.perf_counter()
+        try:
+            return stage.run(inputs)
+        finally:
+            timings[name] = time.perf_counter() - stage_start
+
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=max_workers or max(1, len(stages))
+    ) as executor:
+        while pending or running:
+            # Submit every stage whose dependencies are complete.
+            for name, stage in list(pending.items()):
+                if all(dependency in results for dependency in stage.depends_on):
+                    inputs = {d: results[d] for d in stage.depends_on}
+                    context = contextvars.copy_context()
+                    future = executor.submit(context.run, timed, name, stage, inputs)
+                    running[future] = name
+                    del pending[name]
+            if not running:
+                raise ValueError(f"Stages have circular dependencies: {list(pending)}")
+            done, _ = concurrent.futures.wait(
+                running, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                name = running.pop(future)
+                # Re-raises the exception of a failed stage. Stages that are
+                # already running are completed when the executor shuts down.
+                results[name] = future.result()
+
+    total = time.perf_counter() - start
+    stage_timings = ", ".join(f"{name}={timings[name]:.3f}s" for name in timings)
+    logging.info(f"Timings of {label}: total={total:.3f}s, {stage_timings}")
+    return results